@@ -0,0 +1,263 @@
+"""
+Process pool for CPU-bound analytics.
+
+Jobs are module-level functions called with NumPy arrays and plain keyword
+arguments. Input arrays are packed into one shared-memory block and workers
+map them as zero-copy views; array results come back the same way, so only
+small descriptors cross the pipe. Each worker process runs one job at a
+time, which lets a job that times out or whose client has gone away be
+stopped by killing just its worker. A replacement is then spawned, and jobs
+on the other workers are unaffected.
+"""
+import asyncio
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import telemetry
+
+# Seconds between client-disconnect checks while a job runs
+DISCONNECT_POLL_SECONDS = 0.25
+
+# Array layout in a shared block: name -> (dtype, shape, offset)
+Layout = Dict[str, Tuple[str, Tuple[int, ...], int]]
+
+
+class JobTimeout(Exception):
+    """The job ran past its timeout and its worker was killed"""
+
+
+class JobCancelled(Exception):
+    """The client disconnected and the job's worker was killed"""
+
+
+class JobError(Exception):
+    """The job raised inside the worker"""
+
+
+def pack_arrays(arrays: Dict[str, np.ndarray]) -> Tuple[Optional[str], Layout]:
+    """Copy arrays into one new shared-memory block; returns (block name, layout)"""
+    layout: Layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        # Keep every array 8-byte aligned
+        offset = -(-offset // 8) * 8
+        layout[name] = (array.dtype.str, array.shape, offset)
+        offset += array.nbytes
+    if not layout:
+        return None, layout
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, array in arrays.items():
+        dtype, shape, start = layout[name]
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = array
+    shm.close()
+    return shm.name, layout
+
+
+def attach_arrays(name: Optional[str], layout: Layout) -> Tuple[Optional[shared_memory.SharedMemory],
+                                                                 Dict[str, np.ndarray]]:
+    """Map a packed block as array views; the block must stay open while they are used"""
+    if name is None:
+        return None, {}
+    shm = shared_memory.SharedMemory(name=name)
+    arrays = {
+        key: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+        for key, (dtype, shape, start) in layout.items()
+    }
+    return shm, arrays
+
+
+def unlink_block(name: Optional[str]):
+    if name is None:
+        return
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+        shm.close()
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _run_job(func: Callable, block: Optional[str], layout: Layout, kwargs: Dict):
+    """Worker side of one job: returns (result block, result layout, other result values)"""
+    shm, arrays = attach_arrays(block, layout)
+    try:
+        result = func(**arrays, **kwargs)
+    finally:
+        arrays = None
+        if shm is not None:
+            shm.close()
+    if not isinstance(result, dict):
+        return None, {}, result
+    array_results = {k: v for k, v in result.items() if isinstance(v, np.ndarray)}
+    other = {k: v for k, v in result.items() if not isinstance(v, np.ndarray)}
+    result_block, result_layout = pack_arrays(array_results)
+    return result_block, result_layout, other
+
+
+def _worker_main(conn):
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        func, block, layout, kwargs = message
+        try:
+            conn.send(("ok",) + _run_job(func, block, layout, kwargs))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}", None, None))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class AnalyticsPool:
+    """Bounded pool of analytics worker processes with per-job timeouts and cancellation"""
+
+    def __init__(self, workers: int = 2, timeout: float = 30.0, start_method: str = "forkserver"):
+        self.size = workers
+        self.timeout = timeout
+        self._context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            # Workers fork from a clean server that has only the analytics modules loaded,
+            # not the API process (its threads, sockets and open databases)
+            self._context.set_forkserver_preload(["analytics_pool", "performance", "projections"])
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_Worker] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def start(self):
+        """Spawn the workers now rather than on the first job"""
+        if self.enabled:
+            self._ensure_started()
+
+    def _ensure_started(self):
+        if self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._add_worker()
+
+    def _add_worker(self):
+        worker = _Worker(self._context)
+        self._workers.append(worker)
+        self._idle.put_nowait(worker)
+
+    def _replace(self, worker: _Worker):
+        worker.kill()
+        self._workers.remove(worker)
+        self._add_worker()
+
+    async def run(self, func: Callable, arrays: Dict[str, np.ndarray], timeout: Optional[float] = None,
+                  is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None, **kwargs) -> Dict:
+        """
+        Run func(**arrays, **kwargs) in a worker and return its result (array
+        values copied out of shared memory). Raises JobTimeout, JobCancelled or JobError.
+        Without workers the job runs on a thread instead.
+        """
+        name = getattr(func, "__name__", "job")
+        if not self.enabled:
+            with telemetry.ANALYTICS_JOB_SECONDS.time(job=name, outcome="inline"):
+                return await asyncio.to_thread(func, **arrays, **kwargs)
+
+        self._ensure_started()
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        outcome = "error"
+
+        # Jobs queue here while every worker is busy; the timeout counts from dispatch
+        worker = await self._idle.get()
+        deadline = time.monotonic() + timeout
+        block = None
+        try:
+            block, layout = pack_arrays(arrays)
+            worker.conn.send((func, block, layout, kwargs))
+
+            loop = asyncio.get_running_loop()
+            ready = loop.create_future()
+            fd = worker.conn.fileno()
+            loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+            try:
+                while not ready.done():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        outcome = "timeout"
+                        raise JobTimeout(f"{name} exceeded {timeout}s")
+                    await asyncio.wait({ready}, timeout=min(DISCONNECT_POLL_SECONDS, remaining))
+                    if not ready.done() and is_disconnected is not None and await is_disconnected():
+                        outcome = "cancelled"
+                        raise JobCancelled(f"{name} cancelled: client disconnected")
+            finally:
+                loop.remove_reader(fd)
+
+            try:
+                status, result_block, result_layout, other = worker.conn.recv()
+            except (EOFError, OSError) as e:
+                # The worker died mid-job (e.g. out of memory)
+                self._replace(worker)
+                worker = None
+                raise JobError(f"{name} worker exited: {e}")
+            if status == "error":
+                raise JobError(result_block)
+            shm, arrays_out = attach_arrays(result_block, result_layout)
+            try:
+                result = {key: np.array(value) for key, value in arrays_out.items()}
+            finally:
+                arrays_out = None
+                if shm is not None:
+                    shm.close()
+                unlink_block(result_block)
+            outcome = "ok"
+            if result_block is None and not result_layout and not isinstance(other, dict):
+                return other
+            result.update(other)
+            return result
+        except (JobTimeout, JobCancelled, asyncio.CancelledError):
+            if outcome == "error":
+                outcome = "cancelled"
+            # The worker is still busy with the abandoned job
+            self._replace(worker)
+            worker = None
+            raise
+        finally:
+            unlink_block(block)
+            if worker is not None:
+                self._idle.put_nowait(worker)
+            telemetry.ANALYTICS_JOB_SECONDS.observe(time.perf_counter() - start, job=name, outcome=outcome)
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+        self._idle = None
+
@@ -0,0 +1,54 @@
+"""
+Gap detection and as-of sampling for backfilling collector snapshots.
+
+Live snapshots land on (roughly) every scheduler slot, aligned to wall-clock
+multiples of the interval. After downtime the missing slots are found on that
+grid and filled from whatever price history is available - stored bars,
+earlier snapshots and upstream history - each sampled as of the slot time
+with a maximum staleness.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from performance import forward_fill
+
+
+def slot_grid(start_ts: int, end_ts: int, interval: int) -> np.ndarray:
+    """Wall-clock aligned slot timestamps in [start_ts, end_ts]"""
+    first = -(-start_ts // interval) * interval
+    return np.arange(first, end_ts + 1, interval, dtype=np.int64)
+
+
+def missing_slots(ts: np.ndarray, start_ts: int, end_ts: int, interval: int) -> np.ndarray:
+    """Aligned slots in [start_ts, end_ts] without an observation within half an interval"""
+    slots = slot_grid(start_ts, end_ts, interval)
+    ts = np.sort(np.asarray(ts, dtype=np.int64))
+    if not len(ts):
+        return slots
+    half = interval // 2
+    lo = np.searchsorted(ts, slots - half, side="left")
+    hi = np.searchsorted(ts, slots + half, side="left")
+    return slots[hi == lo]
+
+
+def merge_series(*series: Tuple[np.ndarray, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge (ts, values) pairs into one time-ordered series"""
+    series = [(np.asarray(ts, dtype=np.int64), np.asarray(values, dtype=np.float64))
+              for ts, values in series if len(ts)]
+    if not series:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    ts = np.concatenate([s[0] for s in series])
+    values = np.concatenate([s[1] for s in series])
+    order = np.argsort(ts, kind="stable")
+    return ts[order], values[order]
+
+
+def sample_asof(series: Tuple[np.ndarray, np.ndarray], slots: np.ndarray,
+                max_age: Optional[int] = None, positive: bool = True) -> np.ndarray:
+    """
+    Last valid value at or before each slot (NaN when none, or older than `max_age`).
+    Prices only count when positive; pass positive=False for quantities that can be 0.
+    """
+    ts, values = series
+    return forward_fill(ts, values, slots, max_age, positive)
@@ -0,0 +1,289 @@
+"""
+Append-only, memory-mapped columnar archive for OHLCV bars.
+
+Layout: <root>/<SYMBOL>/<generation>/<YYYY-MM>/<column>.bin, one raw
+little-endian file per column (ts as int64 epoch seconds, prices/volume as
+float64), where <root>/<SYMBOL>/CURRENT names the live generation (archives
+written before generations existed keep their months directly under the
+symbol). Month directories form the coarse time index and the sorted ts
+column the fine one, so a range read is a directory listing plus a binary
+search, and slices within a month are zero-copy views of the mapped files.
+
+Several API workers share one archive. A replace builds a new generation in
+a private staging directory and swaps CURRENT atomically; appends grow the
+month files in place. Mapped months are revalidated against their files on
+every read, so each worker sees the others' writes. Writers to a symbol are
+serialized across processes by a lock file where fcntl is available.
+"""
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+import numpy as np
+
+from indicators import BAR_FIELDS, empty_bars
+
+COLUMN_DTYPES = {field: np.dtype("<f8") for field in BAR_FIELDS}
+COLUMN_DTYPES["ts"] = np.dtype("<i8")
+
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+
+
+def month_key(ts: int) -> str:
+    """YYYY-MM partition for an epoch timestamp"""
+    return datetime.fromtimestamp(int(ts), timezone.utc).strftime("%Y-%m")
+
+
+class BarArchive:
+    """Per-symbol, per-month column files with append and range-slice access"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.RLock()
+        # Month path -> (file signature, mapped columns)
+        self._maps: Dict[str, Tuple[tuple, Dict[str, np.ndarray]]] = {}
+
+    def _base(self, symbol: str) -> str:
+        """Directory holding a symbol's month partitions: the CURRENT generation, else the symbol directory"""
+        path = os.path.join(self.root, symbol)
+        try:
+            with open(os.path.join(path, CURRENT_FILE)) as f:
+                generation = f.read().strip()
+        except FileNotFoundError:
+            return path
+        return os.path.join(path, generation) if generation else path
+
+    @contextmanager
+    def _writer(self, symbol: str):
+        """Exclusive write access to a symbol, across threads and (with fcntl) processes"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            lock_path = os.path.join(self.root, f"{symbol}.lock")
+            os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+            with open(lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _months_in(base: str) -> List[str]:
+        if not os.path.isdir(base):
+            return []
+        return sorted(name for name in os.listdir(base) if len(name) == 7 and name[4] == "-")
+
+    def months(self, symbol: str) -> List[str]:
+        """Sorted month partitions stored for a symbol"""
+        return self._months_in(self._base(symbol))
+
+    @staticmethod
+    def _signature(path: str) -> tuple:
+        """Identity and size of each column file; changes whenever any process writes the month"""
+        signature = []
+        for field in COLUMN_DTYPES:
+            try:
+                st = os.stat(os.path.join(path, f"{field}.bin"))
+                signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _open_month(self, base: str, month: str) -> Dict[str, np.ndarray]:
+        """Memory-map every column of a month (reused while its files are unchanged)"""
+        path = os.path.join(base, month)
+        signature = self._signature(path)
+        cached = self._maps.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        # A crash between column appends can leave columns of unequal length;
+        # only rows present in every column are visible
+        rows = min(
+            entry[1] // dtype.itemsize if entry is not None else 0
+            for entry, dtype in zip(signature, COLUMN_DTYPES.values())
+        )
+        if rows == 0:
+            columns = empty_bars()
+        else:
+            columns = {
+                field: np.memmap(os.path.join(path, f"{field}.bin"), dtype=dtype, mode="r", shape=(rows,))
+                for field, dtype in COLUMN_DTYPES.items()
+            }
+        self._maps[path] = (signature, columns)
+        return columns
+
+    def _forget(self, symbol: str, keep: Optional[str] = None):
+        """Drop mapped months of a symbol outside the `keep` directory"""
+        path = os.path.join(self.root, symbol) + os.sep
+        prefix = keep + os.sep if keep is not None else None
+        for key in [k for k in self._maps if k.startswith(path) and not (prefix and k.startswith(prefix))]:
+            del self._maps[key]
+
+    def _write_month(self, base: str, month: str, bars: Dict[str, np.ndarray], mode: str):
+        path = os.path.join(base, month)
+        os.makedirs(path, exist_ok=True)
+        self._maps.pop(path, None)
+        rows = self._rows_on_disk(path) if mode == "ab" else 0
+        for field, dtype in COLUMN_DTYPES.items():
+            with open(os.path.join(path, f"{field}.bin"), mode) as f:
+                if mode == "ab":
+                    # Drop any torn tail left by an interrupted append
+                    f.truncate(rows * dtype.itemsize)
+                f.write(np.ascontiguousarray(bars[field], dtype=dtype).tobytes())
+
+    @staticmethod
+    def _rows_on_disk(path: str) -> int:
+        sizes = []
+        for field, dtype in COLUMN_DTYPES.items():
+            file_path = os.path.join(path, f"{field}.bin")
+            sizes.append(os.path.getsize(file_path) // dtype.itemsize if os.path.exists(file_path) else 0)
+        return min(sizes)
+
+    def append(self, symbol: str, bars: Dict[str, np.ndarray]) -> int:
+        """
+        Append time-ordered bars newer than the last archived bar.
+
+        Bars at or before the archived tail are skipped, keeping each column
+        strictly increasing in ts. Returns the number of bars written.
+        """
+        if not len(bars["ts"]):
+            return 0
+        with self._writer(symbol):
+            base = self._base(symbol)
+            last = self.last_ts(symbol)
+            if last is not None:
+                start = int(np.searchsorted(bars["ts"], last, side="right"))
+                bars = {field: bars[field][start:] for field in BAR_FIELDS}
+            if not len(bars["ts"]):
+                return 0
+
+            months = np.array([month_key(ts) for ts in bars["ts"][[0, -1]]])
+            if months[0] == months[1]:
+                self._write_month(base, months[0], bars, "ab")
+            else:
+                keys = np.array([month_key(ts) for ts in bars["ts"]])
+                bounds = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1, [len(keys)]))
+                for lo, hi in zip(bounds[:-1], bounds[1:]):
+                    self._write_month(base, keys[lo], {f: bars[f][lo:hi] for f in BAR_FIELDS}, "ab")
+            return len(bars["ts"])
+
+    def replace(self, symbol: str, bars: Dict[str, np.ndarray]):
+        """Replace a symbol's whole archive with the given bars (e.g. on CSV re-import)"""
+        order = np.argsort(bars["ts"], kind="stable")
+        bars = {field: np.asarray(bars[field])[order] for field in BAR_FIELDS}
+        if len(bars["ts"]):
+            # Keep the last bar for duplicated timestamps
+            keep = np.concatenate((bars["ts"][1:] != bars["ts"][:-1], [True]))
+            bars = {field: bars[field][keep] for field in BAR_FIELDS}
+
+        with self._writer(symbol):
+            path = os.path.join(self.root, symbol)
+            os.makedirs(path, exist_ok=True)
+            # A fresh generation per call; it only goes live with the CURRENT swap below
+            staging = tempfile.mkdtemp(prefix=GENERATION_PREFIX, dir=path)
+            if len(bars["ts"]):
+                keys = np.array([month_key(ts) for ts in bars["ts"]])
+                bounds = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1, [len(keys)]))
+                for lo, hi in zip(bounds[:-1], bounds[1:]):
+                    month_path = os.path.join(staging, keys[lo])
+                    os.makedirs(month_path)
+                    for field, dtype in COLUMN_DTYPES.items():
+                        bars[field][lo:hi].astype(dtype).tofile(os.path.join(month_path, f"{field}.bin"))
+            fd, pointer = tempfile.mkstemp(prefix=CURRENT_FILE + ".", dir=path)
+            with os.fdopen(fd, "w") as f:
+                f.write(os.path.basename(staging))
+            os.replace(pointer, os.path.join(path, CURRENT_FILE))
+
+            # Writers hold the lock, so everything else here is an older generation, a legacy
+            # month or a stray pointer; readers still on it keep their mapped files
+            for name in os.listdir(path):
+                if name in (CURRENT_FILE, os.path.basename(staging)):
+                    continue
+                target = os.path.join(path, name)
+                if os.path.isdir(target):
+                    shutil.rmtree(target, ignore_errors=True)
+                else:
+                    os.remove(target)
+            self._forget(symbol)
+
+    def drop_before(self, symbol: str, ts: int) -> int:
+        """Delete whole months that end at or before `ts` (retention); returns how many"""
+        with self._writer(symbol):
+            base = self._base(symbol)
+            expired = [month for month in self._months_in(base) if month < month_key(ts)]
+            for month in expired:
+                self._maps.pop(os.path.join(base, month), None)
+                shutil.rmtree(os.path.join(base, month), ignore_errors=True)
+            return len(expired)
+
+    def _with_base(self, symbol: str, read, attempts: int = 5):
+        """
+        Run read(base) on the current generation. A replace in another process swaps
+        CURRENT before deleting the old generation, so a read that overlapped the
+        deletion sees CURRENT move and is retried on the new generation.
+        """
+        with self._lock:
+            for attempt in range(attempts):
+                base = self._base(symbol)
+                self._forget(symbol, keep=base)
+                try:
+                    result = read(base)
+                except FileNotFoundError:
+                    if attempt == attempts - 1:
+                        raise
+                    continue
+                if self._base(symbol) == base or attempt == attempts - 1:
+                    return result
+
+    def last_ts(self, symbol: str) -> Optional[int]:
+        """Timestamp of the newest archived bar"""
+        def read(base):
+            for month in reversed(self._months_in(base)):
+                columns = self._open_month(base, month)
+                if len(columns["ts"]):
+                    return int(columns["ts"][-1])
+            return None
+        return self._with_base(symbol, read)
+
+    def read_chunks(self, symbol: str, start_ts: Optional[int] = None,
+                    end_ts: Optional[int] = None) -> List[Dict[str, np.ndarray]]:
+        """Zero-copy per-month views of the bars with start_ts <= ts <= end_ts"""
+        first = month_key(start_ts) if start_ts is not None else None
+        last = month_key(end_ts) if end_ts is not None else None
+
+        def read(base):
+            chunks = []
+            for month in self._months_in(base):
+                if (first and month < first) or (last and month > last):
+                    continue
+                columns = self._open_month(base, month)
+                ts = columns["ts"]
+                lo = int(np.searchsorted(ts, start_ts, side="left")) if start_ts is not None else 0
+                hi = int(np.searchsorted(ts, end_ts, side="right")) if end_ts is not None else len(ts)
+                if hi > lo:
+                    chunks.append({field: columns[field][lo:hi] for field in BAR_FIELDS})
+            return chunks
+        return self._with_base(symbol, read)
+
+    def read(self, symbol: str, start_ts: Optional[int] = None,
+             end_ts: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Bars in [start_ts, end_ts]; zero-copy when the range sits inside one month"""
+        chunks = self.read_chunks(symbol, start_ts, end_ts)
+        if not chunks:
+            return empty_bars()
+        if len(chunks) == 1:
+            return chunks[0]
+        return {field: np.concatenate([chunk[field] for chunk in chunks]) for field in BAR_FIELDS}
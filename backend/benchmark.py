@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the backend API and ingestion paths.
+
+Generates synthetic OHLCV bars and collector snapshots at multiples of the
+bundled CSVs, then measures CSV import throughput, p50/p99 latency of every
+GET /api/* route through an in-process ASGI client, and peak RSS. Each scale
+runs in a fresh process and working directory so memory and caches do not
+carry over between runs. Results are written as JSON for comparing commits:
+
+    python benchmark.py --scales 1,100,10000 --output benchmark_results.json
+    python benchmark.py --compare baseline.json benchmark_results.json
+    python benchmark.py --import-profile
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULT_PREFIX = "BENCHMARK_RESULT "
+
+# Rows in the bundled CSVs; scale 1 reproduces these sizes
+BASE_BAR_ROWS = {"ETHUSD": 1398, "SBET": 260}
+# Collector snapshots per company at scale 1 (one day at the 5-minute schedule)
+BASE_SNAPSHOT_ROWS = 288
+BAR_SECONDS = 1800
+SNAPSHOT_SECONDS = 300
+START_PRICES = {"ETHUSD": 2500.0, "SBET": 20.0}
+
+# Query parameters for routes whose defaults would only touch a sliver of the data
+ROUTE_PARAMS = {
+    "/api/eth-purchases": {"timeframe": "ALL"},
+    "/api/bars": {"timeframe": "1M"},
+    "/api/indicators": {"symbol": "SBET", "timeframe": "1M"},
+}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def write_synthetic_csv(path: str, rows: int, start_price: float, end_local: np.datetime64,
+                        rng: np.random.Generator, chunk_rows: int = 500_000):
+    """Write a random-walk OHLCV CSV in the bundled format (market-local time, newest first)"""
+    with open(path, "w") as f:
+        f.write("Date,Open,High,Low,Close,Volume\n")
+        price = start_price
+        # Generate oldest to newest in chunks, then write each chunk newest first
+        chunks = []
+        for lo in range(0, rows, chunk_rows):
+            n = min(chunk_rows, rows - lo)
+            close = price * np.exp(np.cumsum(rng.normal(0.0, 0.004, n)))
+            open_ = np.concatenate(([price], close[:-1]))
+            wick = np.abs(rng.normal(0.0, 0.002, n))
+            high = np.maximum(open_, close) * (1 + wick)
+            low = np.minimum(open_, close) * (1 - wick)
+            volume = rng.lognormal(12.0, 1.0, n)
+            chunks.append((lo, open_, high, low, close, volume))
+            price = float(close[-1])
+
+        first = end_local - np.timedelta64((rows - 1) * BAR_SECONDS, "s")
+        for lo, open_, high, low, close, volume in reversed(chunks):
+            stamps = (first + np.arange(lo, lo + len(close)) * np.timedelta64(BAR_SECONDS, "s"))
+            dates = np.char.replace(stamps.astype("datetime64[s]").astype(str), "T", " ")
+            lines = [
+                f"{d},{o:.4f},{h:.4f},{l:.4f},{c:.4f},{v:.2f}\n"
+                for d, o, h, l, c, v in zip(dates[::-1].tolist(), open_[::-1].tolist(), high[::-1].tolist(),
+                                            low[::-1].tolist(), close[::-1].tolist(), volume[::-1].tolist())
+            ]
+            f.writelines(lines)
+
+
+def insert_snapshots(main, symbol: str, rows: int, end_ts: int, rng: np.random.Generator):
+    """Insert synthetic collector snapshots (price_history, metrics) for a company"""
+    ts = end_ts - np.arange(rows)[::-1] * SNAPSHOT_SECONDS
+    eth_price = 2500.0 * np.exp(np.cumsum(rng.normal(0.0, 0.002, rows)))
+    stock_price = 20.0 * np.exp(np.cumsum(rng.normal(0.0, 0.003, rows)))
+    shares = 191_411_370
+    holdings = np.linspace(150_000.0, 200_000.0, rows)
+    market_cap = stock_price * shares
+    treasury_value = holdings * eth_price
+    nav = market_cap / treasury_value
+
+    conn = main.sqlite3.connect(main.DATABASE)
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT INTO price_history
+        (timestamp, symbol, eth_price, stock_price, market_cap, eth_holdings, outstanding_shares)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [(int(t), symbol, float(e), float(s), int(m), float(h), shares)
+          for t, e, s, m, h in zip(ts, eth_price, stock_price, market_cap, holdings)])
+    cursor.executemany("""
+        INSERT INTO metrics
+        (timestamp, symbol, nav_multiplier, eth_per_share, nav_premium_pct, treasury_value_usd)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(int(t), symbol, float(n), float(h / shares), float((n - 1) * 100), float(v))
+          for t, n, h, v in zip(ts, nav, holdings, treasury_value)])
+    conn.commit()
+    conn.close()
+
+
+def api_routes(app) -> List[str]:
+    """Every parameterless GET /api/* route registered on the app"""
+    from fastapi.routing import APIRoute
+    return sorted(
+        route.path for route in app.routes
+        if isinstance(route, APIRoute) and route.path.startswith("/api/")
+        and "GET" in route.methods and "{" not in route.path
+    )
+
+
+async def measure_routes(app, routes: List[str], requests: int) -> Dict[str, Dict]:
+    """Cold and warm latency of each route through an in-process ASGI client"""
+    import httpx
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for path in routes:
+            params = ROUTE_PARAMS.get(path, {})
+            start = time.perf_counter()
+            response = await client.get(path, params=params)
+            cold_ms = (time.perf_counter() - start) * 1000
+
+            timings = []
+            errors = 0
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = await client.get(path, params=params)
+                timings.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 500:
+                    errors += 1
+
+            results[path] = {
+                "params": params,
+                "status": response.status_code,
+                "bytes": len(response.content),
+                "cold_ms": round(cold_ms, 3),
+                "p50_ms": round(float(np.percentile(timings, 50)), 3),
+                "p99_ms": round(float(np.percentile(timings, 99)), 3),
+                "errors": errors,
+            }
+            print(f"  {path}: p50={results[path]['p50_ms']:.2f}ms p99={results[path]['p99_ms']:.2f}ms "
+                  f"({response.status_code}, {len(response.content)} bytes)")
+    return results
+
+
+def run_scale(scale: int, requests: int, seed: int) -> Dict:
+    """Generate data at one scale, import it and benchmark every route (run in a worker process)"""
+    workdir = tempfile.mkdtemp(prefix=f"benchmark_{scale}x_")
+    os.chdir(workdir)
+    os.environ["BAR_ARCHIVE_DIR"] = os.path.join(workdir, "bar_archive")
+    sys.path.insert(0, BACKEND_DIR)
+
+    import main
+    from timeutil import CSV_TIMEZONE, now_ts
+
+    rng = np.random.default_rng(seed)
+    result = {"scale": scale, "workdir": workdir, "bars": {}, "import": {}, "routes": {}}
+
+    # Bars end at the current half hour so relative timeframes hit data
+    end_local = np.datetime64(datetime.now(CSV_TIMEZONE).replace(tzinfo=None, second=0, microsecond=0), "s")
+    end_local -= np.timedelta64(int(end_local.astype(np.int64) % BAR_SECONDS), "s")
+
+    print(f"[{scale}x] Generating synthetic data in {workdir}")
+    start = time.perf_counter()
+    csv_paths = {}
+    for symbol, base_rows in BASE_BAR_ROWS.items():
+        rows = base_rows * scale
+        csv_paths[symbol] = os.path.join(workdir, f"{symbol}_synthetic.csv")
+        write_synthetic_csv(csv_paths[symbol], rows, START_PRICES[symbol], end_local, rng)
+        result["bars"][symbol] = rows
+    result["generate_seconds"] = round(time.perf_counter() - start, 3)
+
+    main.init_database()
+    insert_snapshots(main, main.DEFAULT_SYMBOL, BASE_SNAPSHOT_ROWS * scale, now_ts(), rng)
+    result["snapshots"] = BASE_SNAPSHOT_ROWS * scale
+
+    print(f"[{scale}x] Importing CSVs")
+    for symbol, path in csv_paths.items():
+        start = time.perf_counter()
+        ok = asyncio.run(main.data_collector.import_bars_csv(symbol, path))
+        seconds = time.perf_counter() - start
+        result["import"][symbol] = {
+            "ok": ok,
+            "rows": result["bars"][symbol],
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(result["bars"][symbol] / seconds, 1) if seconds > 0 else None,
+        }
+        print(f"  {symbol}: {result['import'][symbol]['rows_per_sec']} rows/sec")
+    # Materialize the concentration series the imports marked stale
+    start = time.perf_counter()
+    asyncio.run(main.refresh_concentration())
+    result["concentration_seconds"] = round(time.perf_counter() - start, 3)
+    result["peak_rss_mb_after_import"] = round(peak_rss_mb(), 1)
+
+    print(f"[{scale}x] Benchmarking routes ({requests} requests each)")
+    result["routes"] = asyncio.run(measure_routes(main.app, api_routes(main.app), requests))
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return result
+
+
+def profile_imports(top: int = 10) -> Dict:
+    """Cold `import main` in a fresh interpreter: wall time, peak RSS and the slowest direct imports"""
+    code = "import resource, main; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BACKEND_DIR,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"}
+
+    # Lines read "import time: self_us | cumulative_us | <two spaces per nesting level>module"
+    total_us = 0
+    direct = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if name == "main" and depth == 0:
+            total_us = int(cumulative)
+        elif depth == 1:
+            direct.append((name, int(cumulative)))
+    direct.sort(key=lambda item: item[1], reverse=True)
+
+    peak = int(proc.stdout.strip().splitlines()[-1])
+    return {
+        "import_ms": round(total_us / 1000, 1),
+        "peak_rss_mb": round(peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024, 1),
+        "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in direct[:top]},
+    }
+
+
+def run_worker(scale: int, requests: int, seed: int, keep: bool) -> Dict:
+    """Run one scale in a fresh interpreter and collect its result"""
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", "--scales", str(scale),
+           "--requests", str(requests), "--seed", str(seed)]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, text=True)
+    elapsed = round(time.perf_counter() - start, 3)
+
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+        else:
+            print(line)
+
+    if result is None:
+        # Typically the OOM killer at the largest scales
+        return {"scale": scale, "error": f"worker exited with code {proc.returncode}", "wall_seconds": elapsed}
+
+    result["wall_seconds"] = elapsed
+    if not keep:
+        import shutil
+        shutil.rmtree(result.pop("workdir"), ignore_errors=True)
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(old_path: str, new_path: str):
+    """Print per-scale changes in import throughput and route latency between two result files"""
+    with open(old_path) as f:
+        old_report = json.load(f)
+    with open(new_path) as f:
+        new_report = json.load(f)
+    old = {r["scale"]: r for r in old_report["results"]}
+    new = {r["scale"]: r for r in new_report["results"]}
+
+    def change(a, b):
+        if not a or b is None:
+            return "n/a"
+        return f"{(b - a) / a * 100:+.1f}%"
+
+    a, b = old_report.get("cold_import", {}), new_report.get("cold_import", {})
+    if "import_ms" in a and "import_ms" in b:
+        print(f"import main: {a['import_ms']} -> {b['import_ms']} ms ({change(a['import_ms'], b['import_ms'])}), "
+              f"peak RSS {a['peak_rss_mb']} -> {b['peak_rss_mb']} MB ({change(a['peak_rss_mb'], b['peak_rss_mb'])})")
+
+    for scale in sorted(set(old) & set(new)):
+        a, b = old[scale], new[scale]
+        print(f"\n{scale}x")
+        if "error" in a or "error" in b:
+            print(f"  skipped: {a.get('error') or b.get('error')}")
+            continue
+        for symbol in sorted(set(a["import"]) & set(b["import"])):
+            x, y = a["import"][symbol]["rows_per_sec"], b["import"][symbol]["rows_per_sec"]
+            print(f"  import {symbol}: {x} -> {y} rows/sec ({change(x, y)})")
+        print(f"  peak RSS: {a['peak_rss_mb']} -> {b['peak_rss_mb']} MB ({change(a['peak_rss_mb'], b['peak_rss_mb'])})")
+        for path in sorted(set(a["routes"]) & set(b["routes"])):
+            x, y = a["routes"][path], b["routes"][path]
+            print(f"  {path}: p50 {x['p50_ms']} -> {y['p50_ms']} ms ({change(x['p50_ms'], y['p50_ms'])}), "
+                  f"p99 {x['p99_ms']} -> {y['p99_ms']} ms ({change(x['p99_ms'], y['p99_ms'])})")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion and API latency on synthetic data")
+    parser.add_argument("--scales", default="1,100,10000", help="Comma-separated multiples of the bundled CSVs")
+    parser.add_argument("--requests", type=int, default=50, help="Timed requests per route")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated data directories")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    parser.add_argument("--import-profile", action="store_true",
+                        help="Only profile a cold `import main` (python -X importtime)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.import_profile:
+        print(json.dumps(profile_imports(), indent=2))
+        return
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+
+    if args.worker:
+        result = run_scale(scales[0], args.requests, args.seed)
+        print(RESULT_PREFIX + json.dumps(result), flush=True)
+        return
+
+    print("🚀 Starting benchmark")
+    cold_import = profile_imports()
+    print(f"import main: {cold_import.get('import_ms')} ms, peak RSS {cold_import.get('peak_rss_mb')} MB")
+    results = [run_worker(scale, args.requests, args.seed, args.keep) for scale in scales]
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now().astimezone().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "requests_per_route": args.requests,
+        "seed": args.seed,
+        "cold_import": cold_import,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
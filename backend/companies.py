@@ -0,0 +1,52 @@
+"""
+Company registry for the crypto-treasury companies tracked side by side.
+
+The registry lives in the `companies` table. It is seeded with SharpLink
+from the environment plus any entries in the JSON file named by
+COMPANIES_FILE, e.g.:
+
+    [{"symbol": "BMNR", "name": "BitMine Immersion", "diluted_shares": 100000000}]
+"""
+import json
+import os
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class Company(BaseModel):
+    symbol: str                      # Stock ticker; also the bar-store symbol
+    name: str
+    asset: str = "ETH"               # Treasury asset
+    asset_symbol: str = "ETHUSD"     # Bar-store symbol of the asset price
+    coingecko_id: str = "ethereum"
+    treasury_wallet: Optional[str] = None
+    diluted_shares: int = 0
+    active: bool = True
+
+
+COMPANY_COLUMNS = list(Company.model_fields)
+
+
+def seed_companies(default_symbol: str, default_wallet: str) -> List[Company]:
+    """Companies inserted into an empty registry"""
+    companies = [
+        Company(
+            symbol=default_symbol,
+            name="SharpLink Gaming",
+            treasury_wallet=default_wallet,
+            diluted_shares=int(os.getenv("DILUTED_SHARES", "191411370")),
+        )
+    ]
+
+    companies_file = os.getenv("COMPANIES_FILE", "")
+    if companies_file and os.path.exists(companies_file):
+        with open(companies_file, "r") as f:
+            companies.extend(Company(**entry) for entry in json.load(f))
+
+    return companies
+
+
+def company_row(company: Company) -> tuple:
+    """Company as a tuple in COMPANY_COLUMNS order"""
+    return tuple(getattr(company, column) for column in COMPANY_COLUMNS)
@@ -0,0 +1,142 @@
+"""
+Response compression negotiated from Accept-Encoding (brotli or gzip).
+
+CompressionMiddleware compresses JSON and text responses on the way out.
+Responses served from the response caches are built from a Payload instead:
+the rendered JSON body plus each compressed variant, added the first time a
+client asks for that encoding and cached with the body. As cache keys embed
+data versions, a hot payload is compressed once per data version rather than
+once per request; the middleware passes such already-encoded responses
+through untouched.
+"""
+import gzip
+from typing import Dict, Optional
+
+import brotli
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+# Smaller bodies are sent as they are
+MIN_SIZE = 1024
+
+# Preferred first when a client accepts several equally
+ENCODINGS = ("br", "gzip")
+
+# Per-request compression stays cheap; cached payloads are compressed once, so harder
+LIVE_LEVELS = {"br": 4, "gzip": 6}
+CACHED_LEVELS = {"br": 9, "gzip": 9}
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The supported encoding the client weights highest (None: send identity)"""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip()] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class Payload:
+    """A rendered JSON body and the compressed variants built from it so far"""
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self.variants: Dict[str, bytes] = {}
+
+    @classmethod
+    def from_content(cls, content) -> "Payload":
+        return cls(JSONResponse(jsonable_encoder(content)).body)
+
+    def encode(self, encoding: Optional[str]) -> bool:
+        """Build the `encoding` variant if missing and worth it; True when one was added"""
+        if encoding is None or encoding in self.variants or len(self.body) < MIN_SIZE:
+            return False
+        self.variants[encoding] = compress(self.body, encoding, CACHED_LEVELS[encoding])
+        return True
+
+    def response(self, encoding: Optional[str]) -> Response:
+        headers = {"Vary": "Accept-Encoding"}
+        body = self.variants.get(encoding)
+        if body is None:
+            body = self.body
+        else:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=self.media_type, headers=headers)
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing JSON/text responses of at least MIN_SIZE bytes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept = next((value.decode("latin-1") for key, value in scope["headers"] if key == b"accept-encoding"), "")
+        encoding = negotiate(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "chunks": [], "passthrough": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = {key.lower(): value for key, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                state["passthrough"] = (b"content-encoding" in headers or message["status"] in (204, 304)
+                                        or not content_type.startswith(COMPRESSIBLE_TYPES))
+                if state["passthrough"]:
+                    await send(message)
+                else:
+                    state["start"] = message
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            # Buffer the whole body: responses here are built in memory anyway
+            state["chunks"].append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(state["chunks"])
+            start = state["start"]
+            headers = [(key, value) for key, value in start.get("headers", []) if key.lower() != b"content-length"]
+            vary = [i for i, (key, _) in enumerate(headers) if key.lower() == b"vary"]
+            if vary:
+                key, value = headers[vary[0]]
+                headers[vary[0]] = (key, value + b", Accept-Encoding")
+            else:
+                headers.append((b"vary", b"Accept-Encoding"))
+            if len(body) >= MIN_SIZE:
+                body = compress(body, encoding, LIVE_LEVELS[encoding])
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"content-length", str(len(body)).encode("latin-1")))
+            await send(dict(start, headers=headers))
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,63 @@
+"""
+Materialized treasury concentration series.
+
+Concentration, ETH per share and mNAV are derived from prices and holdings
+rather than recorded by whoever happens to ask: the stock price drives the
+time grid (bars plus live snapshots), and the asset price, holdings and
+share count are sampled as of each point. Inputs that change mark a symbol
+dirty from the earliest affected time, and only that tail is recomputed.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def concentration_series(ts: np.ndarray, eth_price: np.ndarray, stock_price: np.ndarray,
+                         eth_holdings: np.ndarray, shares_outstanding: np.ndarray) -> Dict[str, np.ndarray]:
+    """Concentration metrics at each point; points missing an input are dropped"""
+    ok = (np.isfinite(eth_price) & np.isfinite(stock_price) & np.isfinite(eth_holdings)
+          & np.isfinite(shares_outstanding) & (shares_outstanding > 0))
+    ts, eth_price, stock_price, eth_holdings, shares_outstanding = (
+        x[ok] for x in (ts, eth_price, stock_price, eth_holdings, shares_outstanding))
+
+    market_cap = stock_price * shares_outstanding
+    treasury_value = eth_holdings * eth_price
+    with np.errstate(divide="ignore", invalid="ignore"):
+        concentration = np.where(market_cap > 0, treasury_value / market_cap * 100, 0.0)
+        nav_multiplier = np.where(treasury_value > 0, market_cap / treasury_value, 0.0)
+
+    return {
+        "ts": ts,
+        "eth_price": eth_price,
+        "stock_price": stock_price,
+        "eth_holdings": eth_holdings,
+        "shares_outstanding": shares_outstanding,
+        "market_cap": market_cap,
+        "treasury_value_usd": treasury_value,
+        "eth_concentration_pct": concentration,
+        "eth_per_share": eth_holdings / shares_outstanding,
+        "nav_multiplier": nav_multiplier,
+    }
+
+
+class DirtyRanges:
+    """Earliest changed timestamp per symbol still waiting to be recomputed (None = everything)"""
+
+    def __init__(self):
+        self._dirty: Dict[str, Optional[int]] = {}
+
+    def mark(self, symbol: str, from_ts: Optional[int] = None):
+        if symbol in self._dirty:
+            current = self._dirty[symbol]
+            if current is None or from_ts is None:
+                from_ts = None
+            else:
+                from_ts = min(current, from_ts)
+        self._dirty[symbol] = from_ts
+
+    def drain(self) -> Dict[str, Optional[int]]:
+        dirty, self._dirty = self._dirty, {}
+        return dirty
+
+    def __len__(self):
+        return len(self._dirty)
@@ -0,0 +1,110 @@
+"""
+Delta sync for the series endpoints.
+
+Every write to a series (`snapshots:<SYMBOL>`, `bars:<SYMBOL>`, ...) logs the
+earliest timestamp it inserted, rewrote or deleted in `series_changes`, in the
+same transaction where the writer allows, under a global increasing seq.
+Responses carry `sync_token`, the last seq they reflect. Passing it back as
+`since` returns only the rows from the earliest change after that seq on,
+with `replace_from`: the client drops its rows at or after that timestamp and
+appends the new ones. Live appends log their own timestamp, so a poll only
+fetches the new rows; a backfill, re-import or retention pass resends the
+tail it touched. A token the pruned log no longer covers resends the whole
+window.
+"""
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+
+from timeutil import iso
+
+CREATE_SERIES_CHANGES = """
+    CREATE TABLE IF NOT EXISTS series_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        series TEXT NOT NULL,
+        from_ts INTEGER NOT NULL
+    )
+"""
+
+CREATE_SERIES_CHANGES_INDEX = "CREATE INDEX IF NOT EXISTS idx_series_changes_series_seq ON series_changes (series, seq)"
+
+INSERT_CHANGE = "INSERT INTO series_changes (series, from_ts) VALUES (?, ?)"
+
+
+class SyncWindow(NamedTuple):
+    token: int
+    # Delta request: only rows after `after` changed (None: no bound); nothing at all when unchanged
+    delta: bool = False
+    unchanged: bool = False
+    after: Optional[int] = None
+
+
+def change_statement(changes: Dict[str, int]) -> tuple:
+    """Write-queue statement logging {series: earliest changed timestamp}"""
+    return (INSERT_CHANGE, sorted(changes.items()))
+
+
+def earliest(rows, series: str, symbol_index: int = 1, ts_index: int = 0) -> Dict[str, int]:
+    """{<series>:<symbol>: earliest timestamp} over rows carrying a symbol and a timestamp"""
+    changes = {}
+    for row in rows:
+        name = f"{series}:{row[symbol_index]}"
+        ts = int(row[ts_index])
+        changes[name] = min(changes.get(name, ts), ts)
+    return changes
+
+
+def parse_token(text: Optional[str]) -> Optional[int]:
+    if text is None or not text.strip():
+        return None
+    token = int(text)
+    if token < 0:
+        raise ValueError(text)
+    return token
+
+
+def sync_window(cursor, since: Optional[int], *series: str) -> SyncWindow:
+    """Current token and, when `since` is given, how much of the series changed after it"""
+    # Separate subqueries, so each is a single seek on the seq key
+    cursor.execute("SELECT COALESCE((SELECT MAX(seq) FROM series_changes), 0), (SELECT MIN(seq) FROM series_changes)")
+    token, oldest = cursor.fetchone()
+    if since is None:
+        return SyncWindow(token)
+    if since > token or (oldest is not None and since < oldest - 1):
+        # A token from another database, or older than the log: resend everything
+        return SyncWindow(token, delta=True)
+    cursor.execute(f"""
+        SELECT MIN(from_ts) FROM series_changes
+        WHERE series IN ({", ".join("?" * len(series))}) AND seq > ? AND seq <= ?
+    """, series + (since, token))
+    from_ts = cursor.fetchone()[0]
+    if from_ts is None:
+        return SyncWindow(token, delta=True, unchanged=True)
+    return SyncWindow(token, delta=True, after=from_ts - 1)
+
+
+def sync_meta(sync: SyncWindow) -> Dict:
+    """
+    Response fields: the next token, and the timestamp from which the returned rows
+    replace the client's (the epoch when everything is resent; None when nothing changed)
+    """
+    replace_from = None
+    if sync.delta and not sync.unchanged:
+        replace_from = iso((sync.after if sync.after is not None else -1) + 1)
+    return {"sync_token": str(sync.token), "replace_from": replace_from}
+
+
+def prune_statement(keep: int) -> tuple:
+    """Drop all but the newest `keep` changes (older tokens then resync in full)"""
+    return ("DELETE FROM series_changes WHERE seq <= (SELECT MAX(seq) FROM series_changes) - ?", [(keep,)])
+
+
+def delta_bars(bars: Dict[str, np.ndarray], sync: SyncWindow) -> Dict[str, np.ndarray]:
+    """The part of a bar window (columns with a sorted `ts`) a delta request still needs"""
+    if sync.unchanged:
+        start = len(bars["ts"])
+    elif sync.after is not None:
+        start = int(np.searchsorted(bars["ts"], sync.after, side="right"))
+    else:
+        return bars
+    return {field: column[start:] for field, column in bars.items()}
@@ -0,0 +1,452 @@
+"""
+Vectorized technical indicators over OHLCV bar arrays.
+
+Bars are passed around as a dict of equal-length NumPy arrays with the keys
+``ts`` (epoch seconds), ``open``, ``high``, ``low``, ``close`` and ``volume``.
+"""
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+BAR_FIELDS = ("ts", "open", "high", "low", "close", "volume")
+
+# Resolution name -> bucket size in seconds ("raw" keeps the stored bars)
+RESOLUTION_SECONDS = {
+    "raw": 0,
+    "1H": 3600,
+    "4H": 14400,
+    "1D": 86400,
+}
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+def empty_bars() -> Dict[str, np.ndarray]:
+    """Return an empty bar set"""
+    bars = {field: np.empty(0, dtype=np.float64) for field in BAR_FIELDS}
+    bars["ts"] = np.empty(0, dtype=np.int64)
+    return bars
+
+
+def slice_bars(bars: Dict[str, np.ndarray], start: int, stop: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Slice every column of a bar set"""
+    return {field: bars[field][start:stop] for field in BAR_FIELDS}
+
+
+def concat_bars(a: Dict[str, np.ndarray], b: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Concatenate two bar sets column by column"""
+    return {field: np.concatenate((a[field], b[field])) for field in BAR_FIELDS}
+
+
+def resample_bars(bars: Dict[str, np.ndarray], seconds: int) -> Dict[str, np.ndarray]:
+    """Downsample time-ordered bars into fixed buckets of `seconds`"""
+    if seconds <= 0 or len(bars["ts"]) == 0:
+        return bars
+
+    bucket = bars["ts"] // seconds * seconds
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    ends = np.concatenate((starts[1:], [len(bucket)])) - 1
+
+    return {
+        "ts": bucket[starts],
+        "open": bars["open"][starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": bars["close"][ends],
+        "volume": np.add.reduceat(bars["volume"], starts),
+    }
+
+
+def rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling sum; the first window-1 values are NaN.
+
+    Prefix sums restart every `window` values: a window ending at offset j of
+    block b is block b's prefix up to j plus the rest of block b-1. Rounding
+    error then scales with a single window instead of growing with the series.
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if window <= 0 or n < window:
+        return out
+    blocks = -(-n // window)
+    padded = np.zeros(blocks * window)
+    padded[:n] = x
+    prefix = np.cumsum(padded.reshape(blocks, window), axis=1)
+    sums = prefix.copy()
+    sums[1:] += prefix[:-1, -1:] - prefix[:-1]
+    out[window - 1:] = sums.ravel()[window - 1:n]
+    return out
+
+
+def rolling_comoment(x: np.ndarray, y: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling sum of (x - mean x) * (y - mean y) over each window; the first window-1 values are NaN.
+
+    A window ending at offset j of block b is the head of block b up to j plus
+    the tail of block b-1 after j. Each piece is summed around its block's
+    first value and the two are merged with the pairwise (Chan et al.) update,
+    so nothing cancels against a large mean or a long running sum.
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if window < 2 or n < window:
+        return out
+    blocks = -(-n // window)
+
+    def blocked(v):
+        padded = np.zeros(blocks * window)
+        padded[:n] = v
+        padded = padded.reshape(blocks, window)
+        return padded[:, :1], padded - padded[:, :1]
+
+    def suffix(v):
+        # Sums over offsets j+1..window-1 of each block
+        out = np.zeros_like(v)
+        out[:, :-1] = np.cumsum(v[:, :0:-1], axis=1)[:, ::-1]
+        return out
+
+    cx, dx = blocked(x)
+    cy, dy = blocked(y)
+    head_n = np.arange(1, window + 1, dtype=np.float64)
+    head_x, head_y = np.cumsum(dx, axis=1), np.cumsum(dy, axis=1)
+    moment = np.cumsum(dx * dy, axis=1) - head_x * head_y / head_n
+
+    tail_n = window - head_n
+    tail_x, tail_y, tail_xy = suffix(dx[:-1]), suffix(dy[:-1]), suffix(dx[:-1] * dy[:-1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tail_mean_x = np.where(tail_n > 0, tail_x / tail_n, 0.0)
+        tail_mean_y = np.where(tail_n > 0, tail_y / tail_n, 0.0)
+    delta_x = (cx[1:] - cx[:-1]) + head_x[1:] / head_n - tail_mean_x
+    delta_y = (cy[1:] - cy[:-1]) + head_y[1:] / head_n - tail_mean_y
+    moment[1:] += (tail_xy - tail_x * tail_mean_y) + delta_x * delta_y * head_n * tail_n / window
+
+    out[window - 1:] = moment.ravel()[window - 1:n]
+    return out
+
+
+def sma(x: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average"""
+    return rolling_sum(x, window) / window
+
+
+def ema(x: np.ndarray, alpha: float, seed: Optional[float] = None) -> np.ndarray:
+    """
+    Exponential moving average computed block-wise in closed form.
+
+    Within a block ema[j] = decay^j * (sum_k alpha * x[k] * decay^-k + carry * decay),
+    so each block is a single cumsum. Blocks are sized so decay^-k stays finite.
+    `seed` is the EMA value just before x[0]; without it the series starts at x[0].
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    if alpha >= 1.0:
+        out[:] = x
+        return out
+
+    decay = 1.0 - alpha
+    block = int(max(1, min(n, 200.0 / -np.log10(decay))))
+    powers = decay ** np.arange(block)
+    inverse = 1.0 / powers
+
+    carry = x[0] if seed is None or not np.isfinite(seed) else seed
+    for start in range(0, n, block):
+        chunk = x[start:start + block]
+        m = len(chunk)
+        acc = np.cumsum(alpha * chunk * inverse[:m]) + carry * decay
+        out[start:start + m] = powers[:m] * acc
+        carry = out[start + m - 1]
+    return out
+
+
+def rolling_vwap(bars: Dict[str, np.ndarray], window: int) -> np.ndarray:
+    """Rolling volume-weighted average of the typical price"""
+    typical = (bars["high"] + bars["low"] + bars["close"]) / 3.0
+    pv = rolling_sum(typical * bars["volume"], window)
+    vol = rolling_sum(bars["volume"], window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(vol > 0, pv / vol, np.nan)
+
+
+def log_returns(close: np.ndarray) -> np.ndarray:
+    """Log returns aligned to `close`; the first value is NaN"""
+    out = np.full(len(close), np.nan)
+    if len(close) > 1:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[1:] = np.diff(np.log(close))
+    return out
+
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling sample standard deviation"""
+    if window < 2:
+        return np.full(len(x), np.nan)
+    var = rolling_comoment(x, x, window) / (window - 1)
+    return np.sqrt(np.maximum(var, 0.0))
+
+
+def realized_volatility(close: np.ndarray, window: int, bar_seconds: float) -> np.ndarray:
+    """Annualized rolling realized volatility of log returns"""
+    out = np.full(len(close), np.nan)
+    if len(close) < 2 or bar_seconds <= 0:
+        return out
+    returns = log_returns(close)[1:]
+    out[1:] = rolling_std(returns, window) * np.sqrt(SECONDS_PER_YEAR / bar_seconds)
+    return out
+
+
+def true_range(bars: Dict[str, np.ndarray], prev_close: Optional[float] = None) -> np.ndarray:
+    """True range; the first bar uses `prev_close` when given, else high-low"""
+    high, low, close = bars["high"], bars["low"], bars["close"]
+    prev = np.empty(len(close))
+    if len(close):
+        prev[0] = np.nan if prev_close is None else prev_close
+        prev[1:] = close[:-1]
+    hl = high - low
+    return np.fmax(hl, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+
+
+def rolling_corr_beta(x: np.ndarray, y: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling correlation of x and y and beta of y on x"""
+    if window < 2:
+        nan = np.full(len(x), np.nan)
+        return nan, nan.copy()
+    cov = rolling_comoment(x, y, window) / (window - 1)
+    var_x = rolling_comoment(x, x, window) / (window - 1)
+    var_y = rolling_comoment(y, y, window) / (window - 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.where((var_x > 0) & (var_y > 0), cov / np.sqrt(var_x * var_y), np.nan)
+        beta = np.where(var_x > 0, cov / var_x, np.nan)
+    return corr, beta
+
+
+def infer_bar_seconds(ts: np.ndarray) -> float:
+    """Median spacing between bars"""
+    if len(ts) < 2:
+        return 0.0
+    return float(np.median(np.diff(ts)))
+
+
+def compute_indicators(bars: Dict[str, np.ndarray], window: int, bar_seconds: float,
+                       offset: int = 0, ema_seed: Optional[float] = None,
+                       atr_seed: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """
+    Compute all single-series indicators for bars[offset:].
+
+    bars[:offset] only serve as rolling-window context, and the recursive
+    indicators (EMA, ATR) continue from the given seeds.
+    """
+    close = bars["close"]
+    alpha = 2.0 / (window + 1)
+
+    tail = slice_bars(bars, offset)
+    prev_close = float(close[offset - 1]) if offset > 0 else None
+    tr = true_range(tail, prev_close)
+
+    return {
+        "sma": sma(close, window)[offset:],
+        "ema": ema(tail["close"], alpha, ema_seed),
+        "vwap": rolling_vwap(bars, window)[offset:],
+        "realized_vol": realized_volatility(close, window, bar_seconds)[offset:],
+        "atr": ema(tr, 1.0 / window, atr_seed),
+    }
+
+
+class _SeriesEntry:
+    """Cached bars and indicator columns for one (series, window, resolution)"""
+
+    def __init__(self, bars: Dict[str, np.ndarray], values: Dict[str, np.ndarray], raw_last_ts: Optional[int]):
+        self.bars = bars
+        self.values = values
+        self.raw_last_ts = raw_last_ts
+
+
+def _last_ts(bars: Dict[str, np.ndarray]) -> Optional[int]:
+    return int(bars["ts"][-1]) if len(bars["ts"]) else None
+
+
+def _first_after(bars: Dict[str, np.ndarray], after_ts: Optional[int]) -> Optional[int]:
+    """Timestamp of the first bar newer than `after_ts`, if any"""
+    if after_ts is None:
+        return int(bars["ts"][0]) if len(bars["ts"]) else None
+    idx = int(np.searchsorted(bars["ts"], after_ts, side="right"))
+    return int(bars["ts"][idx]) if idx < len(bars["ts"]) else None
+
+
+class IndicatorCache:
+    """
+    Per-(series, window, resolution) indicator cache.
+
+    Raw bars are pulled through `loader(series, after_ts)`, which must return
+    only bars strictly newer than `after_ts` (or everything when it is None).
+    When new bars arrive only the affected tail is recomputed, using the
+    preceding `window` bars as context and the cached EMA/ATR as seeds.
+    Rolling correlation/beta against a benchmark series is cached per pair.
+    """
+
+    def __init__(self, loader: Callable[[str, Optional[int]], Dict[str, np.ndarray]]):
+        self.loader = loader
+        self._raw: Dict[str, Dict[str, np.ndarray]] = {}
+        self._entries: Dict[Tuple[str, int, str], _SeriesEntry] = {}
+        self._pairs: Dict[Tuple[str, str, int, str], Dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, series: Optional[str] = None):
+        """Drop cached data for a series (or everything), e.g. after a re-import"""
+        with self._lock:
+            if series is None:
+                self._raw.clear()
+                self._entries.clear()
+                self._pairs.clear()
+                return
+            self._raw.pop(series, None)
+            for key in [k for k in self._entries if k[0] == series]:
+                del self._entries[key]
+            for key in [k for k in self._pairs if series in k[:2]]:
+                del self._pairs[key]
+
+    def _refresh_raw(self, series: str):
+        """Append bars stored since the last refresh"""
+        raw = self._raw.get(series)
+        if raw is None:
+            self._raw[series] = self.loader(series, None)
+            return
+        new = self.loader(series, _last_ts(raw))
+        if len(new["ts"]):
+            self._raw[series] = concat_bars(raw, new)
+
+    def _series(self, series: str, window: int, resolution: str) -> _SeriesEntry:
+        seconds = RESOLUTION_SECONDS[resolution]
+        raw = self._raw[series]
+        key = (series, window, resolution)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            bars = resample_bars(raw, seconds)
+            bar_seconds = seconds or infer_bar_seconds(bars["ts"])
+            entry = _SeriesEntry(bars, compute_indicators(bars, window, bar_seconds), _last_ts(raw))
+            self._entries[key] = entry
+            return entry
+
+        self.hits += 1
+        first_new_ts = _first_after(raw, entry.raw_last_ts)
+        if first_new_ts is None:
+            return entry
+
+        # Recompute from the bucket holding the first new bar onwards
+        start_ts = first_new_ts // seconds * seconds if seconds else first_new_ts
+        keep = int(np.searchsorted(entry.bars["ts"], start_ts, side="left"))
+        raw_start = int(np.searchsorted(raw["ts"], start_ts, side="left"))
+        new_bars = resample_bars(slice_bars(raw, raw_start), seconds)
+
+        context_start = max(0, keep - window - 1)
+        work = concat_bars(slice_bars(entry.bars, context_start, keep), new_bars)
+        kept_bars = slice_bars(entry.bars, 0, keep)
+        merged = concat_bars(kept_bars, new_bars)
+        bar_seconds = seconds or infer_bar_seconds(merged["ts"])
+
+        tail = compute_indicators(
+            work, window, bar_seconds, offset=keep - context_start,
+            ema_seed=entry.values["ema"][keep - 1] if keep else None,
+            atr_seed=entry.values["atr"][keep - 1] if keep else None,
+        )
+        entry.bars = merged
+        entry.values = {
+            name: np.concatenate((column[:keep], tail[name]))
+            for name, column in entry.values.items()
+        }
+        entry.raw_last_ts = _last_ts(raw)
+        return entry
+
+    def _pair(self, series: str, benchmark: str, window: int, resolution: str,
+              target: _SeriesEntry, base: _SeriesEntry) -> Dict:
+        """Rolling correlation and beta of `series` on `benchmark` over their shared timestamps"""
+        key = (series, benchmark, window, resolution)
+        seconds = RESOLUTION_SECONDS[resolution]
+        cached = self._pairs.get(key)
+        built = (base.raw_last_ts, target.raw_last_ts)
+
+        if cached is not None:
+            if cached["built"] == built:
+                return cached
+            changed = [
+                _first_after(self._raw[name], last)
+                for name, last in zip((benchmark, series), cached["built"])
+            ]
+            changed = [ts for ts in changed if ts is not None]
+            if not changed:
+                cached["built"] = built
+                return cached
+            since_ts = min(changed)
+            if seconds:
+                since_ts = since_ts // seconds * seconds
+            keep = int(np.searchsorted(cached["ts"], since_ts, side="left"))
+            context_start = max(0, keep - window - 1)
+            from_ts = cached["ts"][context_start] if context_start < keep else since_ts
+        else:
+            keep = context_start = 0
+            from_ts = None
+
+        base_from = int(np.searchsorted(base.bars["ts"], from_ts, side="left")) if from_ts is not None else 0
+        target_from = int(np.searchsorted(target.bars["ts"], from_ts, side="left")) if from_ts is not None else 0
+        ts, bi, ti = np.intersect1d(base.bars["ts"][base_from:], target.bars["ts"][target_from:],
+                                    assume_unique=True, return_indices=True)
+        base_ret = log_returns(base.bars["close"][base_from:][bi])
+        target_ret = log_returns(target.bars["close"][target_from:][ti])
+
+        corr = np.full(len(ts), np.nan)
+        beta = np.full(len(ts), np.nan)
+        if len(ts) > 1:
+            corr[1:], beta[1:] = rolling_corr_beta(base_ret[1:], target_ret[1:], window)
+
+        offset = keep - context_start
+        result = {
+            "ts": np.concatenate((cached["ts"][:keep], ts[offset:])) if cached else ts,
+            "correlation": np.concatenate((cached["correlation"][:keep], corr[offset:])) if cached else corr,
+            "beta": np.concatenate((cached["beta"][:keep], beta[offset:])) if cached else beta,
+            "built": built,
+        }
+        self._pairs[key] = result
+        return result
+
+    def get(self, series: str, window: int, resolution: str = "raw",
+            benchmark: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Return bars plus indicator columns, extending the cache with any new bars.
+        With a benchmark, also returns rolling `correlation` and `beta` (NaN where
+        the benchmark has no bar at the same timestamp).
+        """
+        if resolution not in RESOLUTION_SECONDS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        if window < 2:
+            raise ValueError("window must be at least 2")
+
+        with self._lock:
+            names = [series] if benchmark is None or benchmark == series else [series, benchmark]
+            for name in names:
+                self._refresh_raw(name)
+            entry = self._series(series, window, resolution)
+            result = dict(entry.bars)
+            result.update(entry.values)
+            if len(names) == 1:
+                return result
+
+            base = self._series(benchmark, window, resolution)
+            pair = self._pair(series, benchmark, window, resolution, entry, base)
+
+            # Map the pair statistics onto this series' clock
+            result["correlation"] = np.full(len(entry.bars["ts"]), np.nan)
+            result["beta"] = np.full(len(entry.bars["ts"]), np.nan)
+            if len(pair["ts"]):
+                idx = np.clip(np.searchsorted(pair["ts"], entry.bars["ts"]), 0, len(pair["ts"]) - 1)
+                matched = pair["ts"][idx] == entry.bars["ts"]
+                result["correlation"][matched] = pair["correlation"][idx[matched]]
+                result["beta"][matched] = pair["beta"][idx[matched]]
+            return result
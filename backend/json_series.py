@@ -0,0 +1,72 @@
+"""
+JSON encoding of column series straight from arrays.
+
+History endpoints return one JSON object per bar. Building a dict per row
+(and letting the framework walk it again) costs an allocation per field per
+bar. Here each row is produced by one %-format of a fixed template over the
+column values, in chunks so that only one chunk of row strings is alive at a
+time. Non-finite floats become `null`, which strict JSON encoding would
+otherwise reject.
+"""
+import json
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from fastapi.responses import Response
+
+# Rows formatted per chunk, bounding the intermediate row strings
+CHUNK_ROWS = 100_000
+
+
+def json_tokens(values) -> List[str]:
+    """JSON text of each value in a column (floats, ints or strings)"""
+    if isinstance(values, np.ndarray) and values.dtype.kind == "f":
+        if not len(values):
+            return []
+        tokens = json.dumps(values.tolist())[1:-1].split(", ")
+        for i in np.flatnonzero(~np.isfinite(values)).tolist():
+            tokens[i] = "null"
+        return tokens
+    values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+    if not values:
+        return []
+    if isinstance(values[0], str):
+        return [json.dumps(value) for value in values]
+    return json.dumps(values)[1:-1].split(", ")
+
+
+def _column_format(values) -> Tuple[str, list]:
+    """Template placeholder and format arguments for one column chunk"""
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind == "f":
+            # repr of a finite float is already its JSON text
+            if np.isfinite(values).all():
+                return "%r", values.tolist()
+            return "%s", json_tokens(values)
+        if values.dtype.kind in "iub":
+            return "%s", json_tokens(values)
+        values = values.tolist()
+    if values and isinstance(values[0], str):
+        # Strings that need no escaping can be quoted by the template
+        if len(json.dumps(values)) == sum(map(len, values)) + 4 * len(values):
+            return '"%s"', values
+    return "%s", json_tokens(values)
+
+
+def records_json(columns: Sequence[Tuple[str, Sequence]]) -> str:
+    """JSON array of row objects from (field name, column) pairs of equal length"""
+    length = len(columns[0][1]) if columns else 0
+    chunks = []
+    for lo in range(0, length, CHUNK_ROWS):
+        placeholders, arguments = zip(*(_column_format(column[lo:lo + CHUNK_ROWS]) for _, column in columns))
+        template = "{" + ",".join(f"{json.dumps(name)}:{placeholder}"
+                                  for (name, _), placeholder in zip(columns, placeholders)) + "}"
+        chunks.append(",".join(map(template.__mod__, zip(*arguments))))
+    return "[" + ",".join(chunks) + "]"
+
+
+def series_response(meta: Dict, records: str, key: str = "data") -> Response:
+    """JSON response of `meta` plus a pre-encoded records array under `key`"""
+    head = json.dumps(meta)
+    body = (head[:-1] + ", " if meta else "{") + f"{json.dumps(key)}: {records}}}"
+    return Response(content=body, media_type="application/json")
@@ -0,0 +1,109 @@
+"""
+Treasury holdings ledger.
+
+Purchases (positive quantity) and disposals (negative quantity) are applied
+in time order to a running position that tracks both an average-cost and a
+FIFO cost basis, plus the realized P&L each method implies. Every applied
+entry yields the full position after it, so storing those rows makes the
+position at any point in time a single lookup instead of an aggregate over
+the whole transaction history. Zero-cost entries such as staking rewards add
+quantity without cost and so lower the per-unit basis.
+"""
+from collections import deque
+from typing import Dict, Optional
+
+# Quantities below this are treated as fully disposed (float residue from partial lots)
+EPSILON = 1e-9
+
+
+class Lot:
+    __slots__ = ("quantity", "price")
+
+    def __init__(self, quantity: float, price: float):
+        self.quantity = quantity
+        self.price = price
+
+
+class LedgerPosition:
+    """Running holdings with average-cost and FIFO cost bases"""
+
+    def __init__(self):
+        self.entries = 0
+        self.last_ts: Optional[int] = None
+        self.quantity = 0.0
+        self.average_cost_usd = 0.0
+        self.fifo_cost_usd = 0.0
+        self.realized_pnl_average_usd = 0.0
+        self.realized_pnl_fifo_usd = 0.0
+        self.lots: deque = deque()
+
+    def apply(self, timestamp: int, quantity: float, price_usd: float) -> tuple:
+        """
+        Apply one entry and return its ledger row:
+        (timestamp, seq, quantity, price_usd, total_quantity, average_cost_usd,
+         fifo_cost_usd, realized_pnl_average_usd, realized_pnl_fifo_usd)
+        """
+        if self.last_ts is not None and timestamp < self.last_ts:
+            raise ValueError("Ledger entries must be applied in time order")
+        if quantity >= 0:
+            self.quantity += quantity
+            self.average_cost_usd += quantity * price_usd
+            self.fifo_cost_usd += quantity * price_usd
+            self.lots.append(Lot(quantity, price_usd))
+        else:
+            self._dispose(-quantity, price_usd)
+
+        self.entries += 1
+        self.last_ts = timestamp
+        return (timestamp, self.entries, quantity, price_usd, self.quantity, self.average_cost_usd,
+                self.fifo_cost_usd, self.realized_pnl_average_usd, self.realized_pnl_fifo_usd)
+
+    def _dispose(self, quantity: float, price_usd: float):
+        if quantity > self.quantity + EPSILON:
+            raise ValueError(f"Cannot dispose {quantity} with {self.quantity} held")
+
+        # Average cost: the disposed units leave at the current per-unit basis
+        unit_cost = self.average_cost_usd / self.quantity if self.quantity > 0 else 0.0
+        self.realized_pnl_average_usd += quantity * (price_usd - unit_cost)
+        self.average_cost_usd -= quantity * unit_cost
+
+        # FIFO: consume the oldest lots first
+        remaining = quantity
+        consumed_cost = 0.0
+        while remaining > EPSILON and self.lots:
+            lot = self.lots[0]
+            take = min(lot.quantity, remaining)
+            consumed_cost += take * lot.price
+            lot.quantity -= take
+            remaining -= take
+            if lot.quantity <= EPSILON:
+                self.lots.popleft()
+        self.fifo_cost_usd -= consumed_cost
+        self.realized_pnl_fifo_usd += quantity * price_usd - consumed_cost
+
+        self.quantity -= quantity
+        if self.quantity <= EPSILON:
+            self.quantity = self.average_cost_usd = self.fifo_cost_usd = 0.0
+            self.lots.clear()
+
+
+def position_summary(row: Optional[tuple], price_usd: float) -> Dict:
+    """Holdings, cost bases and unrealized P&L at `price_usd` from a stored ledger row"""
+    if row is None:
+        row = (None, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    timestamp, entries, _, _, quantity, average_cost, fifo_cost, realized_average, realized_fifo = row
+    value = quantity * price_usd
+    return {
+        "timestamp": timestamp,
+        "entries": entries,
+        "total_holdings": quantity,
+        "cost_basis_usd": average_cost,
+        "average_cost_per_unit": average_cost / quantity if quantity > 0 else 0.0,
+        "fifo_cost_basis_usd": fifo_cost,
+        "current_value_usd": value,
+        "unrealized_pnl_usd": value - average_cost,
+        "unrealized_pnl_pct": (value - average_cost) / average_cost * 100 if average_cost > 0 else 0.0,
+        "unrealized_pnl_fifo_usd": value - fifo_cost,
+        "realized_pnl_usd": realized_average,
+        "realized_pnl_fifo_usd": realized_fifo,
+    }
@@ -1,20 +1,43 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 import sqlite3
 import requests
-import yfinance as yf
-from web3 import Web3
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 import asyncio
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-import pandas as pd
+import time
+import numpy as np
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import csv
+from indicators import IndicatorCache, RESOLUTION_SECONDS, BAR_FIELDS, empty_bars, log_returns, resample_bars
+import performance
+from bar_archive import BarArchive
+from backfill import missing_slots, merge_series, sample_asof
+from market_backfill import MarketChartBackfill, MARKET_CHART_RESOLUTIONS, points_to_bars
+from tick_log import TickLog
+from storage import PostgresConnection, open_storage
+from retention import (SERIES_TABLES, CREATE_RETENTION_STATE, RetentionPolicy, pending_chunks, thin_statements,
+                       write_archive, archive_statements, rewind_statement, load_watermarks, expire_bars_statements)
+from write_queue import WriteBehindQueue
+from concentration import DirtyRanges, concentration_series
+from ledger import EPSILON as LEDGER_EPSILON, LedgerPosition, position_summary
+import projections
+from analytics_pool import AnalyticsPool, JobCancelled, JobTimeout
+from shared_cache import SharedStore, SharedCache
+from json_series import records_json, series_response
+from compression import CompressionMiddleware, Payload, negotiate
+from pagination import MAX_PAGE_LIMIT, parse_cursor, after_bound, fetch_page, page_bars
+from delta_sync import (CREATE_SERIES_CHANGES, CREATE_SERIES_CHANGES_INDEX, INSERT_CHANGE, SyncWindow, change_statement,
+                        earliest, parse_token, sync_window, sync_meta, prune_statement, delta_bars)
+from companies import Company, COMPANY_COLUMNS, seed_companies, company_row
+import telemetry
+from telemetry import MetricsMiddleware, track_upstream
+from query_profiler import PROFILER, ProfiledConnection
+from timeutil import now_ts, to_ts, parse_ts, parse_csv_ts, to_datetime, iso, iso_many, CSV_TIMEZONE
 
 load_dotenv()
 
@@ -29,30 +52,173 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for JSON and text responses (cached payloads arrive already compressed)
+app.add_middleware(CompressionMiddleware)
+
+# Request latency histograms per route template (outermost, so it covers CORS and compression too)
+app.add_middleware(MetricsMiddleware)
+
 # Configuration
 COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY", "")
 ALCHEMY_API_KEY = os.getenv("ALCHEMY_API_KEY", "")
 TREASURY_WALLET_ADDRESS = os.getenv("TREASURY_WALLET_ADDRESS", "0x742d35Cc6634C0532925a3b8D2a2c2c8e5a2e1a8")
 STOCK_TICKER = os.getenv("STOCK_TICKER", "SGLG")
 
-# Database setup
+# Company used when an endpoint is called without `symbol`, and its treasury asset's bar symbol
+DEFAULT_SYMBOL = STOCK_TICKER
+DEFAULT_ASSET_SYMBOL = "ETHUSD"
+
+# Bar symbol of the bundled stock CSV, whichever company STOCK_TICKER selects
+CSV_STOCK_SYMBOL = "SBET"
+
+# Resolution label of the bundled CSV bars (30-minute OHLCV despite the file names)
+CSV_BAR_RESOLUTION = "30m"
+
+# Maximum companies collected concurrently per scheduler tick
+COLLECTOR_CONCURRENCY = int(os.getenv("COLLECTOR_CONCURRENCY", "8"))
+
+# Collector ticks run on wall-clock multiples of this interval
+COLLECT_INTERVAL_SECONDS = int(os.getenv("COLLECT_INTERVAL_SECONDS", "300"))
+
+# Startup backfill of snapshot gaps left by downtime
+BACKFILL_ON_STARTUP = os.getenv("BACKFILL_ON_STARTUP", "true").lower() == "true"
+BACKFILL_MAX_DAYS = int(os.getenv("BACKFILL_MAX_DAYS", "7"))
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "500"))
+
+# CPU-bound analytics run in this many worker processes per API worker (0 = on a thread)
+ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", "1"))
+ANALYTICS_JOB_TIMEOUT = float(os.getenv("ANALYTICS_JOB_TIMEOUT", "30"))
+# Smaller inputs are computed inline, where they cost less than the hand-off
+ANALYTICS_OFFLOAD_MIN_POINTS = int(os.getenv("ANALYTICS_OFFLOAD_MIN_POINTS", "20000"))
+
+# Bulk CoinGecko history loads (the free tier allows roughly 30 calls per minute)
+COINGECKO_RATE_PER_MIN = float(os.getenv("COINGECKO_RATE_PER_MIN", "30"))
+MARKET_BACKFILL_CONCURRENCY = int(os.getenv("MARKET_BACKFILL_CONCURRENCY", "4"))
+
+# High-frequency capture: a tick every TICK_INTERVAL_SECONDS (0 = off) into an append-only
+# segment log, compacted into TICK_BAR_RESOLUTION bars; raw ticks are kept TICK_RETENTION_HOURS
+# and the compacted bars follow the raw retention tier (RETENTION_RAW_DAYS, whole months)
+TICK_INTERVAL_SECONDS = float(os.getenv("TICK_INTERVAL_SECONDS", "0"))
+TICK_LOG_DIR = os.getenv("TICK_LOG_DIR", "tick_log")
+TICK_RETENTION_HOURS = int(os.getenv("TICK_RETENTION_HOURS", "24"))
+TICK_BAR_RESOLUTION = "1m"
+TICK_BAR_SECONDS = 60
+
+# Retention for the snapshot and concentration series: every row is kept RETENTION_RAW_DAYS
+# (at least the backfill window, which would take thinned slots for gaps), then one per hour
+# until RETENTION_HOURLY_DAYS and one per day after that; months older than RETENTION_ARCHIVE_DAYS
+# (0 = never) move to gzip CSV files under COLD_ARCHIVE_DIR. Runs every RETENTION_INTERVAL_MINUTES
+# (0 = off), then returns freed pages to the filesystem RETENTION_VACUUM_PAGES at a time
+RETENTION_RAW_DAYS = max(int(os.getenv("RETENTION_RAW_DAYS", "30")), BACKFILL_MAX_DAYS)
+RETENTION_HOURLY_DAYS = int(os.getenv("RETENTION_HOURLY_DAYS", "365"))
+RETENTION_ARCHIVE_DAYS = int(os.getenv("RETENTION_ARCHIVE_DAYS", "730"))
+RETENTION_INTERVAL_MINUTES = int(os.getenv("RETENTION_INTERVAL_MINUTES", "60"))
+RETENTION_VACUUM_PAGES = int(os.getenv("RETENTION_VACUUM_PAGES", "1000"))
+COLD_ARCHIVE_DIR = os.getenv("COLD_ARCHIVE_DIR", "cold_archive")
+RETENTION_POLICIES = {
+    table: RetentionPolicy(RETENTION_RAW_DAYS, RETENTION_HOURLY_DAYS, RETENTION_ARCHIVE_DAYS)
+    for table in SERIES_TABLES
+}
+TICK_BAR_POLICY = RetentionPolicy(RETENTION_RAW_DAYS)
+
+# Delta sync: series name of each retention table, and how many logged changes a retention
+# pass keeps (older `since` tokens resend the whole window)
+SERIES_NAMES = {"price_history": "snapshots", "eth_concentration_analysis": "concentration"}
+SERIES_CHANGES_KEEP = int(os.getenv("SERIES_CHANGES_KEEP", "100000"))
+
+# Cache file shared by every API worker (responses keyed by data versions)
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "treasury_cache.db")
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "2000"))
+
+# Oldest price that may be carried into a backfilled slot (stocks keep their last close over weekends)
+ASSET_MAX_AGE_SECONDS = 2 * 3600
+STOCK_MAX_AGE_SECONDS = 4 * 86400
+
+# Database setup: the bundled SQLite file, or a PostgreSQL/TimescaleDB database shared by
+# every worker and replica (STORAGE_BACKEND=postgres, DATABASE_URL, asyncpg pool bounds)
 DATABASE = "treasury_tracker.db"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite").lower()
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+POSTGRES_POOL_MIN = int(os.getenv("POSTGRES_POOL_MIN", "2"))
+POSTGRES_POOL_MAX = int(os.getenv("POSTGRES_POOL_MAX", "10"))
+storage = open_storage(STORAGE_BACKEND, DATABASE, DATABASE_URL, ProfiledConnection,
+                       POSTGRES_POOL_MIN, POSTGRES_POOL_MAX)
 
-def init_database():
-    """Initialize SQLite database with required tables"""
-    conn = sqlite3.connect(DATABASE)
+# Columnar minute-bar archive (memory-mapped, one file per column per symbol-month)
+BAR_ARCHIVE_DIR = os.getenv("BAR_ARCHIVE_DIR", "bar_archive")
+bar_archive = BarArchive(BAR_ARCHIVE_DIR)
+
+analytics_pool = AnalyticsPool(ANALYTICS_WORKERS, ANALYTICS_JOB_TIMEOUT)
+
+tick_log = TickLog(TICK_LOG_DIR)
+
+# Writers bump `bars:<symbol>` or `snapshots:<symbol>` once their rows are committed
+shared_store = SharedStore(SHARED_CACHE_PATH, SHARED_CACHE_MAX_ENTRIES)
+
+def get_connection() -> Union[sqlite3.Connection, PostgresConnection]:
+    """Open a database connection (of the configured storage backend) whose queries are timed and profiled"""
+    return storage.connect()
+
+# Write-behind queue: collector, backfill and analysis inserts are committed in grouped
+# transactions by one writer task, off the request path
+WRITE_QUEUE_MAX_PENDING = int(os.getenv("WRITE_QUEUE_MAX_PENDING", "1000"))
+WRITE_BATCH_ROWS = int(os.getenv("WRITE_BATCH_ROWS", "5000"))
+# How long a failing write group is retried before it is dropped
+WRITE_RETRY_SECONDS = float(os.getenv("WRITE_RETRY_SECONDS", "300"))
+write_queue = WriteBehindQueue(get_connection, WRITE_QUEUE_MAX_PENDING, WRITE_BATCH_ROWS, WRITE_RETRY_SECONDS)
+
+def create_sqlite_schema(conn: sqlite3.Connection):
+    """Create the SQLite tables, or migrate an existing file to SCHEMA_VERSION"""
     cursor = conn.cursor()
     
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'price_history'")
+    fresh = cursor.fetchone()[0] == 0
+    if fresh:
+        # Must be set before the first table is created (existing files are converted by migration v5)
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    
+    # Company registry
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS companies (
+            symbol TEXT PRIMARY KEY,
+            name TEXT,
+            asset TEXT,
+            asset_symbol TEXT,
+            coingecko_id TEXT,
+            treasury_wallet TEXT,
+            diluted_shares BIGINT,
+            active INTEGER DEFAULT 1
+        )
+    """)
+    
+    # OHLCV bars for every stock and asset, keyed by (symbol, resolution, timestamp)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bars (
+            symbol TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            open_price REAL,
+            high_price REAL,
+            low_price REAL,
+            close_price REAL,
+            volume REAL,
+            source TEXT,
+            PRIMARY KEY (symbol, resolution, timestamp)
+        ) WITHOUT ROWID
+    """)
+    
     # Price history table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS price_history (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            symbol TEXT,
+            timestamp INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
             eth_price REAL,
             stock_price REAL,
             market_cap BIGINT,
             eth_holdings REAL,
-            outstanding_shares BIGINT
+            outstanding_shares BIGINT,
+            source TEXT DEFAULT 'live'
         )
     """)
     
@@ -60,11 +226,13 @@ def init_database():
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS metrics (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            symbol TEXT,
+            timestamp INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
             nav_multiplier REAL,
             eth_per_share REAL,
             nav_premium_pct REAL,
-            treasury_value_usd REAL
+            treasury_value_usd REAL,
+            source TEXT DEFAULT 'live'
         )
     """)
     
@@ -72,7 +240,8 @@ def init_database():
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS treasury_transactions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME,
+            symbol TEXT,
+            timestamp INTEGER,
             transaction_hash TEXT,
             block_number INTEGER,
             value_eth REAL,
@@ -80,39 +249,12 @@ def init_database():
         )
     """)
     
-    # CSV historical data table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS eth_historical_csv (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME,
-            open_price REAL,
-            high_price REAL,
-            low_price REAL,
-            close_price REAL,
-            volume REAL,
-            source TEXT DEFAULT 'perplexity_csv'
-        )
-    """)
-    
-    # SBET stock historical data table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS sbet_historical_csv (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME,
-            open_price REAL,
-            high_price REAL,
-            low_price REAL,
-            close_price REAL,
-            volume REAL,
-            source TEXT DEFAULT 'perplexity_csv'
-        )
-    """)
-    
     # ETH purchase transactions table (enhanced)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS eth_purchase_transactions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME,
+            symbol TEXT,
+            timestamp INTEGER,
             transaction_hash TEXT,
             eth_quantity REAL,
             eth_price_usd REAL,
@@ -125,48 +267,416 @@ def init_database():
         )
     """)
     
-    # ETH concentration analysis table
+    # Materialized ETH concentration series, derived from bars, snapshots and the purchase ledger
+    cursor.execute(CREATE_CONCENTRATION_TABLE)
+    
+    # Running position after every purchase/disposal, for point-in-time holdings and cost basis
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS holdings_ledger (
+            symbol TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            seq INTEGER NOT NULL,
+            quantity REAL,
+            price_usd REAL,
+            total_quantity REAL,
+            average_cost_usd REAL,
+            fifo_cost_usd REAL,
+            realized_pnl_average_usd REAL,
+            realized_pnl_fifo_usd REAL,
+            PRIMARY KEY (symbol, timestamp, seq)
+        ) WITHOUT ROWID
+    """)
+    
+    # Completed windows of bulk history backfills, so interrupted jobs resume
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS eth_concentration_analysis (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp DATETIME,
-            total_eth_holdings REAL,
-            market_cap_usd REAL,
-            eth_concentration_pct REAL,
-            treasury_value_usd REAL,
-            shares_outstanding BIGINT,
-            eth_per_share REAL,
-            nav_multiplier REAL
-        )
+        CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+            job TEXT NOT NULL,
+            window_start INTEGER NOT NULL,
+            window_end INTEGER NOT NULL,
+            rows INTEGER,
+            completed_at INTEGER,
+            PRIMARY KEY (job, window_start)
+        ) WITHOUT ROWID
     """)
     
+    # How far each retention task has got
+    cursor.execute(CREATE_RETENTION_STATE)
+    
+    # Earliest timestamp each write touched, per series (delta sync tokens)
+    cursor.execute(CREATE_SERIES_CHANGES)
+    
+    if fresh:
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+    migrate_database(conn)
+
+def init_database():
+    """Initialize the database with required tables"""
+    conn = get_connection()
+    if storage.dialect == "sqlite":
+        create_sqlite_schema(conn)
+    else:
+        storage.create_schema()
+    cursor = conn.cursor()
+    
+    # Per-company range filters and "latest row" lookups are index seeks on (symbol, timestamp);
+    # snapshots are unique on it, which is the key paired price_history/metrics rows join on
+    for table in COMPANY_TABLES:
+        unique = "UNIQUE " if table in SNAPSHOT_TABLES else ""
+        cursor.execute(f"CREATE {unique}INDEX IF NOT EXISTS idx_{table}_symbol_timestamp "
+                       f"ON {table} (symbol, timestamp)")
+    cursor.execute(CREATE_SERIES_CHANGES_INDEX)
+    
+    # Seed the company registry
+    cursor.executemany(f"""
+        INSERT OR IGNORE INTO companies ({", ".join(COMPANY_COLUMNS)})
+        VALUES ({", ".join("?" for _ in COMPANY_COLUMNS)})
+    """, [company_row(c) for c in seed_companies(DEFAULT_SYMBOL, TREASURY_WALLET_ADDRESS)])
+    
+    conn.commit()
+    conn.close()
+    load_companies()
+
+SCHEMA_VERSION = 6
+
+CREATE_CONCENTRATION_TABLE = """
+    CREATE TABLE IF NOT EXISTS eth_concentration_analysis (
+        symbol TEXT NOT NULL,
+        timestamp INTEGER NOT NULL,
+        total_eth_holdings REAL,
+        market_cap_usd REAL,
+        eth_concentration_pct REAL,
+        treasury_value_usd REAL,
+        shares_outstanding BIGINT,
+        eth_per_share REAL,
+        nav_multiplier REAL,
+        PRIMARY KEY (symbol, timestamp)
+    ) WITHOUT ROWID
+"""
+
+# Tables holding per-company rows (with a (symbol, timestamp) index)
+COMPANY_TABLES = [
+    "price_history",
+    "metrics",
+    "treasury_transactions",
+    "eth_purchase_transactions",
+]
+
+# Paired snapshot tables: one row per (symbol, timestamp) in each
+SNAPSHOT_TABLES = ["price_history", "metrics"]
+
+# Pre-v1 tables with a timestamp column, and the timezone their naive text values were written in
+LEGACY_TIMESTAMP_ZONES = {
+    "price_history": timezone.utc,           # DEFAULT CURRENT_TIMESTAMP is UTC
+    "metrics": timezone.utc,
+    "treasury_transactions": None,           # naive server-local time
+    "eth_historical_csv": CSV_TIMEZONE,      # market-local CSV timestamps
+    "sbet_historical_csv": CSV_TIMEZONE,
+    "eth_purchase_transactions": None,
+    "eth_concentration_analysis": None,
+}
+
+# Pre-v2 per-asset bar tables and the bar-store symbol they hold
+LEGACY_BAR_TABLES = {
+    "eth_historical_csv": DEFAULT_ASSET_SYMBOL,
+    "sbet_historical_csv": CSV_STOCK_SYMBOL,
+}
+
+def table_exists(cursor, table: str) -> bool:
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone()[0] > 0
+
+def migrate_database(conn: sqlite3.Connection):
+    """Upgrade an existing database in place, tracked by PRAGMA user_version"""
+    cursor = conn.cursor()
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    
+    if version < 1:
+        # v1: naive DATETIME text -> UTC epoch seconds
+        for table, tz in LEGACY_TIMESTAMP_ZONES.items():
+            if not table_exists(cursor, table):
+                continue
+            cursor.execute(f"SELECT id, timestamp FROM {table} WHERE typeof(timestamp) = 'text'")
+            updates = []
+            for row_id, text in cursor.fetchall():
+                try:
+                    updates.append((to_ts(datetime.fromisoformat(text), tz), row_id))
+                except ValueError:
+                    print(f"Skipping unparseable timestamp in {table}: {text}")
+            cursor.executemany(f"UPDATE {table} SET timestamp = ? WHERE id = ?", updates)
+            if updates:
+                print(f"Migrated {len(updates)} {table} timestamps to epoch seconds")
+        cursor.execute("PRAGMA user_version = 1")
+    
+    if version < 2:
+        # v2: per-company rows and a single (symbol, resolution, timestamp) bar store
+        for table in COMPANY_TABLES:
+            columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+            if "symbol" not in columns:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN symbol TEXT")
+            cursor.execute(f"UPDATE {table} SET symbol = ? WHERE symbol IS NULL", (DEFAULT_SYMBOL,))
+            cursor.execute(f"DROP INDEX IF EXISTS idx_{table}_timestamp")
+        
+        for table, symbol in LEGACY_BAR_TABLES.items():
+            if not table_exists(cursor, table):
+                continue
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO bars
+                (symbol, resolution, timestamp, open_price, high_price, low_price, close_price, volume, source)
+                SELECT ?, ?, timestamp, open_price, high_price, low_price, close_price, volume, source
+                FROM {table}
+                ORDER BY id
+            """, (symbol, CSV_BAR_RESOLUTION))
+            print(f"Migrated {cursor.rowcount} {table} rows into bars as {symbol}")
+            cursor.execute(f"DROP TABLE {table}")
+        cursor.execute("PRAGMA user_version = 2")
+    
+    if version < 3:
+        # v3: mark snapshots as live or backfilled
+        for table in ["price_history", "metrics"]:
+            columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+            if "source" not in columns:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN source TEXT DEFAULT 'live'")
+        cursor.execute("PRAGMA user_version = 3")
+    
+    if version < 4:
+        # v4: concentration analysis becomes a materialized (symbol, timestamp) series;
+        # the old ad-hoc rows are dropped and the series is rebuilt from its inputs on startup
+        cursor.execute("DROP TABLE IF EXISTS eth_concentration_analysis")
+        cursor.execute(CREATE_CONCENTRATION_TABLE)
+        cursor.execute("PRAGMA user_version = 4")
+    
+    if version < 5:
+        # v5: pages freed by retention are returned to the filesystem by incremental vacuum,
+        # which needs auto_vacuum set and a one-time full VACUUM to take effect on an existing file
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.commit()
+        cursor.execute("VACUUM")
+        cursor.execute("PRAGMA user_version = 5")
+    
+    if version < 6:
+        # v6: snapshots are unique on (symbol, timestamp); keep the latest of any duplicates
+        # and drop the plain index so init_database recreates it as UNIQUE
+        for table in SNAPSHOT_TABLES:
+            cursor.execute(f"""
+                DELETE FROM {table} WHERE id NOT IN (
+                    SELECT MAX(id) FROM {table} GROUP BY symbol, timestamp)
+            """)
+            if cursor.rowcount:
+                print(f"Removed {cursor.rowcount} duplicate {table} snapshots")
+            cursor.execute(f"DROP INDEX IF EXISTS idx_{table}_symbol_timestamp")
+        cursor.execute("PRAGMA user_version = 6")
+    
     conn.commit()
+
+# In-process copy of the company registry, refreshed whenever it changes
+_companies: Dict[str, Company] = {}
+
+def load_companies() -> Dict[str, Company]:
+    """Reload the company registry from the database"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(COMPANY_COLUMNS)} FROM companies ORDER BY symbol")
+    rows = cursor.fetchall()
+    conn.close()
+    
+    _companies.clear()
+    for row in rows:
+        company = Company(**dict(zip(COMPANY_COLUMNS, row)))
+        _companies[company.symbol] = company
+    return _companies
+
+def get_companies(active_only: bool = True) -> List[Company]:
+    """All registered companies"""
+    if not _companies:
+        load_companies()
+    return [c for c in _companies.values() if c.active or not active_only]
+
+def get_company(symbol: str) -> Company:
+    """Look up a registered company, raising 404 for unknown symbols"""
+    if not _companies:
+        load_companies()
+    company = _companies.get(symbol.upper())
+    if company is None:
+        raise HTTPException(status_code=404, detail=f"Unknown company: {symbol}")
+    return company
+
+INSERT_PRICE_HISTORY = """
+    INSERT OR REPLACE INTO price_history 
+    (timestamp, symbol, eth_price, stock_price, market_cap, eth_holdings, outstanding_shares, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_METRICS = """
+    INSERT OR REPLACE INTO metrics 
+    (timestamp, symbol, nav_multiplier, eth_per_share, nav_premium_pct, treasury_value_usd, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_BAR = """
+    INSERT OR REPLACE INTO bars
+    (symbol, resolution, timestamp, open_price, high_price, low_price, close_price, volume, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_CONCENTRATION = """
+    INSERT OR REPLACE INTO eth_concentration_analysis 
+    (symbol, timestamp, total_eth_holdings, market_cap_usd, eth_concentration_pct, 
+     treasury_value_usd, shares_outstanding, eth_per_share, nav_multiplier)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_PURCHASE = """
+    INSERT INTO eth_purchase_transactions 
+    (symbol, timestamp, transaction_hash, eth_quantity, eth_price_usd, total_cost_usd, 
+     shares_outstanding, pre_purchase_eth_holdings, post_purchase_eth_holdings, 
+     concentration_change_pct, notes)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_LEDGER = """
+    INSERT OR REPLACE INTO holdings_ledger
+    (symbol, timestamp, seq, quantity, price_usd, total_quantity, average_cost_usd, fifo_cost_usd,
+     realized_pnl_average_usd, realized_pnl_fifo_usd)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+async def store_snapshots(price_rows: List[tuple], metric_rows: List[tuple], source: str = "live"):
+    """
+    Queue paired price_history/metrics rows to be committed in one transaction.
+    Rows start with (timestamp, symbol), the key metrics rows are joined back to
+    price_history on (ids are not shared: Postgres identities can interleave
+    between concurrent writers); a later snapshot at the same key replaces both.
+    """
+    await write_queue.submit([
+        (INSERT_PRICE_HISTORY, [row + (source,) for row in price_rows]),
+        (INSERT_METRICS, [row + (source,) for row in metric_rows]),
+        change_statement(earliest(price_rows, "snapshots")),
+    ])
+
+async def publish_changes(*names: str):
+    """Bump shared cache versions once everything queued so far is committed"""
+    await write_queue.flush()
+    shared_store.bump(*names)
+
+def load_snapshots(symbol: str, start_ts: int, end_ts: int) -> Dict[str, np.ndarray]:
+    """A company's price_history snapshots in [start_ts, end_ts] plus the last one before start_ts"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT timestamp, eth_price, stock_price, eth_holdings, outstanding_shares
+        FROM price_history
+        WHERE symbol = ?
+          AND timestamp >= COALESCE(
+                (SELECT MAX(timestamp) FROM price_history WHERE symbol = ? AND timestamp < ?), ?)
+          AND timestamp <= ?
+        ORDER BY timestamp ASC
+    """, (symbol, symbol, start_ts, start_ts, end_ts))
+    rows = cursor.fetchall()
     conn.close()
+    
+    fields = ["ts", "eth_price", "stock_price", "eth_holdings", "outstanding_shares"]
+    if not rows:
+        return {field: np.empty(0, dtype=np.int64 if field == "ts" else np.float64) for field in fields}
+    columns = list(zip(*rows))
+    snapshots = {
+        field: np.asarray([v if v is not None else np.nan for v in column], dtype=np.float64)
+        for field, column in zip(fields[1:], columns[1:])
+    }
+    snapshots["ts"] = np.asarray(columns[0], dtype=np.int64)
+    return snapshots
+
+# Each company's position after its latest ledger entry, so appends are O(1)
+ledger_positions: Dict[str, LedgerPosition] = {}
+
+def replay_ledger(symbol: str) -> tuple:
+    """Apply a company's purchase transactions in order; returns (position, ledger rows)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT timestamp, eth_quantity, eth_price_usd
+        FROM eth_purchase_transactions
+        WHERE symbol = ?
+        ORDER BY timestamp ASC, id ASC
+    """, (symbol,))
+    transactions = cursor.fetchall()
+    conn.close()
+    
+    position = LedgerPosition()
+    rows = []
+    for ts, quantity, price in transactions:
+        try:
+            rows.append((symbol,) + position.apply(ts, quantity or 0.0, price or 0.0))
+        except ValueError as e:
+            # One bad row (e.g. an over-disposal written before validation) must not stop startup
+            print(f"Skipping {symbol} ledger entry at {iso(ts)}: {e}")
+    return position, rows
+
+async def rebuild_holdings_ledger(symbol: str) -> LedgerPosition:
+    """Recompute a company's ledger rows from its transactions (startup, back-dated entries)"""
+    await write_queue.flush()
+    position, rows = await asyncio.to_thread(replay_ledger, symbol)
+    await write_queue.submit([
+        ("DELETE FROM holdings_ledger WHERE symbol = ?", [(symbol,)]),
+        (INSERT_LEDGER, rows),
+    ])
+    ledger_positions[symbol] = position
+    return position
+
+def ledger_row(cursor, symbol: str, as_of: Optional[int] = None) -> Optional[tuple]:
+    """Position row in effect at `as_of` (latest when None) - one primary-key seek"""
+    cursor.execute("""
+        SELECT timestamp, seq, quantity, price_usd, total_quantity, average_cost_usd, fifo_cost_usd,
+               realized_pnl_average_usd, realized_pnl_fifo_usd
+        FROM holdings_ledger
+        WHERE symbol = ? AND timestamp <= ?
+        ORDER BY timestamp DESC, seq DESC
+        LIMIT 1
+    """, (symbol, as_of if as_of is not None else now_ts()))
+    return cursor.fetchone()
 
 class DataCollector:
+    """
+    Upstream price, stock and wallet fetches. The process shares one instance
+    (`data_collector`); yfinance and web3 are imported on first use, since
+    together they take over a second to import and read-only workers never call them.
+    """
+    
     def __init__(self):
-        self.w3 = None
-        if ALCHEMY_API_KEY:
-            self.w3 = Web3(Web3.HTTPProvider(f"https://eth-mainnet.g.alchemy.com/v2/{ALCHEMY_API_KEY}"))
+        self._w3 = None
     
-    async def get_eth_price(self) -> float:
-        """Get current ETH price from CoinGecko"""
+    @property
+    def w3(self):
+        """Web3 client for the Alchemy endpoint, built on first use (None without an API key)"""
+        if self._w3 is None and ALCHEMY_API_KEY:
+            from web3 import Web3
+            self._w3 = Web3(Web3.HTTPProvider(f"https://eth-mainnet.g.alchemy.com/v2/{ALCHEMY_API_KEY}"))
+        return self._w3
+    
+    async def get_asset_prices(self, coingecko_ids: List[str]) -> Dict[str, float]:
+        """Get current USD prices for several assets from CoinGecko in one call"""
         try:
             url = "https://api.coingecko.com/api/v3/simple/price"
             params = {
-                "ids": "ethereum",
+                "ids": ",".join(sorted(set(coingecko_ids))),
                 "vs_currencies": "usd"
             }
             if COINGECKO_API_KEY:
                 params["x_cg_demo_api_key"] = COINGECKO_API_KEY
                 
-            response = requests.get(url, params=params)
-            response.raise_for_status()
+            with track_upstream("coingecko", "simple_price"):
+                response = await asyncio.to_thread(requests.get, url, params=params)
+                response.raise_for_status()
             data = response.json()
-            return float(data["ethereum"]["usd"])
+            return {asset_id: float(data[asset_id]["usd"]) for asset_id in coingecko_ids if asset_id in data}
         except Exception as e:
-            print(f"Error fetching ETH price: {e}")
-            return 0.0
+            print(f"Error fetching asset prices: {e}")
+            return {}
+    
+    async def get_eth_price(self) -> float:
+        """Get current ETH price from CoinGecko"""
+        prices = await self.get_asset_prices(["ethereum"])
+        return prices.get("ethereum", 0.0)
     
     async def get_eth_historical_data(self, days: int = 30) -> List[Dict]:
         """Get historical ETH price data"""
@@ -180,14 +690,15 @@ class DataCollector:
             if COINGECKO_API_KEY:
                 params["x_cg_demo_api_key"] = COINGECKO_API_KEY
                 
-            response = requests.get(url, params=params)
-            response.raise_for_status()
+            with track_upstream("coingecko", "market_chart"):
+                response = await asyncio.to_thread(requests.get, url, params=params)
+                response.raise_for_status()
             data = response.json()
             
             historical_data = []
             for price_point in data["prices"]:
                 historical_data.append({
-                    "timestamp": datetime.fromtimestamp(price_point[0] / 1000),
+                    "timestamp": int(price_point[0] // 1000),
                     "price": price_point[1]
                 })
             return historical_data
@@ -195,25 +706,68 @@ class DataCollector:
             print(f"Error fetching ETH historical data: {e}")
             return []
     
-    async def get_stock_data(self) -> Dict:
-        """Get stock data using yfinance"""
-        try:
-            stock = yf.Ticker(STOCK_TICKER)
+    def _fetch_stock_data(self, ticker: str) -> Dict:
+        import yfinance as yf
+        with track_upstream("yfinance", "ticker"):
+            stock = yf.Ticker(ticker)
             info = stock.info
             hist = stock.history(period="1d")
-            
-            current_price = float(hist['Close'].iloc[-1]) if not hist.empty else 0.0
-            market_cap = info.get('marketCap', 0)
-            shares_outstanding = info.get('sharesOutstanding', 0)
-            
-            return {
-                "price": current_price,
-                "market_cap": market_cap,
-                "shares_outstanding": shares_outstanding,
-                "daily_change": float(hist['Close'].pct_change().iloc[-1]) if len(hist) > 1 else 0.0
-            }
+        
+        current_price = float(hist['Close'].iloc[-1]) if not hist.empty else 0.0
+        market_cap = info.get('marketCap', 0)
+        shares_outstanding = info.get('sharesOutstanding', 0)
+        
+        return {
+            "price": current_price,
+            "market_cap": market_cap,
+            "shares_outstanding": shares_outstanding,
+            "daily_change": float(hist['Close'].pct_change().iloc[-1]) if len(hist) > 1 else 0.0
+        }
+    
+    def _fetch_last_price(self, ticker: str) -> float:
+        import yfinance as yf
+        with track_upstream("yfinance", "fast_info"):
+            return float(yf.Ticker(ticker).fast_info["lastPrice"] or 0.0)
+    
+    async def capture_ticks(self):
+        """Append one price tick for every active company's stock and treasury asset"""
+        try:
+            companies = get_companies()
+            if not companies:
+                return
+            
+            async def last_price(ticker: str) -> float:
+                try:
+                    return await asyncio.to_thread(self._fetch_last_price, ticker)
+                except Exception as e:
+                    print(f"Error fetching {ticker} last price: {e}")
+                    return 0.0
+            
+            asset_prices, stock_prices = await asyncio.gather(
+                self.get_asset_prices([c.coingecko_id for c in companies]),
+                asyncio.gather(*(last_price(c.symbol) for c in companies)))
+            
+            ts_ms = int(time.time() * 1000)
+            ticks = {}
+            for company, stock_price in zip(companies, stock_prices):
+                if stock_price > 0:
+                    ticks[company.symbol] = (ts_ms, stock_price)
+                if asset_prices.get(company.coingecko_id, 0.0) > 0:
+                    ticks[company.asset_symbol] = (ts_ms, asset_prices[company.coingecko_id])
+            
+            await asyncio.to_thread(tick_log.append, ticks)
+            for symbol in ticks:
+                telemetry.TICKS_CAPTURED.inc(symbol=symbol)
+        except Exception as e:
+            print(f"Error capturing ticks: {e}")
+    
+    async def get_stock_data(self, ticker: str = DEFAULT_SYMBOL) -> Dict:
+        """Get stock data using yfinance"""
+        try:
+            # yfinance blocks on HTTP; run it off the event loop so companies are fetched concurrently
+            return await asyncio.to_thread(self._fetch_stock_data, ticker)
         except Exception as e:
-            print(f"Error fetching stock data: {e}")
+            print(f"Error fetching stock data for {ticker}: {e}")
             return {
                 "price": 0.0,
                 "market_cap": 0,
@@ -221,347 +775,706 @@ class DataCollector:
                 "daily_change": 0.0
             }
     
-    async def get_treasury_balance(self) -> float:
-        """Get current ETH balance of treasury wallet"""
+    async def get_treasury_balance(self, wallet_address: Optional[str] = TREASURY_WALLET_ADDRESS) -> float:
+        """Get current ETH balance of a treasury wallet"""
         try:
-            if not self.w3 or not self.w3.is_connected():
+            if not wallet_address or not self.w3:
                 return 0.0
-                
-            balance_wei = self.w3.eth.get_balance(TREASURY_WALLET_ADDRESS)
+            
+            with track_upstream("alchemy", "get_balance"):
+                if not await asyncio.to_thread(self.w3.is_connected):
+                    return 0.0
+                balance_wei = await asyncio.to_thread(self.w3.eth.get_balance, wallet_address)
             balance_eth = self.w3.from_wei(balance_wei, 'ether')
             return float(balance_eth)
         except Exception as e:
             print(f"Error fetching treasury balance: {e}")
             return 0.0
     
+    async def collect_company(self, company: Company, asset_price: float) -> tuple:
+        """Collect one company's stock and treasury data and derive its metrics"""
+        stock_data, eth_balance = await asyncio.gather(
+            self.get_stock_data(company.symbol),
+            self.get_treasury_balance(company.treasury_wallet),
+        )
+        
+        # Calculate metrics
+        market_cap = stock_data["market_cap"]
+        shares_outstanding = stock_data["shares_outstanding"] or company.diluted_shares
+        
+        nav_multiplier = 0.0
+        eth_per_share = 0.0
+        nav_premium_pct = 0.0
+        treasury_value_usd = eth_balance * asset_price
+        
+        if eth_balance > 0 and asset_price > 0 and market_cap > 0:
+            nav_multiplier = market_cap / (eth_balance * asset_price)
+            nav_premium_pct = ((nav_multiplier - 1) * 100)
+            
+        if shares_outstanding > 0:
+            eth_per_share = eth_balance / shares_outstanding
+        
+        print(f"Data collected: {company.symbol} {company.asset}=${asset_price:.2f}, "
+              f"Stock=${stock_data['price']:.2f}, Treasury={eth_balance:.2f}{company.asset}")
+        
+        return (
+            (company.symbol, asset_price, stock_data["price"], market_cap, eth_balance, shares_outstanding),
+            (company.symbol, nav_multiplier, eth_per_share, nav_premium_pct, treasury_value_usd),
+        )
+    
     async def collect_and_store_data(self):
-        """Collect all data and store in database"""
+        """Collect all active companies concurrently and queue their snapshots as one write group"""
         try:
-            # Get current data
-            eth_price = await self.get_eth_price()
-            stock_data = await self.get_stock_data()
-            eth_balance = await self.get_treasury_balance()
-            
-            # Calculate metrics
-            market_cap = stock_data["market_cap"]
-            shares_outstanding = stock_data["shares_outstanding"]
-            
-            nav_multiplier = 0.0
-            eth_per_share = 0.0
-            nav_premium_pct = 0.0
-            treasury_value_usd = eth_balance * eth_price
-            
-            if eth_balance > 0 and eth_price > 0 and market_cap > 0:
-                nav_multiplier = market_cap / (eth_balance * eth_price)
-                nav_premium_pct = ((nav_multiplier - 1) * 100)
-                
-            if shares_outstanding > 0:
-                eth_per_share = eth_balance / shares_outstanding
-            
-            # Store in database
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            
-            # Store price history
-            cursor.execute("""
-                INSERT INTO price_history 
-                (eth_price, stock_price, market_cap, eth_holdings, outstanding_shares)
-                VALUES (?, ?, ?, ?, ?)
-            """, (eth_price, stock_data["price"], market_cap, eth_balance, shares_outstanding))
-            
-            # Store calculated metrics
-            cursor.execute("""
-                INSERT INTO metrics 
-                (nav_multiplier, eth_per_share, nav_premium_pct, treasury_value_usd)
-                VALUES (?, ?, ?, ?)
-            """, (nav_multiplier, eth_per_share, nav_premium_pct, treasury_value_usd))
-            
-            conn.commit()
-            conn.close()
-            
-            print(f"Data collected: ETH=${eth_price:.2f}, Stock=${stock_data['price']:.2f}, Treasury={eth_balance:.2f}ETH")
+            companies = get_companies()
+            if not companies:
+                return
+            
+            # One price call for every distinct treasury asset
+            asset_prices = await self.get_asset_prices([c.coingecko_id for c in companies])
+            
+            semaphore = asyncio.Semaphore(COLLECTOR_CONCURRENCY)
+            
+            async def collect(company: Company):
+                async with semaphore:
+                    return await self.collect_company(company, asset_prices.get(company.coingecko_id, 0.0))
+            
+            results = await asyncio.gather(*(collect(c) for c in companies), return_exceptions=True)
+            
+            price_rows, metric_rows = [], []
+            for company, result in zip(companies, results):
+                if isinstance(result, Exception):
+                    print(f"Error collecting {company.symbol}: {result}")
+                    continue
+                price_rows.append(result[0])
+                metric_rows.append(result[1])
+            
+            # Queue snapshots for the write-behind writer
+            timestamp = now_ts()
+            await store_snapshots([(timestamp,) + row for row in price_rows],
+                                  [(timestamp,) + row for row in metric_rows])
+            for row in price_rows:
+                concentration_dirty.mark(row[0], timestamp)
+            await refresh_concentration()
+            await publish_changes(*(f"snapshots:{row[0]}" for row in price_rows))
             
         except Exception as e:
             print(f"Error in data collection: {e}")
     
-    async def import_eth_csv_data(self, csv_file_path: str = "ETHUSD_1M_FROM_PERPLEXITY.csv"):
-        """Import ETH historical data from CSV file into database"""
+    async def get_asset_history(self, coingecko_id: str, days: int):
+        """Get asset USD price history as (epoch seconds, price) arrays at CoinGecko's automatic granularity"""
+        try:
+            url = f"https://api.coingecko.com/api/v3/coins/{coingecko_id}/market_chart"
+            # Without `interval` CoinGecko returns 5-minute points for 1 day and hourly up to 90 days
+            params = {
+                "vs_currency": "usd",
+                "days": days
+            }
+            if COINGECKO_API_KEY:
+                params["x_cg_demo_api_key"] = COINGECKO_API_KEY
+            
+            with track_upstream("coingecko", "market_chart"):
+                response = await asyncio.to_thread(requests.get, url, params=params)
+                response.raise_for_status()
+            prices = np.asarray(response.json()["prices"], dtype=np.float64).reshape(-1, 2)
+            return (prices[:, 0] // 1000).astype(np.int64), prices[:, 1]
+        except Exception as e:
+            print(f"Error fetching {coingecko_id} price history: {e}")
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    
+    async def backfill_gaps(self, interval: int = COLLECT_INTERVAL_SECONDS,
+                            max_days: int = BACKFILL_MAX_DAYS, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+        """
+        Fill snapshot slots missed while the collector was down.
+        Prices come from stored snapshots and bars, then CoinGecko history for any remaining
+        asset gaps; holdings and share counts carry forward from the last live snapshot.
+        Rows are written in small transactions so live ticks are never held up for long.
+        """
+        # The current slot belongs to the live tick
+        end_ts = now_ts() - interval
+        start_ts = end_ts - max_days * 86400
+        asset_history = {}
+        total = 0
+        for company in get_companies():
+            try:
+                total += await self._backfill_company(company, start_ts, end_ts, interval,
+                                                      batch_size, asset_history)
+            except Exception as e:
+                print(f"Error backfilling {company.symbol}: {e}")
+        if total:
+            print(f"Backfilled {total} missing snapshots")
+            await refresh_concentration()
+        return total
+    
+    async def _backfill_company(self, company: Company, start_ts: int, end_ts: int, interval: int,
+                                batch_size: int, asset_history: Dict) -> int:
+        snapshots = await asyncio.to_thread(load_snapshots, company.symbol, start_ts, end_ts)
+        if not len(snapshots["ts"]):
+            # Nothing to carry holdings forward from
+            return 0
+        
+        slots = missing_slots(snapshots["ts"], max(start_ts, int(snapshots["ts"][0])), end_ts, interval)
+        if not len(slots):
+            return 0
+        
+        asset_bars = await asyncio.to_thread(load_bar_arrays, company.asset_symbol,
+                                             int(slots[0]) - ASSET_MAX_AGE_SECONDS - 1)
+        asset = merge_series((snapshots["ts"], snapshots["eth_price"]), (asset_bars["ts"], asset_bars["close"]))
+        asset_price = sample_asof(asset, slots, ASSET_MAX_AGE_SECONDS)
+        if np.isnan(asset_price).any():
+            if company.coingecko_id not in asset_history:
+                days = int(np.ceil((now_ts() - int(slots[0])) / 86400)) + 1
+                asset_history[company.coingecko_id] = await self.get_asset_history(company.coingecko_id, days)
+            asset = merge_series(asset, asset_history[company.coingecko_id])
+            asset_price = sample_asof(asset, slots, ASSET_MAX_AGE_SECONDS)
+        
+        stock_bars = await asyncio.to_thread(load_bar_arrays, company.symbol,
+                                             int(slots[0]) - STOCK_MAX_AGE_SECONDS - 1)
+        stock = merge_series((snapshots["ts"], snapshots["stock_price"]), (stock_bars["ts"], stock_bars["close"]))
+        stock_price = sample_asof(stock, slots, STOCK_MAX_AGE_SECONDS)
+        # Holdings and shares are 0 when not known (e.g. no Alchemy key); that carries forward as it is
+        holdings = sample_asof((snapshots["ts"], snapshots["eth_holdings"]), slots, positive=False)
+        shares = sample_asof((snapshots["ts"], snapshots["outstanding_shares"]), slots, positive=False)
+        
+        ok = np.isfinite(asset_price) & np.isfinite(stock_price) & np.isfinite(holdings) & np.isfinite(shares)
+        if not ok.all():
+            print(f"Cannot backfill {int((~ok).sum())} of {len(ok)} missing {company.symbol} snapshots: "
+                  f"no {company.asset} price for {int(np.isnan(asset_price).sum())}, "
+                  f"no stock price for {int(np.isnan(stock_price).sum())}")
+        slots, asset_price, stock_price, holdings, shares = (
+            x[ok] for x in (slots, asset_price, stock_price, holdings, shares))
+        
+        # Same guards as collect_company
+        market_cap = stock_price * shares
+        treasury_value = holdings * asset_price
+        with np.errstate(invalid="ignore", divide="ignore"):
+            nav_multiplier = np.where((treasury_value > 0) & (market_cap > 0), market_cap / treasury_value, 0.0)
+            eth_per_share = np.where(shares > 0, holdings / shares, 0.0)
+        nav_premium = np.where(nav_multiplier > 0, (nav_multiplier - 1) * 100, 0.0)
+        
+        written = 0
+        for lo in range(0, len(slots), batch_size):
+            hi = lo + batch_size
+            price_rows = [
+                (ts, company.symbol, a, s, int(m), h, int(n))
+                for ts, a, s, m, h, n in zip(slots[lo:hi].tolist(), asset_price[lo:hi].tolist(),
+                                             stock_price[lo:hi].tolist(), market_cap[lo:hi].tolist(),
+                                             holdings[lo:hi].tolist(), shares[lo:hi].tolist())
+            ]
+            metric_rows = [
+                (ts, company.symbol, nav, e, p, v)
+                for ts, nav, e, p, v in zip(slots[lo:hi].tolist(), nav_multiplier[lo:hi].tolist(),
+                                            eth_per_share[lo:hi].tolist(), nav_premium[lo:hi].tolist(),
+                                            treasury_value[lo:hi].tolist())
+            ]
+            await store_snapshots(price_rows, metric_rows, "backfill")
+            written += len(price_rows)
+        
+        if written:
+            await publish_changes(f"snapshots:{company.symbol}")
+            concentration_dirty.mark(company.symbol, int(slots[0]))
+            print(f"Backfilled {written} of {len(ok)} missing {company.symbol} snapshots")
+        return written
+    
+    async def import_bars_csv(self, symbol: str, csv_file_path: str,
+                              resolution: str = CSV_BAR_RESOLUTION, source: str = "perplexity_csv"):
+        """Import OHLCV bars for any symbol from a CSV file into the bar store"""
         try:
             if not os.path.exists(csv_file_path):
-                print(f"CSV file not found: {csv_file_path}")
+                print(f"{symbol} CSV file not found: {csv_file_path}")
                 return False
             
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            
-            # Clear existing CSV data to avoid duplicates
-            cursor.execute("DELETE FROM eth_historical_csv WHERE source = 'perplexity_csv'")
-            
-            # Read and process CSV
+            rows = []
             with open(csv_file_path, 'r') as file:
                 csv_reader = csv.DictReader(file)
                 for row in csv_reader:
                     try:
-                        # Parse the timestamp (assuming format: 2025-07-02 02:30:00)
-                        timestamp = datetime.strptime(row['Date'], '%Y-%m-%d %H:%M:%S')
-                        
-                        cursor.execute("""
-                            INSERT INTO eth_historical_csv 
-                            (timestamp, open_price, high_price, low_price, close_price, volume, source)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            timestamp,
+                        # Parse the market-local timestamp (assuming format: 2025-07-02 02:30:00)
+                        rows.append((
+                            symbol,
+                            resolution,
+                            parse_csv_ts(row['Date']),
                             float(row['Open']),
                             float(row['High']),
                             float(row['Low']),
                             float(row['Close']),
                             float(row['Volume']),
-                            'perplexity_csv'
+                            source
                         ))
                     except (ValueError, KeyError) as e:
-                        print(f"Error processing row: {row}, Error: {e}")
+                        print(f"Error processing {symbol} row: {row}, Error: {e}")
                         continue
             
+            conn = get_connection()
+            cursor = conn.cursor()
+            before = bars_fingerprint(cursor, symbol, resolution)
+            
+            # Clear existing CSV data to avoid duplicates
+            cursor.execute("DELETE FROM bars WHERE symbol = ? AND resolution = ? AND source = ?",
+                           (symbol, resolution, source))
+            cursor.executemany(INSERT_BAR, rows)
+            
             conn.commit()
             
             # Get count of imported records
-            cursor.execute("SELECT COUNT(*) FROM eth_historical_csv WHERE source = 'perplexity_csv'")
+            cursor.execute("SELECT COUNT(*) FROM bars WHERE symbol = ? AND resolution = ? AND source = ?",
+                           (symbol, resolution, source))
             count = cursor.fetchone()[0]
+            changed = bars_fingerprint(cursor, symbol, resolution) != before
             
             conn.close()
             
-            print(f"Successfully imported {count} ETH price records from CSV")
+            bar_archive.replace(archive_key(symbol, resolution), query_bar_arrays(symbol, resolution=resolution))
+            indicator_cache.invalidate(symbol)
+            # Re-importing an unchanged file (every startup) keeps shared cached responses valid
+            if changed:
+                shared_store.bump(f"bars:{symbol}")
+                # Logged once the archive and version are current; the whole series may have moved
+                await write_queue.submit([change_statement({f"bars:{symbol}": 0})])
+            mark_bars_changed(symbol)
+            print(f"Successfully imported {count} {symbol} {resolution} bars from CSV")
             return True
             
         except Exception as e:
-            print(f"Error importing CSV data: {e}")
+            print(f"Error importing {symbol} CSV data: {e}")
             return False
     
-    async def get_eth_historical_from_csv(self, hours: int = 24) -> List[Dict]:
-        """Get ETH historical data from imported CSV"""
-        try:
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            
-            # Get data from the last N hours
-            cutoff_time = datetime.now() - timedelta(hours=hours)
-            
-            cursor.execute("""
-                SELECT timestamp, open_price, high_price, low_price, close_price, volume
-                FROM eth_historical_csv 
-                WHERE timestamp >= ? AND source = 'perplexity_csv'
-                ORDER BY timestamp ASC
-            """, (cutoff_time,))
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            historical_data = []
-            for row in rows:
-                historical_data.append({
-                    "timestamp": datetime.fromisoformat(row[0]),
-                    "open": row[1],
-                    "high": row[2],
-                    "low": row[3],
-                    "close": row[4],
-                    "volume": row[5]
-                })
-            
-            return historical_data
-            
-        except Exception as e:
-            print(f"Error fetching CSV historical data: {e}")
-            return []
-
+    async def import_eth_csv_data(self, csv_file_path: str = "ETHUSD_1M_FROM_PERPLEXITY.csv"):
+        """Import ETH historical data from CSV file into database"""
+        return await self.import_bars_csv(DEFAULT_ASSET_SYMBOL, csv_file_path)
+    
     async def import_sbet_csv_data(self, csv_file_path: str = "SBET_1M_FROM_PERPLEXITY.csv"):
         """Import SBET historical stock data from CSV file into database"""
+        return await self.import_bars_csv(CSV_STOCK_SYMBOL, csv_file_path)
+    
+    async def get_bars_history(self, symbol: str, hours: int = 24, resolution: str = CSV_BAR_RESOLUTION,
+                               after_ts: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Get the last N hours of stored bars (after `after_ts`, if given) for a symbol as columns (see BAR_FIELDS)"""
         try:
-            if not os.path.exists(csv_file_path):
-                print(f"SBET CSV file not found: {csv_file_path}")
-                return False
-            
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            
-            # Clear existing SBET CSV data to avoid duplicates
-            cursor.execute("DELETE FROM sbet_historical_csv WHERE source = 'perplexity_csv'")
-            
-            # Read and process CSV
-            with open(csv_file_path, 'r') as file:
-                csv_reader = csv.DictReader(file)
-                for row in csv_reader:
-                    try:
-                        # Parse the timestamp (assuming format: 2025-07-01 15:30:00)
-                        timestamp = datetime.strptime(row['Date'], '%Y-%m-%d %H:%M:%S')
-                        
-                        cursor.execute("""
-                            INSERT INTO sbet_historical_csv 
-                            (timestamp, open_price, high_price, low_price, close_price, volume, source)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            timestamp,
-                            float(row['Open']),
-                            float(row['High']),
-                            float(row['Low']),
-                            float(row['Close']),
-                            float(row['Volume']),
-                            'perplexity_csv'
-                        ))
-                    except (ValueError, KeyError) as e:
-                        print(f"Error processing SBET row: {row}, Error: {e}")
-                        continue
-            
-            conn.commit()
-            
-            # Get count of imported records
-            cursor.execute("SELECT COUNT(*) FROM sbet_historical_csv WHERE source = 'perplexity_csv'")
-            count = cursor.fetchone()[0]
-            
-            conn.close()
-            
-            print(f"Successfully imported {count} SBET stock price records from CSV")
-            return True
+            cutoff_time = now_ts() - hours * 3600
+            return load_bar_arrays(symbol, after_bound(cutoff_time - 1, after_ts), resolution)
             
         except Exception as e:
-            print(f"Error importing SBET CSV data: {e}")
-            return False
+            print(f"Error fetching {symbol} historical bars: {e}")
+            return empty_bars()
+    
+    async def get_eth_historical_from_csv(self, hours: int = 24) -> Dict[str, np.ndarray]:
+        """Get ETH historical data from imported CSV"""
+        return await self.get_bars_history(DEFAULT_ASSET_SYMBOL, hours)
+    
+    async def get_sbet_historical_from_csv(self, hours: int = 24) -> Dict[str, np.ndarray]:
+        """Get SBET historical data from imported CSV"""
+        return await self.get_bars_history(CSV_STOCK_SYMBOL, hours)
 
     async def add_eth_purchase_transaction(self, timestamp: datetime, eth_quantity: float, 
                                          eth_price_usd: float, shares_outstanding: int,
-                                         transaction_hash: str = None, notes: str = ""):
-        """Add ETH purchase transaction and calculate concentration impact"""
-        try:
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            
-            # Get current ETH holdings before purchase
-            cursor.execute("SELECT eth_holdings FROM price_history ORDER BY timestamp DESC LIMIT 1")
-            result = cursor.fetchone()
-            pre_purchase_holdings = result[0] if result else 0.0
-            
-            # Calculate new holdings and concentration
-            post_purchase_holdings = pre_purchase_holdings + eth_quantity
-            total_cost_usd = eth_quantity * eth_price_usd
-            concentration_change = (eth_quantity / post_purchase_holdings) * 100 if post_purchase_holdings > 0 else 0
-            
-            # Insert purchase transaction
-            cursor.execute("""
-                INSERT INTO eth_purchase_transactions 
-                (timestamp, transaction_hash, eth_quantity, eth_price_usd, total_cost_usd, 
-                 shares_outstanding, pre_purchase_eth_holdings, post_purchase_eth_holdings, 
-                 concentration_change_pct, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                timestamp, transaction_hash, eth_quantity, eth_price_usd, total_cost_usd,
-                shares_outstanding, pre_purchase_holdings, post_purchase_holdings,
-                concentration_change, notes
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-            print(f"Added ETH purchase: {eth_quantity} ETH @ ${eth_price_usd} = ${total_cost_usd:,.2f}")
-            return True
-            
-        except Exception as e:
-            print(f"Error adding ETH purchase transaction: {e}")
-            return False
-
-    async def analyze_eth_concentration(self, timestamp: datetime = None):
-        """Analyze current ETH concentration and treasury metrics"""
-        try:
-            if not timestamp:
-                timestamp = datetime.now()
-                
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            
-            # Get latest data
-            cursor.execute("""
-                SELECT eth_holdings, stock_price, market_cap, outstanding_shares, eth_price
-                FROM price_history 
-                ORDER BY timestamp DESC LIMIT 1
-            """)
-            result = cursor.fetchone()
-            
-            if not result:
-                return None
-                
-            eth_holdings, stock_price, market_cap, shares_outstanding, eth_price = result
-            
-            # Calculate concentration metrics
-            treasury_value_usd = eth_holdings * eth_price
-            eth_concentration_pct = (treasury_value_usd / market_cap) * 100 if market_cap > 0 else 0
-            eth_per_share = eth_holdings / shares_outstanding if shares_outstanding > 0 else 0
-            nav_multiplier = market_cap / treasury_value_usd if treasury_value_usd > 0 else 0
-            
-            # Store concentration analysis
-            cursor.execute("""
-                INSERT INTO eth_concentration_analysis 
-                (timestamp, total_eth_holdings, market_cap_usd, eth_concentration_pct, 
-                 treasury_value_usd, shares_outstanding, eth_per_share, nav_multiplier)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                timestamp, eth_holdings, market_cap, eth_concentration_pct,
-                treasury_value_usd, shares_outstanding, eth_per_share, nav_multiplier
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-            return {
-                "timestamp": timestamp,
-                "eth_holdings": eth_holdings,
-                "market_cap": market_cap,
-                "eth_concentration_pct": eth_concentration_pct,
-                "treasury_value_usd": treasury_value_usd,
-                "eth_per_share": eth_per_share,
-                "nav_multiplier": nav_multiplier
-            }
-            
-        except Exception as e:
-            print(f"Error analyzing ETH concentration: {e}")
-            return None
-
-    async def get_sbet_historical_from_csv(self, hours: int = 24) -> List[Dict]:
-        """Get SBET historical data from imported CSV"""
+                                         transaction_hash: str = None, notes: str = "",
+                                         symbol: str = DEFAULT_SYMBOL):
+        """
+        Add an ETH purchase (negative quantity: disposal) and update the holdings ledger.
+        Entries after the latest one are appended to the running position; back-dated
+        entries rebuild the company's ledger.
+        """
         try:
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            
-            # Get data from the last N hours
-            cutoff_time = datetime.now() - timedelta(hours=hours)
-            
-            cursor.execute("""
-                SELECT timestamp, open_price, high_price, low_price, close_price, volume
-                FROM sbet_historical_csv 
-                WHERE timestamp >= ? AND source = 'perplexity_csv'
-                ORDER BY timestamp ASC
-            """, (cutoff_time,))
-            
-            rows = cursor.fetchall()
-            conn.close()
+            timestamp = to_ts(timestamp)
+            
+            position = ledger_positions.get(symbol)
+            if position is None:
+                position = await rebuild_holdings_ledger(symbol)
+            append = position.last_ts is None or timestamp >= position.last_ts
+            
+            # Holdings before this entry, and the lowest holdings any later entry leaves
+            lowest_later = None
+            if append:
+                pre_purchase_holdings = position.quantity
+            else:
+                conn = get_connection()
+                cursor = conn.cursor()
+                row = ledger_row(cursor, symbol, timestamp)
+                cursor.execute("SELECT MIN(total_quantity) FROM holdings_ledger WHERE symbol = ? AND timestamp > ?",
+                               (symbol, timestamp))
+                lowest_later = cursor.fetchone()[0]
+                conn.close()
+                pre_purchase_holdings = row[4] if row else 0.0
+            
+            # A disposal, back-dated or not, may never take holdings below zero
+            lowest = min(pre_purchase_holdings, lowest_later if lowest_later is not None else pre_purchase_holdings)
+            if eth_quantity < 0 and lowest + eth_quantity < -LEDGER_EPSILON:
+                print(f"Rejected {symbol} disposal of {-eth_quantity} ETH at {iso(timestamp)}: "
+                      f"holdings would fall to {lowest + eth_quantity}")
+                return False
             
-            historical_data = []
-            for row in rows:
-                historical_data.append({
-                    "timestamp": datetime.fromisoformat(row[0]),
-                    "open": row[1],
-                    "high": row[2],
-                    "low": row[3],
-                    "close": row[4],
-                    "volume": row[5]
-                })
+            # Calculate new holdings and concentration
+            post_purchase_holdings = pre_purchase_holdings + eth_quantity
+            total_cost_usd = eth_quantity * eth_price_usd
+            concentration_change = (eth_quantity / post_purchase_holdings) * 100 if post_purchase_holdings > 0 else 0
             
-            return historical_data
+            # Queue the transaction together with its ledger row
+            statements = [(INSERT_PURCHASE, [(
+                symbol, timestamp, transaction_hash, eth_quantity, eth_price_usd, total_cost_usd,
+                shares_outstanding, pre_purchase_holdings, post_purchase_holdings,
+                concentration_change, notes
+            )])]
+            if append:
+                statements.append((INSERT_LEDGER, [(symbol,) + position.apply(timestamp, eth_quantity, eth_price_usd)]))
+            statements.append(change_statement({f"purchases:{symbol}": timestamp}))
+            await write_queue.submit(statements)
+            if not append:
+                await rebuild_holdings_ledger(symbol)
+            concentration_dirty.mark(symbol, timestamp)
+            await refresh_concentration()
+            
+            print(f"Added {symbol} ETH purchase: {eth_quantity} ETH @ ${eth_price_usd} = ${total_cost_usd:,.2f}")
+            return True
             
         except Exception as e:
-            print(f"Error fetching SBET CSV historical data: {e}")
-            return []
+            print(f"Error adding ETH purchase transaction: {e}")
+            return False
 
 # Initialize data collector
 data_collector = DataCollector()
 
+def archive_key(symbol: str, resolution: str) -> str:
+    """Columnar archive series for a (symbol, resolution) pair"""
+    return f"{symbol}/{resolution}"
+
+def bars_fingerprint(cursor, symbol: str, resolution: str) -> tuple:
+    """Count, time span and price/volume totals of a bar series, to tell whether a re-import changed it"""
+    cursor.execute("""
+        SELECT COUNT(*), MIN(timestamp), MAX(timestamp),
+               COALESCE(SUM(open_price + high_price + low_price + close_price), 0), COALESCE(SUM(volume), 0)
+        FROM bars WHERE symbol = ? AND resolution = ?
+    """, (symbol, resolution))
+    return cursor.fetchone()
+
+def load_bar_arrays(symbol: str, after_ts: Optional[int] = None,
+                    resolution: str = CSV_BAR_RESOLUTION) -> Dict[str, np.ndarray]:
+    """
+    Load OHLCV bars newer than `after_ts` (epoch seconds) as NumPy columns.
+    Reads zero-copy slices from the columnar archive, falling back to SQLite
+    while the archive has not been built yet.
+    """
+    key = archive_key(symbol, resolution)
+    if bar_archive.last_ts(key) is not None:
+        return bar_archive.read(key, after_ts + 1 if after_ts is not None else None)
+    return query_bar_arrays(symbol, after_ts, resolution)
+
+def query_bar_arrays(symbol: str, after_ts: Optional[int] = None,
+                     resolution: str = CSV_BAR_RESOLUTION) -> Dict[str, np.ndarray]:
+    """Query OHLCV bars newer than `after_ts` from the SQLite bar store"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT timestamp, open_price, high_price, low_price, close_price, volume
+        FROM bars
+        WHERE symbol = ? AND resolution = ? AND timestamp > ?
+        ORDER BY timestamp ASC
+    """, (symbol, resolution, after_ts if after_ts is not None else -1))
+    
+    rows = cursor.fetchall()
+    conn.close()
+    
+    if not rows:
+        return empty_bars()
+    
+    columns = list(zip(*rows))
+    bars = {
+        field: np.asarray(column, dtype=np.float64)
+        for field, column in zip(BAR_FIELDS[1:], columns[1:])
+    }
+    bars["ts"] = np.asarray(columns[0], dtype=np.int64)
+    return bars
+
+# Output fields of the bar history endpoints: (JSON name, bar column)
+OHLCV_FIELDS = [("timestamp", "ts"), ("open", "open"), ("high", "high"), ("low", "low"),
+                ("close", "close"), ("volume", "volume")]
+PRICE_FIELDS = [("timestamp", "ts"), ("price", "close")]
+
+def bars_json(bars: Dict[str, np.ndarray], fields: List[tuple]) -> str:
+    """Encode bar columns straight into a JSON array of row objects (ISO timestamps, null for NaN)"""
+    return records_json([(name, iso_many(bars["ts"]) if column == "ts" else bars[column])
+                         for name, column in fields])
+
+def page_args(after_ts: Optional[str], limit: Optional[int], since: Optional[str] = None) -> tuple:
+    """Validate the pagination and delta sync parameters: (cursor in epoch seconds, page size, sync token)"""
+    try:
+        cursor = parse_cursor(after_ts)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="after_ts must be epoch seconds or an ISO timestamp")
+    if limit is not None and not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_LIMIT}")
+    try:
+        token = parse_token(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since must be a sync_token returned by this endpoint")
+    if token is not None and cursor is not None:
+        raise HTTPException(status_code=400, detail="since and after_ts cannot be combined")
+    return cursor, limit, token
+
+def read_sync(since: Optional[int], *series: str) -> SyncWindow:
+    """Delta sync state of the given series, read before their data"""
+    conn = get_connection()
+    try:
+        return sync_window(conn.cursor(), since, *series)
+    finally:
+        conn.close()
+
+# Indicator results cached per (symbol, window, resolution)
+indicator_cache = IndicatorCache(load_bar_arrays)
+
+# Bar versions each series in indicator_cache was built from; another worker's import or
+# backfill bumps the shared version and the local series is rebuilt
+indicator_versions: Dict[str, int] = {}
+
+# Responses shared across workers, as payloads with their compressed variants: indicator slices
+# per (request, bar versions), performance comparisons per (symbol, source, range, data versions),
+# projections per (scenario, data version), bar history windows per (request, minute, bar version)
+indicator_response_cache = SharedCache(shared_store, "indicator_payloads")
+performance_cache = SharedCache(shared_store, "performance_payloads")
+projection_cache = SharedCache(shared_store, "projection_payloads")
+history_response_cache = SharedCache(shared_store, "history_payloads")
+
+telemetry.REGISTRY.add_collector(lambda: telemetry.cache_metrics({
+    "indicators": indicator_cache,
+    "indicator_responses": indicator_response_cache,
+    "performance": performance_cache,
+    "projections": projection_cache,
+    "history_responses": history_response_cache,
+}))
+
+def serve_payload(request: Request, cache: SharedCache, key, payload: Payload, fresh: bool = False) -> Response:
+    """
+    Answer from a response payload in the client's encoding. Each compressed variant is built
+    the first time it is asked for and stored with the payload, so it is made once per key.
+    """
+    encoding = negotiate(request.headers.get("accept-encoding", ""))
+    if payload.encode(encoding) or fresh:
+        cache.put(key, payload)
+    return payload.response(encoding)
+
+def history_key(route: str, symbol: str, hours: Optional[int], *params) -> tuple:
+    """
+    Response cache key of a bar history window. Bars sit on whole minutes, so the window start
+    rounded up to the minute selects the same bars; a new bar version moves on to a new key.
+    """
+    cutoff = -(-(now_ts() - hours * 3600) // 60) * 60 if hours else None
+    return (route, symbol, cutoff) + params + shared_store.versions(f"bars:{symbol}")
+
+def load_price_series(cursor, table: str, column: str, start: int, end: int,
+                      where: str, params: tuple):
+    """Load one price column over [start, end] plus the last observation before start"""
+    cursor.execute(f"""
+        SELECT timestamp, {column}
+        FROM {table}
+        WHERE {where}
+          AND timestamp >= COALESCE(
+                (SELECT MAX(timestamp) FROM {table} WHERE {where} AND timestamp < ? AND {column} > 0), ?)
+          AND timestamp <= ?
+        ORDER BY timestamp ASC
+    """, params + params + (start, start, end))
+    rows = cursor.fetchall()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    ts, values = zip(*rows)
+    return (np.asarray(ts, dtype=np.int64),
+            np.asarray([v if v is not None else np.nan for v in values], dtype=np.float64))
+
+def load_comparison_series(cursor, company: Company, source: str, start: int, end: int):
+    """Stock and treasury-asset price series for one comparison source"""
+    if source == "live":
+        where, params = "symbol = ?", (company.symbol,)
+        stock = load_price_series(cursor, "price_history", "stock_price", start, end, where, params)
+        asset = load_price_series(cursor, "price_history", "eth_price", start, end, where, params)
+    else:
+        where = "symbol = ? AND resolution = ?"
+        stock = load_price_series(cursor, "bars", "close_price", start, end, where,
+                                  (company.symbol, CSV_BAR_RESOLUTION))
+        asset = load_price_series(cursor, "bars", "close_price", start, end, where,
+                                  (company.asset_symbol, CSV_BAR_RESOLUTION))
+    return stock, asset
+
+# Projection request bounds: values per scenario list, and Monte Carlo outcome cells
+# (paths x mNAV multiples x new share counts, float64 each, a few arrays of them at once)
+MAX_SCENARIO_VALUES = 50
+MAX_SIMULATION_CELLS = 10_000_000
+
+def parse_float_list(text: str, name: str) -> np.ndarray:
+    """Comma-separated numbers from a query parameter (400 when malformed or too many)"""
+    items = [v for v in text.split(",") if v.strip()]
+    if len(items) > MAX_SCENARIO_VALUES:
+        raise HTTPException(status_code=400, detail=f"{name} takes at most {MAX_SCENARIO_VALUES} values")
+    try:
+        values = np.asarray([float(v) for v in items], dtype=np.float64)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be comma-separated numbers")
+    if not len(values) or not np.all(np.isfinite(values)) or np.any(values < 0):
+        raise HTTPException(status_code=400, detail=f"{name} must be non-negative numbers")
+    return values
+
+def load_daily_returns(asset_symbol: str) -> np.ndarray:
+    """Daily log returns of an asset from its longest bar history (bulk-loaded hourly bars, else CSV bars)"""
+    bars = empty_bars()
+    for resolution in reversed(CONCENTRATION_ASSET_RESOLUTIONS):
+        bars = load_bar_arrays(asset_symbol, resolution=resolution)
+        if len(bars["ts"]) > 1:
+            break
+    daily = resample_bars(bars, RESOLUTION_SECONDS["1D"])
+    returns = log_returns(daily["close"])
+    return returns[np.isfinite(returns)]
+
+def projection_inputs(cursor, company: Company) -> Dict:
+    """Current holdings, share count and prices a projection starts from"""
+    position = ledger_row(cursor, company.symbol)
+    cursor.execute("""
+        SELECT timestamp, eth_price, stock_price, eth_holdings, outstanding_shares
+        FROM price_history
+        WHERE symbol = ?
+        ORDER BY timestamp DESC
+        LIMIT 1
+    """, (company.symbol,))
+    snapshot = cursor.fetchone()
+    
+    latest_close = {}
+    for symbol in (company.symbol, company.asset_symbol):
+        cursor.execute("""
+            SELECT timestamp, close_price
+            FROM bars
+            WHERE symbol = ? AND resolution = ?
+            ORDER BY timestamp DESC
+            LIMIT 1
+        """, (symbol, CSV_BAR_RESOLUTION))
+        latest_close[symbol] = cursor.fetchone()
+    
+    def latest_price(bar, snapshot_index):
+        # Whichever of the latest bar and the latest live snapshot is newer
+        if snapshot and snapshot[snapshot_index] and (not bar or snapshot[0] >= bar[0]):
+            return snapshot[snapshot_index]
+        return bar[1] if bar else 0.0
+    
+    eth_holdings = position[4] if position else (snapshot[3] if snapshot else 0.0)
+    shares = company.diluted_shares or (snapshot[4] if snapshot else 0)
+    return {
+        "eth_holdings": eth_holdings,
+        "shares_outstanding": shares,
+        "eth_price": latest_price(latest_close[company.asset_symbol], 1),
+        "stock_price": latest_price(latest_close[company.symbol], 2),
+        "version": (position[:2] if position else None, snapshot[0] if snapshot else None,
+                    tuple(latest_close.values()), bar_archive.last_ts(archive_key(company.asset_symbol, "1H"))),
+    }
+
+def bar_symbols() -> set:
+    """Symbols with bars: every registered company and its treasury asset"""
+    companies = get_companies(active_only=False)
+    return {c.symbol for c in companies} | {c.asset_symbol for c in companies}
+
+# Asset bar resolutions sampled for concentration (imported CSV bars, then bulk-loaded history)
+CONCENTRATION_ASSET_RESOLUTIONS = [CSV_BAR_RESOLUTION, "1H"]
+
+# Companies whose concentration series is stale, from the earliest changed timestamp
+concentration_dirty = DirtyRanges()
+
+def mark_bars_changed(symbol: str, from_ts: Optional[int] = None):
+    """Mark every company priced from `symbol` bars (its stock or treasury asset) for recomputation"""
+    for company in get_companies(active_only=False):
+        if symbol in (company.symbol, company.asset_symbol):
+            concentration_dirty.mark(company.symbol, from_ts)
+
+def build_concentration_rows(company: Company, from_ts: Optional[int]) -> List[tuple]:
+    """
+    eth_concentration_analysis rows at or after `from_ts` (everything when None).
+    Points are the company's stock bars and live snapshots; the asset price, ledger
+    holdings and share count are sampled as of each point.
+    """
+    start = from_ts if from_ts is not None else 0
+    end = now_ts()
+    snapshots = load_snapshots(company.symbol, start, end)
+    
+    stock_bars = load_bar_arrays(company.symbol, start - STOCK_MAX_AGE_SECONDS - 1)
+    # Minute bars compacted from live ticks give an intraday grid where capture is on
+    tick_bars = load_bar_arrays(company.symbol, start - STOCK_MAX_AGE_SECONDS - 1, TICK_BAR_RESOLUTION)
+    stock = merge_series((stock_bars["ts"], stock_bars["close"]), (tick_bars["ts"], tick_bars["close"]),
+                         (snapshots["ts"], snapshots["stock_price"]))
+    grid = np.unique(stock[0][stock[0] >= start])
+    if not len(grid):
+        return []
+    
+    asset_series = [(snapshots["ts"], snapshots["eth_price"])]
+    for resolution in CONCENTRATION_ASSET_RESOLUTIONS + [TICK_BAR_RESOLUTION]:
+        bars = load_bar_arrays(company.asset_symbol, start - ASSET_MAX_AGE_SECONDS - 1, resolution)
+        asset_series.append((bars["ts"], bars["close"]))
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT timestamp, total_quantity
+        FROM holdings_ledger
+        WHERE symbol = ?
+        ORDER BY timestamp ASC, seq ASC
+    """, (company.symbol,))
+    ledger = cursor.fetchall()
+    cursor.execute("""
+        SELECT timestamp, shares_outstanding
+        FROM eth_purchase_transactions
+        WHERE symbol = ?
+        ORDER BY timestamp ASC
+    """, (company.symbol,))
+    reported_shares = cursor.fetchall()
+    conn.close()
+    
+    if ledger:
+        holdings = tuple(np.asarray(column, dtype=np.float64) for column in zip(*ledger))
+    else:
+        # No purchase ledger: fall back to the collector's observed balances
+        holdings = (snapshots["ts"], snapshots["eth_holdings"])
+    share_series = [(snapshots["ts"], snapshots["outstanding_shares"])]
+    if reported_shares:
+        share_series.append(tuple(np.asarray(column, dtype=np.float64) for column in zip(*reported_shares)))
+    
+    shares = sample_asof(merge_series(*share_series), grid)
+    shares = np.where(np.isnan(shares), float(company.diluted_shares or 0), shares)
+    
+    series = concentration_series(
+        grid,
+        sample_asof(merge_series(*asset_series), grid, ASSET_MAX_AGE_SECONDS),
+        sample_asof(stock, grid, STOCK_MAX_AGE_SECONDS),
+        # Holdings can fall to 0 after a full disposal; only missing values are skipped
+        sample_asof(holdings, grid, positive=False),
+        shares,
+    )
+    return [
+        (company.symbol, ts, h, m, c, v, int(n), e, nav)
+        for ts, h, m, c, v, n, e, nav in zip(
+            series["ts"].tolist(), series["eth_holdings"].tolist(), series["market_cap"].tolist(),
+            series["eth_concentration_pct"].tolist(), series["treasury_value_usd"].tolist(),
+            series["shares_outstanding"].tolist(), series["eth_per_share"].tolist(),
+            series["nav_multiplier"].tolist())
+    ]
+
+async def refresh_concentration():
+    """Recompute the stale tail of every dirty company's concentration series"""
+    if not len(concentration_dirty):
+        return
+    # Inputs may still be sitting in the write-behind queue
+    await write_queue.flush()
+    for symbol, from_ts in concentration_dirty.drain().items():
+        company = _companies.get(symbol)
+        if company is None:
+            continue
+        try:
+            # Months already moved to the cold archive are not rebuilt
+            start = max(from_ts if from_ts is not None else 0,
+                        RETENTION_POLICIES["eth_concentration_analysis"].archive_floor(now_ts()))
+            rows = await asyncio.to_thread(build_concentration_rows, company, start)
+            await write_queue.submit([
+                ("DELETE FROM eth_concentration_analysis WHERE symbol = ? AND timestamp >= ?", [(symbol, start)]),
+                (INSERT_CONCENTRATION, rows),
+                # The rebuilt rows are at full density again
+                rewind_statement("eth_concentration_analysis", symbol, start),
+                change_statement({f"concentration:{symbol}": start}),
+            ])
+        except Exception as e:
+            print(f"Error refreshing {symbol} concentration series: {e}")
+
 # API Models
 class CurrentMetrics(BaseModel):
     stock_price: float
@@ -575,37 +1488,256 @@ class CurrentMetrics(BaseModel):
     eth_per_share: float
     last_updated: datetime
 
+# Scheduler for the collector (created at startup, so importing main does not load apscheduler)
+# and the startup backfill task (kept referenced until done)
+scheduler = None
+background_tasks = set()
+
+# Bulk market_chart backfills by job key (latest run of each)
+market_backfills: Dict[str, MarketChartBackfill] = {}
+
+async def run_market_backfill(job: MarketChartBackfill, start_ts: int, end_ts: int):
+    """Run a bulk backfill, then rebuild the columnar archive and indicators for its series"""
+    try:
+        await job.run(start_ts, end_ts)
+        bars = await asyncio.to_thread(query_bar_arrays, job.symbol, None, job.resolution)
+        bar_archive.replace(archive_key(job.symbol, job.resolution), bars)
+        indicator_cache.invalidate(job.symbol)
+        shared_store.bump(f"bars:{job.symbol}")
+        await write_queue.submit([change_statement({f"bars:{job.symbol}": start_ts})])
+        mark_bars_changed(job.symbol, start_ts)
+        await refresh_concentration()
+        print(f"Market backfill {job.job} stored {job.status['rows']} bars")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Error in market backfill {job.job}: {e}")
+
+async def compact_ticks():
+    """
+    Roll ticks of every closed minute since the last compacted bar into 1-minute bars
+    (bar store and archive), then expire raw segments past the retention window.
+    """
+    closed_ms = now_ts() // TICK_BAR_SECONDS * TICK_BAR_SECONDS * 1000
+    changed = {}
+    for symbol in await asyncio.to_thread(tick_log.symbols):
+        try:
+            key = archive_key(symbol, TICK_BAR_RESOLUTION)
+            last = bar_archive.last_ts(key)
+            start_ms = (last + TICK_BAR_SECONDS) * 1000 if last is not None else None
+            points = await asyncio.to_thread(tick_log.read, symbol, start_ms, closed_ms)
+            bars = points_to_bars(points, TICK_BAR_SECONDS)
+            if len(bars["ts"]):
+                await write_queue.submit([(INSERT_BAR, [
+                    (symbol, TICK_BAR_RESOLUTION, ts, o, h, l, c, None, "ticks")
+                    for ts, o, h, l, c in zip(bars["ts"].tolist(), bars["open"].tolist(), bars["high"].tolist(),
+                                              bars["low"].tolist(), bars["close"].tolist())
+                ])])
+                bar_archive.append(key, bars)
+                mark_bars_changed(symbol, int(bars["ts"][0]))
+                changed[f"bars:{symbol}"] = int(bars["ts"][0])
+            await asyncio.to_thread(tick_log.drop_before, symbol,
+                                    closed_ms // 1000 - TICK_RETENTION_HOURS * 3600)
+        except Exception as e:
+            print(f"Error compacting {symbol} ticks: {e}")
+    if changed:
+        await refresh_concentration()
+        await publish_changes(*changed)
+        # Logged after the archive append and version bump, so a token never runs ahead of the bars
+        await write_queue.submit([change_statement(changed)])
+
+def first_bar_ts(symbol: str, resolution: str) -> Optional[int]:
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(timestamp) FROM bars WHERE symbol = ? AND resolution = ?", (symbol, resolution))
+    first = cursor.fetchone()[0]
+    conn.close()
+    return first
+
+async def expire_tick_bars(now: int) -> Dict[str, int]:
+    """
+    Delete tick-compacted minute bars past the raw tier, in whole months, from the bar store
+    and the archive. Returns the oldest deleted bar of each changed `bars:<symbol>` series.
+    """
+    before = TICK_BAR_POLICY.raw_floor(now)
+    changes = {}
+    for symbol in await asyncio.to_thread(tick_log.symbols):
+        try:
+            first = await asyncio.to_thread(first_bar_ts, symbol, TICK_BAR_RESOLUTION)
+            await asyncio.to_thread(bar_archive.drop_before, archive_key(symbol, TICK_BAR_RESOLUTION), before)
+            if first is None or first >= before:
+                continue
+            await write_queue.submit(expire_bars_statements(symbol, TICK_BAR_RESOLUTION, before))
+            changes[f"bars:{symbol}"] = first
+        except Exception as e:
+            print(f"Error expiring {symbol} tick bars: {e}")
+    return changes
+
+def retention_inputs() -> tuple:
+    """Retention watermarks, and the oldest row of each (series table, company)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    done = load_watermarks(cursor)
+    first = {}
+    for table in RETENTION_POLICIES:
+        for company in get_companies(active_only=False):
+            cursor.execute(f"SELECT MIN(timestamp) FROM {table} WHERE symbol = ?", (company.symbol,))
+            first[(table, company.symbol)] = cursor.fetchone()[0]
+    conn.close()
+    return done, first
+
+async def apply_retention():
+    """
+    Move aged snapshot and concentration rows down their retention tiers (hourly and
+    daily rollups, then the cold archive), then return the freed pages to the filesystem.
+    """
+    now = now_ts()
+    await write_queue.flush()
+    done, first = await asyncio.to_thread(retention_inputs)
+    thinned, archived = 0, 0
+    changes = {}
+    for (table, symbol), first_ts in first.items():
+        try:
+            for chunk in pending_chunks(RETENTION_POLICIES[table], table, symbol, first_ts, done, now):
+                if chunk.bucket:
+                    await write_queue.submit(thin_statements(table, symbol, chunk))
+                    thinned += 1
+                else:
+                    archived += await asyncio.to_thread(write_archive, get_connection, COLD_ARCHIVE_DIR,
+                                                        table, symbol, chunk)
+                    await write_queue.submit(archive_statements(table, symbol, chunk))
+                series = f"{SERIES_NAMES[table]}:{symbol}"
+                changes[series] = min(changes.get(series, chunk.start), chunk.start)
+        except Exception as e:
+            print(f"Error applying {table} retention for {symbol}: {e}")
+    expired = await expire_tick_bars(now)
+    changes.update(expired)
+    await write_queue.submit([change_statement(changes), prune_statement(SERIES_CHANGES_KEEP)])
+    published = [series for series in changes if series.startswith(("snapshots:", "bars:"))]
+    if published:
+        await publish_changes(*published)
+    if thinned or archived or expired:
+        print(f"Retention: thinned {thinned} day chunks, archived {archived} rows, "
+              f"expired tick bars of {len(expired)} symbols")
+    
+    await write_queue.flush()
+    free = None
+    while True:
+        remaining = await asyncio.to_thread(storage.reclaim_space, RETENTION_VACUUM_PAGES)
+        # Stop once nothing is left, or nothing is reclaimed (auto_vacuum not enabled)
+        if not remaining or remaining == free:
+            break
+        free = remaining
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database and start background tasks on startup"""
+    global scheduler
     init_database()
     
     # Import CSV data on startup
-    data_collector = DataCollector()
     await data_collector.import_eth_csv_data()
     await data_collector.import_sbet_csv_data()
     
     # Add sample ETH purchase transactions for demonstration
     await add_sample_eth_purchases()
     
+    # Rebuild every company's holdings ledger and concentration series from the freshly imported inputs
+    for company in get_companies(active_only=False):
+        await rebuild_holdings_ledger(company.symbol)
+        concentration_dirty.mark(company.symbol)
+    await refresh_concentration()
+    
     # Start the scheduler for real-time data collection
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.triggers.interval import IntervalTrigger
+    from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
     scheduler = AsyncIOScheduler()
     
     async def collect_data_job():
-        await data_collector.collect_and_store_data()
+        with telemetry.SCHEDULER_TICK_SECONDS.time(job="collect_data"):
+            await data_collector.collect_and_store_data()
+    
+    def record_scheduler_event(event):
+        if event.code in (EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES):
+            telemetry.SCHEDULER_MISSED.inc(job=event.job_id)
+        else:
+            lag = datetime.now(timezone.utc) - max(event.scheduled_run_times)
+            telemetry.SCHEDULER_LAG_SECONDS.set(lag.total_seconds(), job=event.job_id)
+    
+    # Collect on wall-clock multiples of the interval (drift-free). A tick never overlaps
+    # the previous one, and runs missed while busy collapse into a single catch-up run
+    aligned_start = now_ts() // COLLECT_INTERVAL_SECONDS * COLLECT_INTERVAL_SECONDS
+    scheduler.add_job(
+        collect_data_job,
+        IntervalTrigger(seconds=COLLECT_INTERVAL_SECONDS, start_date=to_datetime(aligned_start)),
+        id="collect_data",
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=COLLECT_INTERVAL_SECONDS // 2,
+        replace_existing=True,
+    )
     
-    # Schedule data collection every 5 minutes
-    scheduler.add_job(collect_data_job, "interval", minutes=5)
+    if TICK_INTERVAL_SECONDS > 0:
+        # Every worker schedules capture, but only the tick log's writer runs it
+        async def capture_ticks_job():
+            if not tick_log.claim_writer():
+                return
+            with telemetry.SCHEDULER_TICK_SECONDS.time(job="capture_ticks"):
+                await data_collector.capture_ticks()
+        
+        async def compact_ticks_job():
+            if not tick_log.claim_writer():
+                return
+            with telemetry.SCHEDULER_TICK_SECONDS.time(job="compact_ticks"):
+                await compact_ticks()
+        
+        scheduler.add_job(capture_ticks_job, IntervalTrigger(seconds=TICK_INTERVAL_SECONDS),
+                          id="capture_ticks", max_instances=1, coalesce=True, replace_existing=True)
+        # Just after each minute closes, once its last ticks are in
+        scheduler.add_job(compact_ticks_job,
+                          IntervalTrigger(seconds=TICK_BAR_SECONDS, start_date=to_datetime(aligned_start + 5)),
+                          id="compact_ticks", max_instances=1, coalesce=True, replace_existing=True)
+    if RETENTION_INTERVAL_MINUTES > 0:
+        async def retention_job():
+            with telemetry.SCHEDULER_TICK_SECONDS.time(job="retention"):
+                await apply_retention()
+        
+        scheduler.add_job(retention_job, IntervalTrigger(minutes=RETENTION_INTERVAL_MINUTES),
+                          id="retention", max_instances=1, coalesce=True, replace_existing=True)
+    scheduler.add_listener(record_scheduler_event,
+                           EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+    write_queue.start()
+    analytics_pool.start()
     scheduler.start()
+    
+    # Fill downtime gaps in the background while live ticks keep running
+    if BACKFILL_ON_STARTUP:
+        task = asyncio.create_task(data_collector.backfill_gaps())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop scheduled collection and flush queued writes"""
+    if scheduler is not None and scheduler.running:
+        scheduler.shutdown(wait=False)
+    for task in list(background_tasks):
+        task.cancel()
+    await write_queue.stop()
+    tick_log.release_writer()
+    shared_store.close()
+    analytics_pool.shutdown()
+    storage.close()
 
 async def add_sample_eth_purchases():
     """Add real ETH purchase transactions based on SharpLink Gaming's actual treasury strategy"""
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Check if we already have purchase data
-        cursor.execute("SELECT COUNT(*) FROM eth_purchase_transactions")
+        cursor.execute("SELECT COUNT(*) FROM eth_purchase_transactions WHERE symbol = ?", (DEFAULT_SYMBOL,))
         count = cursor.fetchone()[0]
         
         if count > 0:
@@ -615,28 +1747,28 @@ async def add_sample_eth_purchases():
         # Real ETH purchase transactions based on SharpLink Gaming's actual acquisitions
         real_purchases = [
             {
-                "timestamp": datetime(2025, 6, 13, 12, 0, 0),
+                "timestamp": to_ts(datetime(2025, 6, 13, 12, 0, 0, tzinfo=timezone.utc)),
                 "eth_quantity": 176271.0,
                 "eth_price_usd": 2626.0,
                 "shares_outstanding": 72050000,  # Approximate based on $1B ATM facility
                 "notes": "Major ETH acquisition - $463M purchase, becoming largest publicly-traded ETH holder"
             },
             {
-                "timestamp": datetime(2025, 6, 26, 15, 30, 0),
+                "timestamp": to_ts(datetime(2025, 6, 26, 15, 30, 0, tzinfo=timezone.utc)),
                 "eth_quantity": 9468.0,
                 "eth_price_usd": 2411.0,
                 "shares_outstanding": 72050000,
                 "notes": "Additional ETH purchase - $22.8M acquisition via ATM facility proceeds"
             },
             {
-                "timestamp": datetime(2025, 7, 1, 10, 0, 0),
+                "timestamp": to_ts(datetime(2025, 7, 1, 10, 0, 0, tzinfo=timezone.utc)),
                 "eth_quantity": 222.0,
                 "eth_price_usd": 0.0,  # Staking rewards, no cost
                 "shares_outstanding": 72050000,
                 "notes": "ETH staking rewards - Earned from 100% staked ETH holdings"
             },
             {
-                "timestamp": datetime(2025, 7, 2, 14, 0, 0),
+                "timestamp": to_ts(datetime(2025, 7, 2, 14, 0, 0, tzinfo=timezone.utc)),
                 "eth_quantity": 12206.0,
                 "eth_price_usd": 2400.0,  # Estimated based on market conditions
                 "shares_outstanding": 72050000,
@@ -649,8 +1781,8 @@ async def add_sample_eth_purchases():
             cursor.execute("""
                 SELECT COALESCE(SUM(eth_quantity), 0) 
                 FROM eth_purchase_transactions 
-                WHERE timestamp < ?
-            """, (purchase["timestamp"],))
+                WHERE symbol = ? AND timestamp < ?
+            """, (DEFAULT_SYMBOL, purchase["timestamp"]))
             pre_holdings = cursor.fetchone()[0]
             
             post_holdings = pre_holdings + purchase["eth_quantity"]
@@ -659,17 +1791,19 @@ async def add_sample_eth_purchases():
             
             cursor.execute("""
                 INSERT INTO eth_purchase_transactions 
-                (timestamp, eth_quantity, eth_price_usd, total_cost_usd, shares_outstanding,
+                (symbol, timestamp, eth_quantity, eth_price_usd, total_cost_usd, shares_outstanding,
                  pre_purchase_eth_holdings, post_purchase_eth_holdings, concentration_change_pct, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
-                purchase["timestamp"], purchase["eth_quantity"], purchase["eth_price_usd"],
+                DEFAULT_SYMBOL, purchase["timestamp"], purchase["eth_quantity"], purchase["eth_price_usd"],
                 total_cost, purchase["shares_outstanding"], pre_holdings, post_holdings,
                 concentration_change, purchase["notes"]
             ))
+        cursor.execute(INSERT_CHANGE, (f"purchases:{DEFAULT_SYMBOL}", min(p["timestamp"] for p in real_purchases)))
         
         conn.commit()
         conn.close()
+        concentration_dirty.mark(DEFAULT_SYMBOL)
         print(f"Added {len(real_purchases)} real ETH purchase transactions")
         
     except Exception as e:
@@ -680,10 +1814,11 @@ async def root():
     return {"message": "Sharplink ETH Treasury Tracker API"}
 
 @app.get("/api/current-metrics", response_model=CurrentMetrics)
-async def get_current_metrics():
-    """Get current real-time metrics"""
+async def get_current_metrics(symbol: str = DEFAULT_SYMBOL):
+    """Get current real-time metrics for a company"""
+    company = get_company(symbol)
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Get latest data
@@ -692,10 +1827,11 @@ async def get_current_metrics():
                    m.nav_multiplier, m.eth_per_share, m.nav_premium_pct, m.treasury_value_usd,
                    ph.timestamp
             FROM price_history ph
-            JOIN metrics m ON ph.id = m.id
+            JOIN metrics m ON m.symbol = ph.symbol AND m.timestamp = ph.timestamp
+            WHERE ph.symbol = ?
             ORDER BY ph.timestamp DESC
             LIMIT 1
-        """)
+        """, (company.symbol,))
         
         result = cursor.fetchone()
         conn.close()
@@ -716,15 +1852,20 @@ async def get_current_metrics():
             nav_multiplier=result[5],
             nav_premium_pct=result[7],
             eth_per_share=result[6],
-            last_updated=datetime.fromisoformat(result[9])
+            last_updated=to_datetime(result[9])
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/price-history")
-async def get_price_history(timeframe: str = "1M"):
-    """Get historical price data for charts"""
+async def get_price_history(timeframe: str = "1M", symbol: str = DEFAULT_SYMBOL,
+                            after_ts: Optional[str] = None, limit: Optional[int] = None, since: Optional[str] = None):
+    """Get historical price data for charts (paged with `after_ts`/`limit`, delta sync with `since`)"""
+    company = get_company(symbol)
+    after, limit, since = page_args(after_ts, limit, since)
     try:
         # Map timeframe to days
         timeframe_days = {
@@ -736,39 +1877,45 @@ async def get_price_history(timeframe: str = "1M"):
         }
         
         days = timeframe_days.get(timeframe, 30)
-        cutoff_date = datetime.now() - timedelta(days=days)
+        cutoff_date = now_ts() - days * 86400
         
-        conn = sqlite3.connect(DATABASE)
+        conn = get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT timestamp, eth_price, stock_price, market_cap, eth_holdings
-            FROM price_history
-            WHERE timestamp > ?
-            ORDER BY timestamp
-        """, (cutoff_date,))
-        
-        results = cursor.fetchall()
+        sync = sync_window(cursor, since, f"snapshots:{company.symbol}")
+        results, next_after = [], None
+        if not sync.unchanged:
+            results, next_after = fetch_page(cursor, """
+                SELECT timestamp, eth_price, stock_price, market_cap, eth_holdings
+                FROM price_history
+                WHERE symbol = ? AND timestamp > ?
+                ORDER BY timestamp, id
+            """, (company.symbol, after_bound(after_bound(cutoff_date, sync.after), after)), limit)
         conn.close()
         
         data = []
         for row in results:
             data.append({
-                "timestamp": row[0],
+                "timestamp": iso(row[0]),
                 "eth_price": row[1],
                 "stock_price": row[2],
                 "market_cap": row[3],
                 "eth_holdings": row[4]
             })
         
-        return {"data": data, "timeframe": timeframe}
+        return {"data": data, "timeframe": timeframe, "symbol": company.symbol, "next_after_ts": iso(next_after),
+                **sync_meta(sync)}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/nav-multiplier")
-async def get_nav_multiplier_data(timeframe: str = "1M"):
-    """Get NAV multiplier chart data"""
+async def get_nav_multiplier_data(timeframe: str = "1M", symbol: str = DEFAULT_SYMBOL,
+                                  after_ts: Optional[str] = None, limit: Optional[int] = None,
+                                  since: Optional[str] = None):
+    """Get NAV multiplier chart data (paged with `after_ts`/`limit`, delta sync with `since`)"""
+    company = get_company(symbol)
+    after, limit, since = page_args(after_ts, limit, since)
     try:
         timeframe_days = {
             "1D": 1,
@@ -779,114 +1926,164 @@ async def get_nav_multiplier_data(timeframe: str = "1M"):
         }
         
         days = timeframe_days.get(timeframe, 30)
-        cutoff_date = datetime.now() - timedelta(days=days)
+        cutoff_date = now_ts() - days * 86400
         
-        conn = sqlite3.connect(DATABASE)
+        conn = get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT ph.timestamp, ph.eth_price, m.nav_multiplier
-            FROM price_history ph
-            JOIN metrics m ON ph.id = m.id
-            WHERE ph.timestamp > ?
-            ORDER BY ph.timestamp
-        """, (cutoff_date,))
-        
-        results = cursor.fetchall()
+        sync = sync_window(cursor, since, f"snapshots:{company.symbol}")
+        results, next_after = [], None
+        if not sync.unchanged:
+            results, next_after = fetch_page(cursor, """
+                SELECT ph.timestamp, ph.eth_price, m.nav_multiplier
+                FROM price_history ph
+                JOIN metrics m ON m.symbol = ph.symbol AND m.timestamp = ph.timestamp
+                WHERE ph.symbol = ? AND ph.timestamp > ?
+                ORDER BY ph.timestamp, ph.id
+            """, (company.symbol, after_bound(after_bound(cutoff_date, sync.after), after)), limit)
         conn.close()
         
         data = []
         for row in results:
             data.append({
-                "timestamp": row[0],
+                "timestamp": iso(row[0]),
                 "eth_price": row[1],
                 "nav_multiplier": row[2]
             })
         
-        return {"data": data, "timeframe": timeframe}
+        return {"data": data, "timeframe": timeframe, "symbol": company.symbol, "next_after_ts": iso(next_after),
+                **sync_meta(sync)}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/performance-comparison")
-async def get_performance_comparison(period: str = "1Y"):
-    """Get performance comparison data"""
+async def get_performance_comparison(request: Request, period: str = "1Y", start: Optional[str] = None,
+                                     end: Optional[str] = None, source: str = "auto",
+                                     symbol: str = DEFAULT_SYMBOL):
+    """
+    Get stock vs treasury-asset performance comparison on a common forward-filled clock
+    Sources: live (price_history), csv (stock/asset bars), auto (live first, fallback to csv)
+    `start`/`end` accept ISO dates and override `period`
+    """
+    company = get_company(symbol)
     try:
-        # This would typically require more complex calculations
-        # For MVP, returning simplified data structure
-        
         timeframe_days = {
             "1M": 30,
             "3M": 90,
             "1Y": 365
         }
         
-        days = timeframe_days.get(period, 365)
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        conn = sqlite3.connect(DATABASE)
+        try:
+            end_date = parse_ts(end) if end else now_ts()
+            if start:
+                start_date = parse_ts(start)
+            else:
+                start_date = end_date - timeframe_days.get(period, 365) * 86400
+        except ValueError:
+            raise HTTPException(status_code=400, detail="start and end must be ISO dates")
+        
+        if start_date >= end_date:
+            raise HTTPException(status_code=400, detail="start must be before end")
+        if source not in ["auto", "live", "csv"]:
+            raise HTTPException(status_code=400, detail=f"Unknown source: {source}")
+        
+        # Open-ended ranges are keyed on the period, so new rows refresh them via the data versions
+        versions = shared_store.versions(f"snapshots:{company.symbol}", f"bars:{company.symbol}",
+                                         f"bars:{company.asset_symbol}")
+        cache_key = (company.symbol, source, start or period, end, versions)
+        
+        cached = performance_cache.get(cache_key)
+        if cached is not None:
+            return serve_payload(request, performance_cache, cache_key, cached)
+        
+        conn = get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT timestamp, stock_price, eth_price
-            FROM price_history
-            WHERE timestamp > ?
-            ORDER BY timestamp
-        """, (cutoff_date,))
+        candidates = ["live", "csv"] if source == "auto" else [source]
+        result = None
+        used_source = candidates[-1]
+        for candidate in candidates:
+            (ts_stock, stock), (ts_eth, eth) = load_comparison_series(cursor, company, candidate,
+                                                                      start_date, end_date)
+            if len(ts_stock) + len(ts_eth) >= ANALYTICS_OFFLOAD_MIN_POINTS:
+                result = await analytics_pool.run(
+                    performance.compare,
+                    {"ts_stock": ts_stock, "stock": stock, "ts_eth": ts_eth, "eth": eth},
+                    is_disconnected=request.is_disconnected, start_ts=start_date)
+            else:
+                result = performance.compare(ts_stock, stock, ts_eth, eth, start_date)
+            used_source = candidate
+            if len(result["ts"]):
+                break
         
-        results = cursor.fetchall()
         conn.close()
         
-        if not results:
-            return {"data": [], "period": period}
-        
-        # Calculate normalized performance (base 100)
-        initial_stock_price = results[0][1]
-        initial_eth_price = results[0][2]
+        timestamps = iso_many(result["ts"])
+        columns = [
+            ("sharplink_performance", result["stock_performance"]),
+            ("eth_performance", result["eth_performance"]),
+            ("sharplink_drawdown_pct", result["stock_drawdown_pct"]),
+            ("eth_drawdown_pct", result["eth_drawdown_pct"]),
+            ("relative_performance", result["relative_performance"]),
+        ]
         
         data = []
-        for row in results:
-            stock_performance = (row[1] / initial_stock_price) * 100 if initial_stock_price > 0 else 100
-            eth_performance = (row[2] / initial_eth_price) * 100 if initial_eth_price > 0 else 100
-            
-            data.append({
-                "timestamp": row[0],
-                "sharplink_performance": stock_performance,
-                "eth_performance": eth_performance
-            })
-        
-        return {"data": data, "period": period}
-        
+        for i, ts in enumerate(timestamps):
+            point = {"timestamp": ts}
+            for name, column in columns:
+                point[name] = float(column[i])
+            data.append(point)
+        
+        response = {
+            "data": data,
+            "symbol": company.symbol,
+            "period": period,
+            "source": used_source,
+            "start": iso(start_date),
+            "end": iso(end_date),
+            "summary": performance.summarize(result)
+        }
+        return serve_payload(request, performance_cache, cache_key, Payload.from_content(response), fresh=True)
+        
+    except HTTPException:
+        raise
+    except JobTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except JobCancelled as e:
+        raise HTTPException(status_code=499, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/treasury-stats")
-async def get_treasury_stats():
+async def get_treasury_stats(symbol: str = DEFAULT_SYMBOL):
     """Get treasury statistics and holdings over time"""
+    company = get_company(symbol)
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Get latest treasury data
         cursor.execute("""
-            SELECT eth_holdings, treasury_value_usd, timestamp
+            SELECT ph.eth_holdings, m.treasury_value_usd, ph.timestamp
             FROM metrics m
-            JOIN price_history ph ON m.id = ph.id
-            ORDER BY timestamp DESC
+            JOIN price_history ph ON ph.symbol = m.symbol AND ph.timestamp = m.timestamp
+            WHERE ph.symbol = ?
+            ORDER BY ph.timestamp DESC
             LIMIT 1
-        """)
+        """, (company.symbol,))
         
         latest = cursor.fetchone()
         
         # Get historical treasury data (last 30 days)
-        cutoff_date = datetime.now() - timedelta(days=30)
+        cutoff_date = now_ts() - 30 * 86400
         cursor.execute("""
             SELECT ph.timestamp, ph.eth_holdings, m.treasury_value_usd
             FROM price_history ph
-            JOIN metrics m ON ph.id = m.id
-            WHERE ph.timestamp > ?
+            JOIN metrics m ON m.symbol = ph.symbol AND m.timestamp = ph.timestamp
+            WHERE ph.symbol = ? AND ph.timestamp > ?
             ORDER BY ph.timestamp
-        """, (cutoff_date,))
+        """, (company.symbol, cutoff_date))
         
         historical = cursor.fetchall()
         conn.close()
@@ -894,18 +2091,19 @@ async def get_treasury_stats():
         current_stats = {
             "current_eth_holdings": latest[0] if latest else 0,
             "current_value_usd": latest[1] if latest else 0,
-            "last_updated": latest[2] if latest else None
+            "last_updated": iso(latest[2]) if latest else None
         }
         
         historical_data = []
         for row in historical:
             historical_data.append({
-                "timestamp": row[0],
+                "timestamp": iso(row[0]),
                 "eth_holdings": row[1],
                 "value_usd": row[2]
             })
         
         return {
+            "symbol": company.symbol,
             "current": current_stats,
             "historical": historical_data
         }
@@ -913,17 +2111,36 @@ async def get_treasury_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text-format metrics"""
+    return PlainTextResponse(telemetry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/query-profile")
+async def get_query_profile(limit: int = 50, full_scans_only: bool = False):
+    """
+    Profiled SQL statements ordered by total time
+    Each fingerprint carries its calls per route, rows returned and EXPLAIN QUERY PLAN flags
+    """
+    return {
+        "slow_query_ms": PROFILER.slow_seconds * 1000,
+        "queries": PROFILER.report(limit, full_scans_only)
+    }
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.now()}
+    return {"status": "healthy", "timestamp": iso(now_ts())}
 
 @app.get("/api/eth-historical-csv")
-async def get_eth_historical_csv_data(timeframe: str = "24H"):
+async def get_eth_historical_csv_data(request: Request, timeframe: str = "24H", symbol: str = DEFAULT_ASSET_SYMBOL,
+                                      after_ts: Optional[str] = None, limit: Optional[int] = None,
+                                      since: Optional[str] = None):
     """
-    Get ETH historical data from CSV file
+    Get asset historical data imported from CSV (ETHUSD by default)
     Timeframes: 1H, 6H, 12H, 24H, 3D, 1W, 1M
     """
+    after, limit, since = page_args(after_ts, limit, since)
     try:
         # Map timeframes to hours
         timeframe_hours = {
@@ -938,44 +2155,47 @@ async def get_eth_historical_csv_data(timeframe: str = "24H"):
         
         hours = timeframe_hours.get(timeframe, 24)
         
-        data_collector = DataCollector()
-        historical_data = await data_collector.get_eth_historical_from_csv(hours)
+        sync = read_sync(since, f"bars:{symbol.upper()}")
+        cache_key = history_key("eth-historical-csv", symbol.upper(), hours, after, limit) if not sync.delta else None
+        cached = history_response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            return serve_payload(request, history_response_cache, cache_key, cached)
+        bars = await data_collector.get_bars_history(symbol.upper(), hours, after_ts=after)
         
-        if not historical_data:
+        # Past the newest bar, a page (or delta) is empty rather than an error
+        if not len(bars["ts"]) and after is None and since is None:
             return {"error": "No historical data available", "data": []}
+        bars, next_after = page_bars(delta_bars(bars, sync), limit)
         
         # Format data for charts
-        formatted_data = []
-        for item in historical_data:
-            formatted_data.append({
-                "timestamp": item["timestamp"].isoformat(),
-                "price": item["close"],
-                "open": item["open"],
-                "high": item["high"],
-                "low": item["low"],
-                "volume": item["volume"]
-            })
-        
-        return {
+        response = series_response({
+            "symbol": symbol.upper(),
             "timeframe": timeframe,
             "data_source": "perplexity_csv",
-            "data_points": len(formatted_data),
-            "data": formatted_data
-        }
+            "data_points": len(bars["ts"]),
+            "next_after_ts": iso(next_after),
+            **sync_meta(sync),
+        }, bars_json(bars, [("timestamp", "ts"), ("price", "close"), ("open", "open"), ("high", "high"),
+                            ("low", "low"), ("volume", "volume")]))
+        if cache_key is None:
+            return response
+        return serve_payload(request, history_response_cache, cache_key, Payload(response.body), fresh=True)
         
     except Exception as e:
         print(f"Error in get_eth_historical_csv_data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/price-history-enhanced")
-async def get_enhanced_price_history(timeframe: str = "1M", source: str = "auto"):
+async def get_enhanced_price_history(timeframe: str = "1M", source: str = "auto",
+                                     symbol: str = DEFAULT_SYMBOL, after_ts: Optional[str] = None,
+                                     limit: Optional[int] = None, since: Optional[str] = None):
     """
-    Enhanced price history combining CSV data with API data
+    Enhanced treasury-asset price history combining CSV data with API data
     Sources: csv, api, auto (csv first, fallback to api)
     """
+    company = get_company(symbol)
+    after, limit, since = page_args(after_ts, limit, since)
     try:
-        data_collector = DataCollector()
-        
         # Try CSV data first if available
         if source in ["csv", "auto"]:
             timeframe_hours = {
@@ -984,47 +2204,47 @@ async def get_enhanced_price_history(timeframe: str = "1M", source: str = "auto"
             }
             
             hours = timeframe_hours.get(timeframe, 24)
-            csv_data = await data_collector.get_eth_historical_from_csv(hours)
+            sync = read_sync(since, f"bars:{company.asset_symbol}")
+            csv_bars = await data_collector.get_bars_history(company.asset_symbol, hours, after_ts=after)
             
-            if csv_data and source == "csv":
-                return {
-                    "timeframe": timeframe,
-                    "source": "csv",
-                    "data": [{"timestamp": item["timestamp"].isoformat(), "price": item["close"]} for item in csv_data]
-                }
-            elif csv_data and source == "auto":
-                return {
+            if len(csv_bars["ts"]):
+                csv_bars, next_after = page_bars(delta_bars(csv_bars, sync), limit)
+                return series_response({
                     "timeframe": timeframe,
-                    "source": "csv_primary",
-                    "data": [{"timestamp": item["timestamp"].isoformat(), "price": item["close"]} for item in csv_data]
-                }
+                    "source": "csv" if source == "csv" else "csv_primary",
+                    "next_after_ts": iso(next_after),
+                    **sync_meta(sync),
+                }, bars_json(csv_bars, PRICE_FIELDS))
         
         # Fallback to API data
         if source in ["api", "auto"]:
             # Get from existing price_history table
-            conn = sqlite3.connect(DATABASE)
+            conn = get_connection()
             cursor = conn.cursor()
             
             timeframe_hours = {"1H": 1, "6H": 6, "12H": 12, "24H": 24, "3D": 72, "1W": 168, "1M": 720}
             hours = timeframe_hours.get(timeframe, 24)
-            cutoff_time = datetime.now() - timedelta(hours=hours)
-            
-            cursor.execute("""
-                SELECT timestamp, eth_price 
-                FROM price_history 
-                WHERE timestamp >= ? AND eth_price > 0
-                ORDER BY timestamp ASC
-            """, (cutoff_time,))
-            
-            rows = cursor.fetchall()
+            cutoff_time = now_ts() - hours * 3600
+            
+            sync = sync_window(cursor, since, f"snapshots:{company.symbol}")
+            rows, next_after = [], None
+            if not sync.unchanged:
+                rows, next_after = fetch_page(cursor, """
+                    SELECT timestamp, eth_price 
+                    FROM price_history 
+                    WHERE symbol = ? AND timestamp > ? AND eth_price > 0
+                    ORDER BY timestamp ASC, id
+                """, (company.symbol, after_bound(after_bound(cutoff_time - 1, sync.after), after)), limit)
             conn.close()
             
-            api_data = [{"timestamp": row[0], "price": row[1]} for row in rows]
+            api_data = [{"timestamp": iso(row[0]), "price": row[1]} for row in rows]
             
             return {
                 "timeframe": timeframe,
                 "source": "api_fallback" if source == "auto" else "api", 
-                "data": api_data
+                "data": api_data,
+                "next_after_ts": iso(next_after),
+                **sync_meta(sync)
             }
         
         return {"error": "No data available", "data": []}
@@ -1039,6 +2259,7 @@ async def import_csv_data(csv_filename: str = "ETHUSD_1M_FROM_PERPLEXITY.csv"):
     try:
         result = await data_collector.import_eth_csv_data(csv_filename)
         if result:
+            await refresh_concentration()
             return {"message": f"Successfully imported CSV data from {csv_filename}"}
         else:
             raise HTTPException(status_code=400, detail="Failed to import CSV data")
@@ -1046,8 +2267,12 @@ async def import_csv_data(csv_filename: str = "ETHUSD_1M_FROM_PERPLEXITY.csv"):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/sbet-historical-csv")
-async def get_sbet_historical_csv_data(timeframe: str = "24H"):
-    """Get SBET historical stock data from CSV"""
+async def get_sbet_historical_csv_data(request: Request, timeframe: str = "24H", symbol: str = CSV_STOCK_SYMBOL,
+                                       after_ts: Optional[str] = None, limit: Optional[int] = None,
+                                       since: Optional[str] = None):
+    """Get historical stock data imported from CSV (SBET by default)"""
+    symbol = symbol.upper()
+    after, limit, since = page_args(after_ts, limit, since)
     try:
         # Map timeframe to hours
         timeframe_hours = {
@@ -1059,37 +2284,47 @@ async def get_sbet_historical_csv_data(timeframe: str = "24H"):
         }
         
         hours = timeframe_hours.get(timeframe, 24)
-        data = await data_collector.get_sbet_historical_from_csv(hours)
-        
-        if not data:
-            raise HTTPException(status_code=404, detail="No SBET CSV data available")
-        
-        # Process data for frontend
-        processed_data = []
-        for item in data:
-            processed_data.append({
-                "timestamp": item["timestamp"].isoformat(),
-                "open": item["open"],
-                "high": item["high"], 
-                "low": item["low"],
-                "close": item["close"],
-                "volume": item["volume"]
-            })
-        
-        return {
-            "data": processed_data,
+        sync = read_sync(since, f"bars:{symbol}")
+        cache_key = history_key("sbet-historical-csv", symbol, hours, after, limit) if not sync.delta else None
+        cached = history_response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            return serve_payload(request, history_response_cache, cache_key, cached)
+        bars = await data_collector.get_bars_history(symbol, hours, after_ts=after)
+        
+        # Past the newest bar, a page (or delta) is empty rather than a 404
+        if not len(bars["ts"]) and after is None and since is None:
+            raise HTTPException(status_code=404, detail=f"No {symbol} CSV data available")
+        bars, next_after = page_bars(delta_bars(bars, sync), limit)
+        
+        response = series_response({
+            "symbol": symbol,
             "timeframe": timeframe,
             "data_source": "sbet_csv",
-            "total_records": len(processed_data),
-            "message": f"SBET historical data for {timeframe}"
-        }
-        
+            "total_records": len(bars["ts"]),
+            "message": f"{symbol} historical data for {timeframe}",
+            "next_after_ts": iso(next_after),
+            **sync_meta(sync),
+        }, bars_json(bars, OHLCV_FIELDS))
+        if cache_key is None:
+            return response
+        return serve_payload(request, history_response_cache, cache_key, Payload(response.body), fresh=True)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/eth-purchases")
-async def get_eth_purchase_transactions(timeframe: str = "30D"):
-    """Get ETH purchase transaction history"""
+async def get_eth_purchase_transactions(timeframe: str = "30D", symbol: str = DEFAULT_SYMBOL,
+                                        after_ts: Optional[str] = None, limit: Optional[int] = None,
+                                        since: Optional[str] = None):
+    """
+    Get ETH purchase transaction history, newest first
+    Pages (`after_ts`/`limit`) run forward in time and `since` returns changes only;
+    the summary covers the returned purchases
+    """
+    company = get_company(symbol)
+    after, limit, since = page_args(after_ts, limit, since)
     try:
         # Map timeframe to days
         timeframe_days = {
@@ -1101,30 +2336,31 @@ async def get_eth_purchase_transactions(timeframe: str = "30D"):
         }
         
         days = timeframe_days.get(timeframe, 30)
-        cutoff_date = datetime.now() - timedelta(days=days)
+        cutoff_date = now_ts() - days * 86400
         
-        conn = sqlite3.connect(DATABASE)
+        conn = get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT timestamp, eth_quantity, eth_price_usd, total_cost_usd, 
-                   pre_purchase_eth_holdings, post_purchase_eth_holdings,
-                   concentration_change_pct, notes
-            FROM eth_purchase_transactions
-            WHERE timestamp >= ?
-            ORDER BY timestamp DESC
-        """, (cutoff_date,))
-        
-        results = cursor.fetchall()
+        sync = sync_window(cursor, since, f"purchases:{company.symbol}")
+        results, next_after = [], None
+        if not sync.unchanged:
+            results, next_after = fetch_page(cursor, """
+                SELECT timestamp, eth_quantity, eth_price_usd, total_cost_usd, 
+                       pre_purchase_eth_holdings, post_purchase_eth_holdings,
+                       concentration_change_pct, notes
+                FROM eth_purchase_transactions
+                WHERE symbol = ? AND timestamp > ?
+                ORDER BY timestamp, id
+            """, (company.symbol, after_bound(after_bound(cutoff_date - 1, sync.after), after)), limit)
         conn.close()
         
         purchase_history = []
         total_eth_purchased = 0
         total_cost = 0
         
-        for row in results:
+        for row in reversed(results):
             purchase_data = {
-                "timestamp": row[0],
+                "timestamp": iso(row[0]),
                 "eth_quantity": row[1],
                 "eth_price_usd": row[2],
                 "total_cost_usd": row[3],
@@ -1141,6 +2377,7 @@ async def get_eth_purchase_transactions(timeframe: str = "30D"):
         avg_purchase_price = total_cost / total_eth_purchased if total_eth_purchased > 0 else 0
         
         return {
+            "symbol": company.symbol,
             "purchases": purchase_history,
             "summary": {
                 "total_purchases": len(purchase_history),
@@ -1148,15 +2385,24 @@ async def get_eth_purchase_transactions(timeframe: str = "30D"):
                 "total_cost_usd": total_cost,
                 "average_purchase_price": avg_purchase_price,
                 "timeframe": timeframe
-            }
+            },
+            "next_after_ts": iso(next_after),
+            **sync_meta(sync)
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/eth-concentration")
-async def get_eth_concentration_analysis(timeframe: str = "30D"):
-    """Get ETH concentration analysis over time"""
+async def get_eth_concentration_analysis(timeframe: str = "30D", symbol: str = DEFAULT_SYMBOL,
+                                         after_ts: Optional[str] = None, limit: Optional[int] = None,
+                                         since: Optional[str] = None):
+    """
+    Get ETH concentration analysis over time
+    Paged with `after_ts`/`limit`, delta sync with `since`; the summary covers the returned rows
+    """
+    company = get_company(symbol)
+    after, limit, since = page_args(after_ts, limit, since)
     try:
         # Map timeframe to days
         timeframe_days = {
@@ -1167,38 +2413,28 @@ async def get_eth_concentration_analysis(timeframe: str = "30D"):
         }
         
         days = timeframe_days.get(timeframe, 30)
-        cutoff_date = datetime.now() - timedelta(days=days)
+        cutoff_date = now_ts() - days * 86400
         
-        conn = sqlite3.connect(DATABASE)
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Get concentration analysis data
-        cursor.execute("""
-            SELECT timestamp, total_eth_holdings, market_cap_usd, eth_concentration_pct,
-                   treasury_value_usd, eth_per_share, nav_multiplier
-            FROM eth_concentration_analysis
-            WHERE timestamp >= ?
-            ORDER BY timestamp ASC
-        """, (cutoff_date,))
-        
-        results = cursor.fetchall()
-        
-        # If no concentration data, calculate it from current data
-        if not results:
-            analysis = await data_collector.analyze_eth_concentration()
-            if analysis:
-                results = [(
-                    analysis["timestamp"], analysis["eth_holdings"], analysis["market_cap"],
-                    analysis["eth_concentration_pct"], analysis["treasury_value_usd"],
-                    analysis["eth_per_share"], analysis["nav_multiplier"]
-                )]
-        
+        sync = sync_window(cursor, since, f"concentration:{company.symbol}")
+        results, next_after = [], None
+        if not sync.unchanged:
+            results, next_after = fetch_page(cursor, """
+                SELECT timestamp, total_eth_holdings, market_cap_usd, eth_concentration_pct,
+                       treasury_value_usd, eth_per_share, nav_multiplier
+                FROM eth_concentration_analysis
+                WHERE symbol = ? AND timestamp > ?
+                ORDER BY timestamp ASC
+            """, (company.symbol, after_bound(after_bound(cutoff_date - 1, sync.after), after)), limit)
         conn.close()
         
         concentration_data = []
         for row in results:
             concentration_data.append({
-                "timestamp": row[0],
+                "timestamp": iso(row[0]),
                 "total_eth_holdings": row[1],
                 "market_cap_usd": row[2],
                 "eth_concentration_pct": row[3],
@@ -1220,6 +2456,7 @@ async def get_eth_concentration_analysis(timeframe: str = "30D"):
             holdings_growth = 0
         
         return {
+            "symbol": company.symbol,
             "concentration_history": concentration_data,
             "current_metrics": latest,
             "summary": {
@@ -1227,81 +2464,212 @@ async def get_eth_concentration_analysis(timeframe: str = "30D"):
                 "concentration_change_pct": concentration_change,
                 "holdings_growth_pct": holdings_growth,
                 "data_points": len(concentration_data)
+            },
+            "next_after_ts": iso(next_after),
+            **sync_meta(sync)
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/projections")
+async def get_projections(request: Request, symbol: str = DEFAULT_SYMBOL, eth_prices: Optional[str] = None,
+                          mnav: str = "1,2,4", new_shares: str = "0", reinvest: bool = True,
+                          horizon_days: int = 365, paths: int = 10000, seed: int = 0):
+    """
+    Share price projections over a grid of ETH prices x mNAV multiples x new shares issued
+    (ATM dilution, proceeds reinvested in ETH unless reinvest=false), plus Monte Carlo
+    percentiles after `horizon_days` with daily ETH returns resampled from bar history.
+    eth_prices defaults to 0.5x-3x the current price.
+    """
+    company = get_company(symbol)
+    if not 1 <= horizon_days <= 3650:
+        raise HTTPException(status_code=400, detail="horizon_days must be between 1 and 3650")
+    if not 100 <= paths <= 100000:
+        raise HTTPException(status_code=400, detail="paths must be between 100 and 100000")
+    multiples = parse_float_list(mnav, "mnav")
+    issued = parse_float_list(new_shares, "new_shares")
+    if paths * len(multiples) * len(issued) > MAX_SIMULATION_CELLS:
+        raise HTTPException(status_code=400, detail=f"paths x mnav values x new_shares values must be at most "
+                                                    f"{MAX_SIMULATION_CELLS:,}")
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        inputs = projection_inputs(cursor, company)
+        conn.close()
+        
+        if inputs["eth_holdings"] <= 0 or inputs["shares_outstanding"] <= 0 or inputs["eth_price"] <= 0:
+            raise HTTPException(status_code=404, detail=f"No holdings or price data for {company.symbol}")
+        
+        prices = (parse_float_list(eth_prices, "eth_prices") if eth_prices
+                  else inputs["eth_price"] * np.array([0.5, 0.75, 1.0, 1.5, 2.0, 3.0]))
+        
+        cache_key = (company.symbol, tuple(prices), tuple(multiples), tuple(issued), reinvest,
+                     horizon_days, paths, seed, inputs["version"])
+        cached = projection_cache.get(cache_key)
+        if cached is not None:
+            return serve_payload(request, projection_cache, cache_key, cached)
+        
+        holdings, shares = inputs["eth_holdings"], inputs["shares_outstanding"]
+        grid = projections.scenario_grid(holdings, shares, prices, multiples, issued, reinvest)
+        
+        returns = await asyncio.to_thread(load_daily_returns, company.asset_symbol)
+        simulation = None
+        if len(returns) >= 2:
+            simulation = await analytics_pool.run(
+                projections.monte_carlo,
+                {"log_returns": returns, "mnav_multiples": multiples, "new_shares": issued},
+                is_disconnected=request.is_disconnected,
+                eth_holdings=holdings, shares_outstanding=shares, start_price=inputs["eth_price"],
+                horizon=horizon_days, paths=paths, seed=seed, reinvest=reinvest)
+        
+        eth_per_share = holdings / shares
+        nav_per_share = eth_per_share * inputs["eth_price"]
+        response = {
+            "symbol": company.symbol,
+            "inputs": {
+                "eth_holdings": holdings,
+                "shares_outstanding": shares,
+                "eth_price": inputs["eth_price"],
+                "stock_price": inputs["stock_price"],
+                "eth_per_share": eth_per_share,
+                "nav_per_share": nav_per_share,
+                "current_mnav": inputs["stock_price"] / nav_per_share if nav_per_share > 0 else 0
+            },
+            "grid": {
+                "eth_prices": prices.tolist(),
+                "mnav": multiples.tolist(),
+                "new_shares": issued.tolist(),
+                "reinvest": reinvest,
+                # share_price[price][mnav][new_shares]; ETH per share does not depend on the ETH price
+                "share_price": grid["share_price"].tolist(),
+                "eth_per_share": grid["eth_per_share"][0].tolist()
+            },
+            "monte_carlo": None if simulation is None else {
+                "horizon_days": horizon_days,
+                "paths": paths,
+                "returns_sampled": len(returns),
+                "eth_price": {k: float(v) for k, v in simulation["eth_price"].items()},
+                "prob_eth_above_current": simulation["prob_eth_above_start"],
+                # share_price[percentile][mnav][new_shares]
+                "share_price": {k: v.tolist() for k, v in simulation["share_price"].items()}
             }
         }
+        return serve_payload(request, projection_cache, cache_key, Payload.from_content(response), fresh=True)
+        
+    except HTTPException:
+        raise
+    except JobTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except JobCancelled as e:
+        raise HTTPException(status_code=499, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/holdings")
+async def get_holdings(symbol: str = DEFAULT_SYMBOL, as_of: Optional[str] = None):
+    """Treasury position at a point in time: holdings, average/FIFO cost basis, realized and unrealized P&L"""
+    company = get_company(symbol)
+    try:
+        try:
+            as_of_ts = parse_ts(as_of) if as_of else now_ts()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="as_of must be an ISO date")
+        
+        conn = get_connection()
+        cursor = conn.cursor()
+        row = ledger_row(cursor, company.symbol, as_of_ts)
+        
+        # Asset price as of the same time
+        cursor.execute("""
+            SELECT close_price
+            FROM bars
+            WHERE symbol = ? AND resolution = ? AND timestamp <= ?
+            ORDER BY timestamp DESC
+            LIMIT 1
+        """, (company.asset_symbol, CSV_BAR_RESOLUTION, as_of_ts))
+        price_row = cursor.fetchone()
+        conn.close()
         
+        asset_price = price_row[0] if price_row else 0
+        position = position_summary(row, asset_price)
+        position["timestamp"] = iso(position["timestamp"]) if position["timestamp"] is not None else None
+        return {
+            "symbol": company.symbol,
+            "as_of": iso(as_of_ts),
+            "asset_price": asset_price,
+            **position
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/treasury-dashboard")
-async def get_treasury_dashboard_data():
-    """Get comprehensive treasury dashboard data combining SBET and ETH information"""
+async def get_treasury_dashboard_data(symbol: str = DEFAULT_SYMBOL):
+    """Get comprehensive treasury dashboard data combining stock and treasury-asset information"""
+    company = get_company(symbol)
     try:
-        conn = sqlite3.connect(DATABASE)
+        conn = get_connection()
         cursor = conn.cursor()
         
-        # Get latest SBET price data
+        # Get latest stock price data
         cursor.execute("""
             SELECT timestamp, close_price, volume
-            FROM sbet_historical_csv
+            FROM bars
+            WHERE symbol = ? AND resolution = ?
             ORDER BY timestamp DESC
             LIMIT 1
-        """)
+        """, (company.symbol, CSV_BAR_RESOLUTION))
         sbet_latest = cursor.fetchone()
         
         # Get latest ETH price data  
         cursor.execute("""
             SELECT timestamp, close_price
-            FROM eth_historical_csv
+            FROM bars
+            WHERE symbol = ? AND resolution = ?
             ORDER BY timestamp DESC
             LIMIT 1
-        """)
+        """, (company.asset_symbol, CSV_BAR_RESOLUTION))
         eth_latest = cursor.fetchone()
         
-        # Get total ETH purchases
-        cursor.execute("""
-            SELECT SUM(eth_quantity), SUM(total_cost_usd), AVG(eth_price_usd)
-            FROM eth_purchase_transactions
-        """)
-        eth_summary = cursor.fetchone()
+        # Current position from the holdings ledger
+        position_latest = ledger_row(cursor, company.symbol)
         
         # Get latest concentration analysis
         cursor.execute("""
             SELECT eth_concentration_pct, treasury_value_usd, nav_multiplier, eth_per_share
             FROM eth_concentration_analysis
+            WHERE symbol = ?
             ORDER BY timestamp DESC
             LIMIT 1
-        """)
+        """, (company.symbol,))
         concentration_latest = cursor.fetchone()
         
         conn.close()
         
         # Calculate key metrics
-        total_eth_holdings = eth_summary[0] if eth_summary[0] else 0
-        total_investment_usd = eth_summary[1] if eth_summary[1] else 0
-        avg_purchase_price = eth_summary[2] if eth_summary[2] else 0
         current_eth_price = eth_latest[1] if eth_latest else 0
         current_sbet_price = sbet_latest[1] if sbet_latest else 0
-        
-        # Calculate unrealized gains/losses
-        current_eth_value = total_eth_holdings * current_eth_price
-        unrealized_pnl = current_eth_value - total_investment_usd
-        unrealized_pnl_pct = (unrealized_pnl / total_investment_usd) * 100 if total_investment_usd > 0 else 0
+        position = position_summary(position_latest, current_eth_price)
         
         return {
+            "symbol": company.symbol,
             "sbet_stock": {
                 "current_price": current_sbet_price,
-                "last_updated": sbet_latest[0] if sbet_latest else None,
+                "last_updated": iso(sbet_latest[0]) if sbet_latest else None,
                 "volume": sbet_latest[2] if sbet_latest else 0
             },
             "eth_treasury": {
-                "total_holdings": total_eth_holdings,
-                "current_value_usd": current_eth_value,
-                "total_invested_usd": total_investment_usd,
-                "average_purchase_price": avg_purchase_price,
+                "total_holdings": position["total_holdings"],
+                "current_value_usd": position["current_value_usd"],
+                "total_invested_usd": position["cost_basis_usd"],
+                "average_purchase_price": position["average_cost_per_unit"],
+                "fifo_cost_basis_usd": position["fifo_cost_basis_usd"],
                 "current_eth_price": current_eth_price,
-                "unrealized_pnl_usd": unrealized_pnl,
-                "unrealized_pnl_pct": unrealized_pnl_pct
+                "unrealized_pnl_usd": position["unrealized_pnl_usd"],
+                "unrealized_pnl_pct": position["unrealized_pnl_pct"],
+                "realized_pnl_usd": position["realized_pnl_usd"]
             },
             "concentration_metrics": {
                 "eth_concentration_pct": concentration_latest[0] if concentration_latest else 0,
@@ -1309,10 +2677,107 @@ async def get_treasury_dashboard_data():
                 "nav_multiplier": concentration_latest[2] if concentration_latest else 0,
                 "eth_per_share": concentration_latest[3] if concentration_latest else 0
             },
-            "last_updated": datetime.now().isoformat()
+            "last_updated": iso(now_ts())
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/indicators")
+async def get_technical_indicators(request: Request, symbol: str = DEFAULT_ASSET_SYMBOL, window: int = 20,
+                                   timeframe: str = "24H", resolution: str = "raw",
+                                   benchmark: Optional[str] = None, since: Optional[str] = None):
+    """
+    Get rolling technical indicators for a bar-store symbol (a company or its treasury asset)
+    A company is benchmarked against its treasury asset unless `benchmark` is given
+    Timeframes: 1H, 6H, 12H, 24H, 3D, 1W, 1M
+    Resolutions: raw, 1H, 4H, 1D
+    With `since`, only points from the first resampled step a bar change reached are returned
+    """
+    _, _, since = page_args(None, None, since)
+    try:
+        symbol = symbol.upper()
+        known = bar_symbols()
+        if symbol not in known:
+            raise HTTPException(status_code=400, detail=f"Unknown symbol: {symbol}")
+        if benchmark is None and symbol in _companies:
+            benchmark = _companies[symbol].asset_symbol
+        elif benchmark is not None:
+            benchmark = benchmark.upper()
+            if benchmark not in known:
+                raise HTTPException(status_code=400, detail=f"Unknown benchmark: {benchmark}")
+        if resolution not in RESOLUTION_SECONDS:
+            raise HTTPException(status_code=400, detail=f"Unknown resolution: {resolution}")
+        if window < 2 or window > 1000:
+            raise HTTPException(status_code=400, detail="window must be between 2 and 1000")
+        
+        timeframe_hours = {
+            "1H": 1, "6H": 6, "12H": 12, "24H": 24,
+            "3D": 72, "1W": 168, "1M": 720
+        }
+        hours = timeframe_hours.get(timeframe, 24)
+        # Bars sit on whole minutes (or resolution steps), so rounding the cutoff up to the step
+        # selects the same bars and lets every request in the step share one cached response
+        step = RESOLUTION_SECONDS[resolution] or 60
+        cutoff_ts = -(-(now_ts() - hours * 3600) // step) * step
+        
+        series = [symbol] if benchmark is None else [symbol, benchmark]
+        # The token is read before the versions, so a cached response is never behind its token
+        sync = read_sync(since, *(f"bars:{s}" for s in series))
+        versions = shared_store.versions(*(f"bars:{s}" for s in series))
+        cache_key = (symbol, benchmark, window, resolution, timeframe, cutoff_ts, versions)
+        cached = indicator_response_cache.get(cache_key) if not sync.delta else None
+        if cached is not None:
+            return serve_payload(request, indicator_response_cache, cache_key, cached)
+        
+        for name, version in zip(series, versions):
+            if indicator_versions.get(name, version) != version:
+                indicator_cache.invalidate(name)
+            indicator_versions[name] = version
+        
+        result = indicator_cache.get(symbol, window, resolution, benchmark)
+        
+        # Slice the requested window out of the full cached series; indicators only look back,
+        # so a delta starts at the resampled step holding the earliest changed bar
+        start_ts = cutoff_ts
+        if sync.after is not None:
+            sync = sync._replace(after=(sync.after + 1) // step * step - 1)
+            start_ts = max(cutoff_ts, sync.after + 1)
+        start = int(np.searchsorted(result["ts"], start_ts, side="left"))
+        if sync.unchanged:
+            start = len(result["ts"])
+        columns = ["close", "sma", "ema", "vwap", "realized_vol", "atr"]
+        if "correlation" in result:
+            columns += ["correlation", "beta"]
+        sliced = {name: result[name][start:] for name in columns}
+        timestamps = iso_many(result["ts"][start:])
+        
+        data = []
+        for i, ts in enumerate(timestamps):
+            point = {"timestamp": ts}
+            for name in columns:
+                value = float(sliced[name][i])
+                point[name] = value if np.isfinite(value) else None
+            data.append(point)
+        
+        response = {
+            "symbol": symbol,
+            "benchmark": benchmark,
+            "window": window,
+            "timeframe": timeframe,
+            "resolution": resolution,
+            "data_points": len(data),
+            "data": data,
+            **sync_meta(sync)
         }
+        if sync.delta:
+            return response
+        return serve_payload(request, indicator_response_cache, cache_key, Payload.from_content(response), fresh=True)
         
+    except HTTPException:
+        raise
     except Exception as e:
+        print(f"Error in get_technical_indicators: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/import-sbet-csv")
@@ -1321,12 +2786,126 @@ async def import_sbet_csv_data(csv_filename: str = "SBET_1M_FROM_PERPLEXITY.csv"
     try:
         result = await data_collector.import_sbet_csv_data(csv_filename)
         if result:
+            await refresh_concentration()
             return {"message": f"Successfully imported SBET CSV data from {csv_filename}"}
         else:
             raise HTTPException(status_code=400, detail="Failed to import SBET CSV data")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/bars")
+async def get_bars(request: Request, symbol: str = DEFAULT_SYMBOL, timeframe: str = "24H",
+                   resolution: str = CSV_BAR_RESOLUTION, after_ts: Optional[str] = None,
+                   limit: Optional[int] = None, since: Optional[str] = None):
+    """
+    Get OHLCV bars for any stock or asset symbol in the bar store
+    Timeframes: 1H, 6H, 12H, 24H, 3D, 1W, 1M, ALL
+    """
+    after, limit, since = page_args(after_ts, limit, since)
+    try:
+        timeframe_hours = {
+            "1H": 1, "6H": 6, "12H": 12, "24H": 24,
+            "3D": 72, "1W": 168, "1M": 720, "ALL": None
+        }
+        if timeframe not in timeframe_hours:
+            raise HTTPException(status_code=400, detail=f"Unknown timeframe: {timeframe}")
+        
+        hours = timeframe_hours[timeframe]
+        floor = now_ts() - hours * 3600 - 1 if hours else None
+        sync = read_sync(since, f"bars:{symbol.upper()}")
+        cache_key = history_key("bars", symbol.upper(), hours, resolution, after, limit) if not sync.delta else None
+        cached = history_response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            return serve_payload(request, history_response_cache, cache_key, cached)
+        bars = load_bar_arrays(symbol.upper(), after_bound(after_bound(floor, sync.after), after), resolution)
+        bars, next_after = page_bars(delta_bars(bars, sync), limit)
+        
+        response = series_response({
+            "symbol": symbol.upper(),
+            "resolution": resolution,
+            "timeframe": timeframe,
+            "data_points": len(bars["ts"]),
+            "next_after_ts": iso(next_after),
+            **sync_meta(sync),
+        }, bars_json(bars, OHLCV_FIELDS))
+        if cache_key is None:
+            return response
+        return serve_payload(request, history_response_cache, cache_key, Payload(response.body), fresh=True)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/companies")
+async def list_companies(include_inactive: bool = False):
+    """List tracked treasury companies"""
+    return {"companies": [c.model_dump() for c in get_companies(active_only=not include_inactive)]}
+
+@app.post("/api/companies")
+async def upsert_company(company: Company):
+    """Register a treasury company or update an existing one"""
+    try:
+        company.symbol = company.symbol.upper()
+        company.asset_symbol = company.asset_symbol.upper()
+        
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO companies ({", ".join(COMPANY_COLUMNS)})
+            VALUES ({", ".join("?" for _ in COMPANY_COLUMNS)})
+        """, company_row(company))
+        conn.commit()
+        conn.close()
+        
+        load_companies()
+        return {"message": f"Saved company {company.symbol}", "company": company.model_dump()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/backfill/market-chart")
+async def start_market_backfill(coin_id: str = "ethereum", symbol: str = DEFAULT_ASSET_SYMBOL,
+                                days: int = 365 * 3, resolution: str = "1H"):
+    """Start a resumable bulk history load from CoinGecko market_chart into the bar store"""
+    if resolution not in MARKET_CHART_RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {list(MARKET_CHART_RESOLUTIONS)}")
+    if days <= 0:
+        raise HTTPException(status_code=400, detail="days must be positive")
+    
+    job = MarketChartBackfill(get_connection, coin_id, symbol.upper(), resolution,
+                              api_key=COINGECKO_API_KEY, concurrency=MARKET_BACKFILL_CONCURRENCY,
+                              rate_per_minute=COINGECKO_RATE_PER_MIN)
+    running = market_backfills.get(job.job)
+    if running is not None and running.status["state"] == "running":
+        return {"message": f"Backfill {job.job} already running", "status": running.status}
+    
+    end_ts = now_ts()
+    market_backfills[job.job] = job
+    task = asyncio.create_task(run_market_backfill(job, end_ts - days * 86400, end_ts))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return {"message": f"Started backfill {job.job}", "status": job.status}
+
+@app.get("/api/backfill/status")
+async def get_market_backfill_status():
+    """Progress of bulk history backfills started since the process came up"""
+    return {"jobs": [job.status for job in market_backfills.values()]}
+
+@app.post("/api/import-bars")
+async def import_bars_csv(symbol: str, csv_filename: str, resolution: str = CSV_BAR_RESOLUTION):
+    """Import OHLCV bars for any symbol from a CSV file"""
+    try:
+        result = await data_collector.import_bars_csv(symbol.upper(), csv_filename, resolution)
+        if result:
+            await refresh_concentration()
+            return {"message": f"Successfully imported {symbol.upper()} bars from {csv_filename}"}
+        else:
+            raise HTTPException(status_code=400, detail=f"Failed to import {symbol.upper()} bars")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+Bulk historical backfill from CoinGecko market_chart/range into the bar store.
+
+A long range is split into windows sized to the provider's granularity rules
+(one window never spans more than CoinGecko serves at the target resolution),
+the windows are fetched concurrently under a token-bucket rate limit, and
+each decoded window is written by a single writer as one bulk insert plus its
+checkpoint row in the same transaction. A rerun skips checkpointed windows,
+so an interrupted job resumes where it stopped.
+"""
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+import numpy as np
+
+from indicators import empty_bars, resample_bars
+from telemetry import track_upstream
+
+COINGECKO_API = "https://api.coingecko.com/api/v3"
+
+# Bar resolution -> (bucket seconds, window seconds). CoinGecko returns 5-minute
+# points for ranges up to 1 day, hourly up to 90 days and daily beyond that.
+MARKET_CHART_RESOLUTIONS = {
+    "5m": (300, 86400),
+    "1H": (3600, 90 * 86400),
+    "1D": (86400, 365 * 86400),
+}
+
+
+class RateLimiter:
+    """Async token bucket allowing `rate` acquisitions per `per` seconds"""
+
+    def __init__(self, rate: float, per: float = 60.0):
+        self.rate = rate
+        self.per = per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.per / self.rate)
+
+
+def plan_windows(start_ts: int, end_ts: int, window_seconds: int) -> List[Tuple[int, int]]:
+    """
+    [start, end) windows covering [start_ts, end_ts). Window starts sit on
+    epoch multiples of the window size, so reruns with a later end time plan
+    the same windows and can match them against earlier checkpoints.
+    """
+    first = start_ts // window_seconds * window_seconds
+    return [(lo, min(lo + window_seconds, end_ts)) for lo in range(first, end_ts, window_seconds)]
+
+
+def points_to_bars(points: np.ndarray, bucket_seconds: int) -> Dict[str, np.ndarray]:
+    """Aggregate [ms, price] samples into OHLC bars (market_chart has no per-bar volume)"""
+    if not len(points):
+        return empty_bars()
+    points = points[np.argsort(points[:, 0], kind="stable")]
+    price = points[:, 1]
+    samples = {
+        "ts": (points[:, 0] // 1000).astype(np.int64),
+        "open": price,
+        "high": price,
+        "low": price,
+        "close": price,
+        "volume": np.full(len(price), np.nan),
+    }
+    return resample_bars(samples, bucket_seconds)
+
+
+class MarketChartBackfill:
+    """One resumable backfill job: a CoinGecko coin into the bar store as `symbol`"""
+
+    def __init__(self, connect: Callable, coin_id: str, symbol: str, resolution: str = "1H",
+                 api_key: str = "", concurrency: int = 4, rate_per_minute: float = 30,
+                 max_retries: int = 5):
+        if resolution not in MARKET_CHART_RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        self.connect = connect
+        self.coin_id = coin_id
+        self.symbol = symbol
+        self.resolution = resolution
+        self.bucket_seconds, self.window_seconds = MARKET_CHART_RESOLUTIONS[resolution]
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate_per_minute)
+        self.max_retries = max_retries
+        self.job = f"coingecko:{coin_id}:{symbol}:{resolution}"
+        self.status = {
+            "job": self.job,
+            "state": "pending",
+            "windows_total": 0,
+            "windows_skipped": 0,
+            "windows_done": 0,
+            "rows": 0,
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+
+    def completed_windows(self) -> Dict[int, int]:
+        """Checkpointed window start -> end covered for this job"""
+        conn = self.connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT window_start, window_end FROM backfill_checkpoints WHERE job = ?", (self.job,))
+        done = dict(cursor.fetchall())
+        conn.close()
+        return done
+
+    async def _fetch_window(self, client: httpx.AsyncClient, start: int, end: int) -> np.ndarray:
+        """Fetch one window's [ms, price] points, retrying rate limits and server errors"""
+        params = {"vs_currency": "usd", "from": start, "to": end - 1}
+        if self.api_key:
+            params["x_cg_demo_api_key"] = self.api_key
+        url = f"{COINGECKO_API}/coins/{self.coin_id}/market_chart/range"
+        for attempt in range(self.max_retries):
+            await self.limiter.acquire()
+            try:
+                with track_upstream("coingecko", "market_chart_range"):
+                    response = await client.get(url, params=params)
+                    if response.status_code == 429 or response.status_code >= 500:
+                        response.raise_for_status()
+            except httpx.HTTPError as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                retry_after = e.response.headers.get("Retry-After") if isinstance(e, httpx.HTTPStatusError) else None
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt
+                print(f"CoinGecko window {start}-{end} failed ({e}); retrying in {delay}s")
+                await asyncio.sleep(delay)
+                continue
+            response.raise_for_status()
+            prices = json.loads(response.content).get("prices") or []
+            return np.asarray(prices, dtype=np.float64).reshape(-1, 2)
+        return np.empty((0, 2))
+
+    def _store(self, start: int, end: int, bars: Dict[str, np.ndarray]) -> int:
+        """Bulk-insert one window's bars and checkpoint it in the same transaction"""
+        rows = [
+            (self.symbol, self.resolution, ts, o, h, l, c, None if np.isnan(v) else v, "coingecko")
+            for ts, o, h, l, c, v in zip(bars["ts"].tolist(), bars["open"].tolist(), bars["high"].tolist(),
+                                         bars["low"].tolist(), bars["close"].tolist(), bars["volume"].tolist())
+        ]
+        conn = self.connect()
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO bars
+            (symbol, resolution, timestamp, open_price, high_price, low_price, close_price, volume, source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        cursor.execute("""
+            INSERT OR REPLACE INTO backfill_checkpoints (job, window_start, window_end, rows, completed_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (self.job, start, end, len(rows), int(time.time())))
+        conn.commit()
+        conn.close()
+        return len(rows)
+
+    async def run(self, start_ts: int, end_ts: int) -> Dict:
+        """Backfill [start_ts, end_ts), skipping windows already checkpointed"""
+        self.status.update(state="running", started_at=int(time.time()), error=None)
+        windows = plan_windows(start_ts, end_ts, self.window_seconds)
+        done = await asyncio.to_thread(self.completed_windows)
+        # The newest window is only partly covered until time moves past its end
+        pending = [(start, end) for start, end in windows if done.get(start, -1) < end]
+        self.status.update(windows_total=len(windows), windows_skipped=len(windows) - len(pending))
+
+        # Bounded hand-off so fetched-but-unwritten windows cannot pile up in memory
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(client: httpx.AsyncClient, start: int, end: int):
+            async with semaphore:
+                points = await self._fetch_window(client, start, end)
+            await queue.put((start, end, points_to_bars(points, self.bucket_seconds)))
+
+        async def write():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                start, end, bars = item
+                self.status["rows"] += await asyncio.to_thread(self._store, start, end, bars)
+                self.status["windows_done"] += 1
+
+        writer = asyncio.create_task(write())
+        try:
+            async with httpx.AsyncClient(timeout=30) as client:
+                tasks = [asyncio.create_task(fetch(client, start, end)) for start, end in pending]
+                fetched = asyncio.gather(*tasks)
+                try:
+                    # A failed write ends the job too, instead of leaving fetches blocked on the full queue
+                    await asyncio.wait({fetched, writer}, return_when=asyncio.FIRST_COMPLETED)
+                    if writer.done():
+                        writer.result()
+                    await fetched
+                finally:
+                    # On the first failure stop the remaining fetches while the client is still open
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(fetched, *tasks, return_exceptions=True)
+            await queue.put(None)
+            await writer
+            self.status["state"] = "completed"
+        except BaseException as e:
+            writer.cancel()
+            self.status.update(state="failed", error=str(e) or type(e).__name__)
+            raise
+        finally:
+            self.status["finished_at"] = int(time.time())
+        return self.status
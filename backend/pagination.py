@@ -0,0 +1,69 @@
+"""
+Keyset pagination for the time-ordered list and history endpoints.
+
+A page is the oldest `limit` rows after a cursor `after_ts` - the timestamp
+of the last row the client has seen - in ascending timestamp order, so every
+page is a range seek on the (symbol, timestamp) indexes instead of an OFFSET
+scan, and rows appended between requests never shift earlier pages. Rows
+sharing a timestamp are never split across pages (a page may run over
+`limit` to finish one); `next_after_ts` is None once the window is exhausted.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from timeutil import parse_ts
+
+MAX_PAGE_LIMIT = 10_000
+
+
+def parse_cursor(text: Optional[str]) -> Optional[int]:
+    """`after_ts` as epoch seconds: integer seconds, or an ISO timestamp as returned by the API"""
+    if text is None or not text.strip():
+        return None
+    text = text.strip()
+    if text.lstrip("-").isdigit():
+        return int(text)
+    return parse_ts(text)
+
+
+def after_bound(floor: Optional[int], after_ts: Optional[int]) -> Optional[int]:
+    """Exclusive lower timestamp bound: the window's or the cursor's, whichever is later"""
+    if after_ts is None:
+        return floor
+    if floor is None:
+        return after_ts
+    return max(floor, after_ts)
+
+
+def fetch_page(cursor, sql: str, params: tuple, limit: Optional[int]) -> Tuple[List[tuple], Optional[int]]:
+    """
+    Run an ascending-timestamp query (timestamp in the first column) for one page.
+    Returns the rows and the cursor of the next page.
+    """
+    if limit is None:
+        cursor.execute(sql, params)
+        return cursor.fetchall(), None
+    fetch = limit
+    while True:
+        cursor.execute(sql + " LIMIT ?", params + (fetch + 1,))
+        rows = cursor.fetchall()
+        if len(rows) <= fetch:
+            return rows, None
+        # Leave rows at the boundary timestamp to the next page
+        boundary = rows[fetch][0]
+        page = rows[:fetch]
+        while page and page[-1][0] == boundary:
+            page.pop()
+        if page:
+            return page, page[-1][0]
+        # A single timestamp holds more than `fetch` rows
+        fetch *= 2
+
+
+def page_bars(bars: Dict[str, np.ndarray], limit: Optional[int]) -> Tuple[Dict[str, np.ndarray], Optional[int]]:
+    """First `limit` bars (unique timestamps) and the cursor of the next page"""
+    if limit is None or len(bars["ts"]) <= limit:
+        return bars, None
+    page = {field: column[:limit] for field, column in bars.items()}
+    return page, int(page["ts"][-1])
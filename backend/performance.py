@@ -0,0 +1,135 @@
+"""
+Performance comparison between the stock and ETH on a common clock.
+
+SBET only trades during market hours while ETH trades around the clock, so
+the two series are aligned on the union of their timestamps with each side
+forward-filled from its last valid observation.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+def forward_fill(ts: np.ndarray, values: np.ndarray, clock: np.ndarray,
+                 max_age: Optional[int] = None, positive: bool = True) -> np.ndarray:
+    """
+    Sample `values` on `clock`, carrying the last valid (positive) value forward.
+    With `max_age`, values older than that many seconds are treated as missing.
+    With positive=False only non-finite values are missing, so zeros (e.g. holdings
+    after a full disposal) carry forward too.
+    """
+    valid = np.isfinite(values)
+    if positive:
+        valid &= values > 0
+    ts, values = ts[valid], values[valid]
+    out = np.full(len(clock), np.nan)
+    if not len(ts):
+        return out
+    idx = np.searchsorted(ts, clock, side="right") - 1
+    has_value = idx >= 0
+    if max_age is not None:
+        has_value &= clock - ts[np.maximum(idx, 0)] <= max_age
+    out[has_value] = values[idx[has_value]]
+    return out
+
+
+def align_series(ts_a: np.ndarray, a: np.ndarray, ts_b: np.ndarray, b: np.ndarray,
+                 start_ts: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Align two series on the union of their timestamps, starting once both have a value.
+
+    Observations before `start_ts` only seed the forward fill.
+    """
+    clock = np.union1d(ts_a, ts_b)
+    if start_ts is not None:
+        clock = clock[clock >= start_ts]
+    a_ff = forward_fill(ts_a, a, clock)
+    b_ff = forward_fill(ts_b, b, clock)
+    both = np.isfinite(a_ff) & np.isfinite(b_ff)
+    return clock[both], a_ff[both], b_ff[both]
+
+
+def rebase(x: np.ndarray, base: float = 100.0) -> np.ndarray:
+    """Rebase a price series so its first value equals `base`"""
+    if not len(x):
+        return x
+    return x / x[0] * base
+
+
+def drawdown_pct(x: np.ndarray) -> np.ndarray:
+    """Percentage drawdown from the running peak"""
+    if not len(x):
+        return x
+    return (x / np.maximum.accumulate(x) - 1.0) * 100.0
+
+
+def compare(ts_stock: np.ndarray, stock: np.ndarray, ts_eth: np.ndarray, eth: np.ndarray,
+            start_ts: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Rebased returns, drawdowns and relative performance of stock vs ETH"""
+    clock, stock_ff, eth_ff = align_series(ts_stock, stock, ts_eth, eth, start_ts)
+    stock_perf = rebase(stock_ff)
+    eth_perf = rebase(eth_ff)
+    return {
+        "ts": clock,
+        "stock_price": stock_ff,
+        "eth_price": eth_ff,
+        "stock_performance": stock_perf,
+        "eth_performance": eth_perf,
+        "stock_drawdown_pct": drawdown_pct(stock_ff),
+        "eth_drawdown_pct": drawdown_pct(eth_ff),
+        "relative_performance": stock_perf / eth_perf * 100.0 if len(clock) else clock.astype(np.float64),
+    }
+
+
+def summarize(result: Dict[str, np.ndarray]) -> Dict[str, Optional[float]]:
+    """Total returns, max drawdowns and outperformance over the whole range"""
+    if not len(result["ts"]):
+        return {
+            "stock_return_pct": None,
+            "eth_return_pct": None,
+            "stock_max_drawdown_pct": None,
+            "eth_max_drawdown_pct": None,
+            "outperformance_pct": None,
+        }
+    stock_return = float(result["stock_performance"][-1] - 100.0)
+    eth_return = float(result["eth_performance"][-1] - 100.0)
+    return {
+        "stock_return_pct": stock_return,
+        "eth_return_pct": eth_return,
+        "stock_max_drawdown_pct": float(result["stock_drawdown_pct"].min()),
+        "eth_max_drawdown_pct": float(result["eth_drawdown_pct"].min()),
+        "outperformance_pct": float(result["relative_performance"][-1] - 100.0),
+    }
+
+
+class RangeCache:
+    """Small thread-safe LRU cache for computed range results"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
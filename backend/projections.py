@@ -0,0 +1,80 @@
+"""
+mNAV scenario and Monte Carlo projections for a treasury company's share price.
+
+A scenario is (ETH price, mNAV multiple, new shares issued). Dilution models
+an ATM facility: new shares are sold at the scenario's multiple of NAV per
+share and, when `reinvest` is set, the proceeds buy ETH at the scenario price,
+so issuing above 1x NAV is accretive to ETH per share. Every function works
+on whole arrays: a grid is one broadcast over (price, multiple, dilution), and
+Monte Carlo paths are bootstrapped from historical log returns in chunks.
+"""
+from typing import Dict, Sequence
+
+import numpy as np
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Paths simulated per chunk, bounding the (paths x horizon) sample matrix
+MONTE_CARLO_CHUNK = 2000
+
+
+def scenario_grid(eth_holdings: float, shares_outstanding: float, eth_prices: np.ndarray,
+                  mnav_multiples: np.ndarray, new_shares: np.ndarray,
+                  reinvest: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Per-share outcomes for every (ETH price, mNAV, new shares) combination.
+    Returned arrays have shape (len(eth_prices), len(mnav_multiples), len(new_shares)).
+    """
+    price = np.asarray(eth_prices, dtype=np.float64)[:, None, None]
+    multiple = np.asarray(mnav_multiples, dtype=np.float64)[None, :, None]
+    issued = np.asarray(new_shares, dtype=np.float64)[None, None, :]
+
+    # New shares sell at `multiple` x NAV per share, so the proceeds buy
+    # issued * multiple * (holdings / shares) ETH whatever the ETH price
+    holdings = eth_holdings + issued * multiple * (eth_holdings / shares_outstanding) if reinvest else eth_holdings
+    shape = (price.shape[0], multiple.shape[1], issued.shape[2])
+    eth_per_share = np.broadcast_to(holdings / (shares_outstanding + issued), shape)
+
+    nav_after = eth_per_share * price
+    return {
+        "eth_per_share": eth_per_share,
+        "nav_per_share": nav_after,
+        "share_price": nav_after * multiple,
+    }
+
+
+def bootstrap_terminal_prices(log_returns: np.ndarray, start_price: float, horizon: int,
+                              paths: int, seed: int = 0) -> np.ndarray:
+    """Terminal prices of `paths` random walks of `horizon` steps resampled from `log_returns`"""
+    returns = np.asarray(log_returns, dtype=np.float64)
+    returns = returns[np.isfinite(returns)]
+    if not len(returns):
+        raise ValueError("No returns to sample")
+
+    rng = np.random.default_rng(seed)
+    terminal = np.empty(paths)
+    for lo in range(0, paths, MONTE_CARLO_CHUNK):
+        n = min(MONTE_CARLO_CHUNK, paths - lo)
+        draws = rng.integers(0, len(returns), size=(n, horizon))
+        terminal[lo:lo + n] = start_price * np.exp(returns[draws].sum(axis=1))
+    return terminal
+
+
+def percentile_table(values: np.ndarray, axis: int = 0,
+                     percentiles: Sequence[int] = PERCENTILES) -> Dict[str, np.ndarray]:
+    """Named percentiles (p5, p25, ...) of `values` along `axis`"""
+    table = np.percentile(values, percentiles, axis=axis)
+    return {f"p{q}": table[i] for i, q in enumerate(percentiles)}
+
+
+def monte_carlo(eth_holdings: float, shares_outstanding: float, log_returns: np.ndarray,
+                start_price: float, mnav_multiples: np.ndarray, new_shares: np.ndarray,
+                horizon: int, paths: int, seed: int = 0, reinvest: bool = True) -> Dict:
+    """ETH price and share price percentiles after `horizon` steps, per (mNAV, new shares)"""
+    terminal = bootstrap_terminal_prices(log_returns, start_price, horizon, paths, seed)
+    grid = scenario_grid(eth_holdings, shares_outstanding, terminal, mnav_multiples, new_shares, reinvest)
+    return {
+        "eth_price": percentile_table(terminal),
+        "share_price": percentile_table(grid["share_price"]),
+        "prob_eth_above_start": float(np.mean(terminal > start_price)),
+    }
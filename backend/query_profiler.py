@@ -0,0 +1,254 @@
+"""
+SQL query profiler.
+
+Statements run through a ProfiledConnection are fingerprinted (literals
+replaced by ?, whitespace collapsed) and aggregated per fingerprint: calls,
+total/max time and rows returned, broken down by the API route that issued
+them. Each new fingerprint is explained once with EXPLAIN QUERY PLAN so full
+table scans and temp B-tree sorts are flagged whatever the data volume, and
+queries slower than SLOW_QUERY_MS are logged as JSON lines with their plan.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import telemetry
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Optional file receiving one JSON line per slow query (always printed as well)
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+# "SCAN t" is a full table scan; "SCAN t USING [COVERING] INDEX i" walks an index instead
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """Statement shape with literals replaced by ? and whitespace collapsed"""
+    text = _SPACE.sub(" ", sql).strip()
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    return _IN_LIST.sub("(?+)", text)
+
+
+def explain(conn: sqlite3.Connection, sql: str, parameters=()) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines, run on a plain (unprofiled) cursor"""
+    try:
+        cursor = sqlite3.Cursor(conn)
+        return [row[3] for row in cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters)]
+    except sqlite3.Error as e:
+        print(f"Error explaining query: {e}")
+        return []
+
+
+def analyze_plan(plan: List[str]) -> Dict:
+    """Tables read by full scan and whether the plan sorts through a temp B-tree"""
+    full_scans = []
+    for detail in plan:
+        match = _FULL_SCAN.match(detail)
+        # The schema table is tiny and only read at startup
+        if match and not match.group(1).startswith("sqlite_"):
+            full_scans.append(match.group(1))
+    return {
+        "plan": plan,
+        "full_scans": full_scans,
+        "temp_btree": any("TEMP B-TREE" in detail for detail in plan),
+    }
+
+
+class QueryProfiler:
+    """Per-fingerprint query statistics, plans and slow-query log"""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, log_path: str = SLOW_QUERY_LOG):
+        self.slow_seconds = slow_ms / 1000
+        self.log_path = log_path
+        self._stats: Dict[str, Dict] = {}
+        self._plans: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, conn: Optional[sqlite3.Connection], fp: str, sql: str, parameters,
+               seconds: float, rows: int):
+        """Aggregate one finished query; explain new fingerprints and log slow ones"""
+        route = telemetry.current_route.get()
+        plan = self._plans.get(fp)
+        if plan is None and conn is not None and parameters is not None \
+                and sql.lstrip()[:6].upper().startswith(_EXPLAINABLE):
+            plan = analyze_plan(explain(conn, sql, parameters))
+            with self._lock:
+                self._plans[fp] = plan
+            if plan["full_scans"]:
+                print(f"Full table scan on {', '.join(plan['full_scans'])}: {fp}")
+
+        slow = seconds >= self.slow_seconds
+        with self._lock:
+            stats = self._stats.get(fp)
+            if stats is None:
+                stats = self._stats[fp] = {
+                    "calls": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+                    "rows": 0, "slow_calls": 0, "routes": {}
+                }
+            stats["calls"] += 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["rows"] += rows
+            stats["slow_calls"] += slow
+            stats["routes"][route] = stats["routes"].get(route, 0) + 1
+
+        if slow:
+            self._log_slow(fp, route, seconds, rows, plan)
+
+    def add_rows(self, fp: str, seconds: float, rows: int):
+        """Account for rows fetched after a query was already recorded"""
+        with self._lock:
+            stats = self._stats.get(fp)
+            if stats is not None:
+                stats["total_seconds"] += seconds
+                stats["rows"] += rows
+
+    def _log_slow(self, fp: str, route: str, seconds: float, rows: int, plan: Optional[Dict]):
+        entry = {
+            "ts": int(time.time()),
+            "route": route,
+            "duration_ms": round(seconds * 1000, 3),
+            "rows": rows,
+            "fingerprint": fp,
+        }
+        if plan is not None:
+            entry.update(plan)
+        line = json.dumps(entry)
+        print(f"Slow query: {line}")
+        if self.log_path:
+            try:
+                with open(self.log_path, "a") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                print(f"Error writing slow query log: {e}")
+
+    def report(self, limit: int = 50, full_scans_only: bool = False) -> List[Dict]:
+        """Fingerprints ordered by total time, with their plan flags"""
+        with self._lock:
+            items = [(fp, dict(stats, routes=dict(stats["routes"]))) for fp, stats in self._stats.items()]
+            plans = dict(self._plans)
+
+        report = []
+        for fp, stats in items:
+            plan = plans.get(fp, {"plan": [], "full_scans": [], "temp_btree": False})
+            if full_scans_only and not plan["full_scans"]:
+                continue
+            report.append({
+                "fingerprint": fp,
+                "calls": stats["calls"],
+                "total_ms": round(stats["total_seconds"] * 1000, 3),
+                "mean_ms": round(stats["total_seconds"] * 1000 / stats["calls"], 3),
+                "max_ms": round(stats["max_seconds"] * 1000, 3),
+                "rows": stats["rows"],
+                "slow_calls": stats["slow_calls"],
+                "routes": stats["routes"],
+                **plan,
+            })
+        report.sort(key=lambda item: item["total_ms"], reverse=True)
+        return report[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._plans.clear()
+
+
+PROFILER = QueryProfiler()
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """
+    sqlite3 cursor that times each statement from execute through its first fetch.
+
+    Statements without a result set are recorded as soon as they execute;
+    queries are recorded on their first fetch call (fetchall/fetchmany/fetchone),
+    or on the next execute if never fetched. Rows fetched afterwards are still
+    added to the fingerprint's totals.
+    """
+
+    _pending = None
+    _fingerprint = ""
+
+    def _finish(self):
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        sql, parameters, seconds, rows = pending
+        telemetry.SQL_QUERY_SECONDS.observe(seconds, statement=self._fingerprint)
+        telemetry.SQL_ROWS.inc(rows, statement=self._fingerprint)
+        PROFILER.record(self.connection, self._fingerprint, sql, parameters, seconds, rows)
+
+    def _start(self, sql: str, parameters, seconds: float):
+        self._fingerprint = fingerprint(sql)
+        self._pending = [sql, parameters, seconds, 0]
+        if self.description is None:
+            self._finish()
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._start(sql, parameters, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._start(sql, None, time.perf_counter() - start)
+        return self
+
+    def _fetched(self, start: float, rows: int):
+        seconds = time.perf_counter() - start
+        pending = self._pending
+        if pending is not None:
+            pending[2] += seconds
+            pending[3] += rows
+            self._finish()
+        else:
+            telemetry.SQL_ROWS.inc(rows, statement=self._fingerprint)
+            PROFILER.add_rows(self._fingerprint, seconds, rows)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(size if size is not None else self.arraysize)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors are ProfiledCursors"""
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
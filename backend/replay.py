@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Deterministic replay of recorded or synthetic prices through the collector.
+
+Drives the real ingest pipeline - DataCollector.collect_and_store_data, the
+write-behind queue, the concentration refresh and the shared cache versions -
+with stubbed upstreams that answer from price series instead of CoinGecko,
+yfinance and Alchemy. A simulated clock (timeutil.set_clock) steps through the
+series one collector interval at a time, `--speedup` times faster than real
+time (0 = as fast as possible), and every API route sees the same simulated
+"now". Chart routes can be probed in-process along the way to see how the
+caches behave while data keeps arriving. Each run uses a fresh working
+directory; results are written as JSON:
+
+    python replay.py --speedup 1000
+    python replay.py --synthetic-days 90 --speedup 0 --probe-every 12 --output replay_results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backfill import sample_asof
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BUNDLED_CSVS = {"ETHUSD": "ETHUSD_1M_FROM_PERPLEXITY.csv", "SBET": "SBET_1M_FROM_PERPLEXITY.csv"}
+# Synthetic series end here (market-local time), so runs with the same seed are identical
+SYNTHETIC_END = "2025-07-01T16:00:00"
+
+# Routes probed while replaying, with the parameters a chart would send
+PROBE_ROUTES = {
+    "/api/current-metrics": {},
+    "/api/price-history": {"timeframe": "1M"},
+    "/api/nav-multiplier": {"timeframe": "1M"},
+    "/api/eth-concentration": {"timeframe": "30D"},
+    "/api/performance-comparison": {"period": "1M"},
+    "/api/indicators": {"timeframe": "1M"},
+    "/api/treasury-dashboard": {},
+}
+
+Series = Tuple[np.ndarray, np.ndarray]
+
+
+class ReplayClock:
+    """Simulated epoch seconds that only move when the replay steps"""
+
+    def __init__(self, start: float):
+        self.ts = float(start)
+
+    def __call__(self) -> float:
+        return self.ts
+
+    def set(self, ts: float):
+        self.ts = float(ts)
+
+
+class ReplayUpstream:
+    """The collector's upstream calls, answered from price series as of the replay clock"""
+
+    def __init__(self, clock: ReplayClock, prices: Dict[str, Series], assets: Dict[str, str],
+                 holdings: Dict[str, Series], shares: Dict[str, float], latency: float = 0.0):
+        self.clock = clock
+        # Price series by symbol; CoinGecko ids and treasury wallets map onto them
+        self.prices = prices
+        self.assets = assets
+        self.holdings = holdings
+        self.shares = shares
+        self.latency = latency
+        self.calls = 0
+
+    async def _call(self):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _asof(self, series: Optional[Series], ts: float) -> float:
+        if series is None:
+            return 0.0
+        value = sample_asof(series, np.array([ts]))[0]
+        return 0.0 if np.isnan(value) else float(value)
+
+    async def get_asset_prices(self, coingecko_ids: List[str]) -> Dict[str, float]:
+        await self._call()
+        prices = {asset_id: self._asof(self.prices.get(self.assets.get(asset_id)), self.clock())
+                  for asset_id in coingecko_ids}
+        return {asset_id: price for asset_id, price in prices.items() if price > 0}
+
+    async def get_stock_data(self, ticker: str) -> Dict:
+        await self._call()
+        series = self.prices.get(ticker)
+        price = self._asof(series, self.clock())
+        previous = self._asof(series, self.clock() - 86400)
+        shares = self.shares.get(ticker, 0)
+        return {
+            "price": price,
+            "market_cap": int(price * shares),
+            "shares_outstanding": shares,
+            "daily_change": price / previous - 1 if previous > 0 else 0.0,
+        }
+
+    async def get_treasury_balance(self, wallet_address: Optional[str] = None) -> float:
+        await self._call()
+        return self._asof(self.holdings.get(wallet_address), self.clock())
+
+    def install(self, collector):
+        """Route a DataCollector's upstream calls through this stub"""
+        collector.get_asset_prices = self.get_asset_prices
+        collector.get_stock_data = self.get_stock_data
+        collector.get_treasury_balance = self.get_treasury_balance
+
+
+def prepare_csvs(workdir: str, synthetic_days: int, seed: int) -> Dict[str, str]:
+    """Bundled CSVs, or random-walk CSVs of `synthetic_days` in the same format"""
+    if not synthetic_days:
+        return {symbol: os.path.join(BACKEND_DIR, name) for symbol, name in BUNDLED_CSVS.items()}
+
+    from benchmark import BAR_SECONDS, START_PRICES, write_synthetic_csv
+    rng = np.random.default_rng(seed)
+    paths = {}
+    for symbol in BUNDLED_CSVS:
+        paths[symbol] = os.path.join(workdir, f"{symbol}_synthetic.csv")
+        write_synthetic_csv(paths[symbol], synthetic_days * 86400 // BAR_SECONDS, START_PRICES[symbol],
+                            np.datetime64(SYNTHETIC_END, "s"), rng)
+    return paths
+
+
+def percentiles(timings: List[float]) -> Dict:
+    if not timings:
+        return {}
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p99_ms": round(float(np.percentile(timings, 99)), 3),
+        "max_ms": round(max(timings), 3),
+    }
+
+
+def cache_stats(caches: Dict) -> Dict:
+    stats = {}
+    for name, cache in caches.items():
+        lookups = cache.hits + cache.misses
+        stats[name] = {
+            "hits": cache.hits,
+            "misses": cache.misses,
+            "hit_rate": round(cache.hits / lookups, 3) if lookups else None,
+        }
+        if hasattr(cache, "shared_hits"):
+            stats[name]["shared_hits"] = cache.shared_hits
+    return stats
+
+
+async def replay(main, csv_paths: Dict[str, str], speedup: float, interval: int, max_steps: Optional[int],
+                 probe_every: int, latency: float) -> Dict:
+    import httpx
+    from timeutil import set_clock
+
+    for symbol, path in csv_paths.items():
+        await main.data_collector.import_bars_csv(symbol, path)
+    await main.add_sample_eth_purchases()
+
+    companies = main.get_companies()
+    prices = {}
+    holdings = {}
+    for company in companies:
+        await main.rebuild_holdings_ledger(company.symbol)
+        for symbol in (company.symbol, company.asset_symbol):
+            bars = main.load_bar_arrays(symbol)
+            if len(bars["ts"]):
+                prices[symbol] = (bars["ts"], bars["close"])
+        conn = main.get_connection()
+        rows = conn.execute("SELECT timestamp, total_quantity FROM holdings_ledger WHERE symbol = ? "
+                            "ORDER BY timestamp, seq", (company.symbol,)).fetchall()
+        conn.close()
+        if rows:
+            holdings[company.treasury_wallet] = tuple(np.asarray(column, dtype=np.float64) for column in zip(*rows))
+
+    # Replay the span every company has both prices for
+    spans = [prices[s][0] for c in companies for s in (c.symbol, c.asset_symbol) if s in prices]
+    if not spans:
+        raise RuntimeError("No price series to replay")
+    start = -(-max(int(ts[0]) for ts in spans) // interval) * interval
+    end = min(int(ts[-1]) for ts in spans)
+    steps = list(range(start, end + 1, interval))[:max_steps]
+
+    clock = ReplayClock(start)
+    upstream = ReplayUpstream(
+        clock, prices, {c.coingecko_id: c.asset_symbol for c in companies}, holdings,
+        {c.symbol: c.diluted_shares or 0 for c in companies}, latency)
+    upstream.install(main.data_collector)
+    set_clock(clock)
+    main.write_queue.start()
+
+    print(f"Replaying {len(steps)} collector ticks ({len(companies)} companies, {interval}s apart) "
+          f"at {speedup or 'max'}x")
+    collect_ms = []
+    probes = {path: [] for path in PROBE_ROUTES}
+    statuses = {}
+    late = 0
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            wall_start = time.perf_counter()
+            for i, ts in enumerate(steps):
+                clock.set(ts)
+                tick = time.perf_counter()
+                await main.data_collector.collect_and_store_data()
+                collect_ms.append((time.perf_counter() - tick) * 1000)
+
+                if probe_every and i % probe_every == 0:
+                    for path, params in PROBE_ROUTES.items():
+                        request = time.perf_counter()
+                        response = await client.get(path, params=params)
+                        probes[path].append((time.perf_counter() - request) * 1000)
+                        statuses[path] = response.status_code
+
+                if speedup > 0:
+                    # Hold the next tick until its compressed wall-clock time
+                    delay = (ts + interval - start) / speedup - (time.perf_counter() - wall_start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    else:
+                        late += 1
+            await main.write_queue.flush()
+            wall = time.perf_counter() - wall_start
+    finally:
+        set_clock(None)
+        await main.write_queue.stop()
+
+    conn = main.get_connection()
+    snapshots = conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0]
+    concentration = conn.execute("SELECT COUNT(*) FROM eth_concentration_analysis").fetchone()[0]
+    conn.close()
+
+    simulated = len(steps) * interval
+    return {
+        "steps": len(steps),
+        "companies": len(companies),
+        "interval_seconds": interval,
+        "simulated_start": start,
+        "simulated_seconds": simulated,
+        "wall_seconds": round(wall, 3),
+        "target_speedup": speedup,
+        "achieved_speedup": round(simulated / wall, 1) if wall > 0 else None,
+        "late_ticks": late,
+        "snapshot_rows": snapshots,
+        "concentration_rows": concentration,
+        "snapshots_per_sec": round(len(steps) * len(companies) / wall, 1) if wall > 0 else None,
+        "upstream_calls": upstream.calls,
+        "collect": percentiles(collect_ms),
+        "probes": {path: dict(percentiles(timings), status=statuses.get(path))
+                   for path, timings in probes.items() if timings},
+        "caches": cache_stats({
+            "indicator_bars": main.indicator_cache,
+            "indicator_responses": main.indicator_response_cache,
+            "performance": main.performance_cache,
+            "projections": main.projection_cache,
+            "history_responses": main.history_response_cache,
+        }),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Replay price data through the collector at a speed-up")
+    parser.add_argument("--speedup", type=float, default=1000.0, help="Simulated seconds per wall second (0 = max)")
+    parser.add_argument("--interval", type=int, default=None, help="Collector interval in simulated seconds")
+    parser.add_argument("--synthetic-days", type=int, default=0, help="Replay random-walk data instead of the CSVs")
+    parser.add_argument("--max-steps", type=int, default=None, help="Stop after this many collector ticks")
+    parser.add_argument("--probe-every", type=int, default=0, help="Probe the chart routes every N ticks (0 = off)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated latency of each upstream call")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write the results JSON here")
+    parser.add_argument("--keep", action="store_true", help="Keep the working directory")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix="replay_")
+    csv_paths = prepare_csvs(workdir, args.synthetic_days, args.seed)
+    os.chdir(workdir)
+    sys.path.insert(0, BACKEND_DIR)
+
+    import main
+    main.init_database()
+    result = asyncio.run(replay(main, csv_paths, args.speedup, args.interval or main.COLLECT_INTERVAL_SECONDS,
+                                args.max_steps, args.probe_every, args.latency_ms / 1000))
+    main.shared_store.close()
+    main.analytics_pool.shutdown()
+    main.storage.close()
+    result["workdir"] = workdir
+    print(json.dumps(result, indent=2))
+    if output:
+        with open(output, "w") as f:
+            json.dump(result, f, indent=2)
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main_cli()
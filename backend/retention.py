@@ -0,0 +1,208 @@
+"""
+Retention tiers for the per-company snapshot and concentration series.
+
+A series keeps every row for `raw_days`, then one row per symbol-hour until
+`hourly_days`, then one per symbol-day; months older than `archive_days` are
+moved out of SQLite into gzip CSV files <root>/<table>/<SYMBOL>/<YYYY-MM>.csv.gz
+(one per table, so metrics rows travel with their price_history pairs).
+Snapshots are point observations, so a rollup keeps the last row of each
+bucket - what an as-of read at the end of the bucket sees - rather than an
+average. Each (table, symbol, tier) task records how far it has got in
+`retention_state`, and work is cut into day (thinning) or month (archive)
+chunks, so a pass only touches rows that aged into a tier since the last one
+and each chunk is a short transaction.
+
+Bar series with no rollup of their own (minute bars compacted from ticks;
+coarser history comes from bulk-loaded bars) only have the raw tier: whole
+months past `raw_days` are deleted.
+"""
+import csv
+import gzip
+import io
+import os
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from bar_archive import month_key
+
+DAY = 86400
+
+# Series tables under retention, and the tables whose rows pair with theirs on (symbol, timestamp)
+SERIES_TABLES = {
+    "price_history": ["metrics"],
+    "eth_concentration_analysis": [],
+}
+
+CREATE_RETENTION_STATE = """
+    CREATE TABLE IF NOT EXISTS retention_state (
+        task TEXT PRIMARY KEY,
+        done_until INTEGER NOT NULL
+    ) WITHOUT ROWID
+"""
+
+SET_WATERMARK = "INSERT OR REPLACE INTO retention_state (task, done_until) VALUES (?, ?)"
+
+# Thinning tiers: (name, bucket seconds)
+HOURLY = ("1h", 3600)
+DAILY = ("1d", DAY)
+ARCHIVE = "archive"
+
+
+class RetentionPolicy:
+    """Ages in days at which a table's rows are thinned to hourly, to daily, and archived (0 = never)"""
+
+    def __init__(self, raw_days: int, hourly_days: int = 0, archive_days: int = 0):
+        self.raw_days = raw_days
+        self.hourly_days = hourly_days
+        self.archive_days = archive_days
+
+    def tiers(self) -> List[tuple]:
+        """(name, bucket seconds, age in days) of each enabled thinning tier, oldest data first"""
+        tiers = []
+        if self.hourly_days:
+            tiers.append(DAILY + (self.hourly_days,))
+        if self.raw_days:
+            tiers.append(HOURLY + (self.raw_days,))
+        return tiers
+
+    def raw_floor(self, now: int) -> int:
+        """Start of the oldest month kept of a series that is only kept raw"""
+        return month_start(now - self.raw_days * DAY)
+
+    def archive_floor(self, now: int) -> int:
+        """Start of the oldest month kept in SQLite (0 when nothing is archived)"""
+        if not self.archive_days:
+            return 0
+        return month_start(now - self.archive_days * DAY)
+
+
+class Chunk(NamedTuple):
+    task: str
+    start: int
+    end: int
+    # Rows are thinned to one per bucket; 0 moves the chunk to the archive
+    bucket: int
+
+
+def month_start(ts: int) -> int:
+    moment = datetime.fromtimestamp(int(ts), timezone.utc)
+    return int(datetime(moment.year, moment.month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def next_month(ts: int) -> int:
+    return month_start(month_start(ts) + 32 * DAY)
+
+
+def task_name(table: str, symbol: str, tier: str) -> str:
+    return f"{table}:{symbol}:{tier}"
+
+
+def pending_chunks(policy: RetentionPolicy, table: str, symbol: str, first_ts: Optional[int],
+                   done: Dict[str, int], now: int) -> List[Chunk]:
+    """Chunks of a symbol's rows that aged into a tier since the last pass, archive first"""
+    if first_ts is None:
+        return []
+    chunks = []
+    floor = 0
+    if policy.archive_days:
+        task = task_name(table, symbol, ARCHIVE)
+        cutoff = policy.archive_floor(now)
+        start = done.get(task, month_start(first_ts))
+        while start < cutoff:
+            end = next_month(start)
+            chunks.append(Chunk(task, start, end, 0))
+            start = end
+        floor = cutoff
+    for name, bucket, days in policy.tiers():
+        task = task_name(table, symbol, name)
+        cutoff = (now - days * DAY) // DAY * DAY
+        start = max(done.get(task, first_ts // DAY * DAY), floor)
+        for day in range(start, cutoff, DAY):
+            chunks.append(Chunk(task, day, day + DAY, bucket))
+        # Rows before this cutoff are the older tier's
+        floor = max(floor, cutoff)
+    return chunks
+
+
+def thin_statements(table: str, symbol: str, chunk: Chunk) -> List[tuple]:
+    """Keep the last row per bucket of [start, end) and advance the task's watermark"""
+    params = [(symbol, chunk.start, chunk.end, chunk.bucket)]
+    in_range = "symbol = ?1 AND timestamp >= ?2 AND timestamp < ?3"
+    # A row goes when a later row of the same symbol shares its bucket
+    statements = [(f"""
+        DELETE FROM {table} WHERE {in_range} AND EXISTS (
+            SELECT 1 FROM {table} AS later
+            WHERE later.symbol = ?1 AND later.timestamp > {table}.timestamp AND later.timestamp < ?3
+              AND later.timestamp / ?4 = {table}.timestamp / ?4)
+    """, params)]
+    # Then their paired rows
+    for follower in SERIES_TABLES[table]:
+        statements.append((f"""
+            DELETE FROM {follower} WHERE {in_range}
+              AND timestamp NOT IN (SELECT timestamp FROM {table} WHERE {in_range})
+        """, [params[0][:3]]))
+    return statements + [(SET_WATERMARK, [(chunk.task, chunk.end)])]
+
+
+def expire_bars_statements(symbol: str, resolution: str, before: int) -> List[tuple]:
+    """Delete a symbol's bars of one resolution older than `before`"""
+    return [("DELETE FROM bars WHERE symbol = ? AND resolution = ? AND timestamp < ?",
+             [(symbol, resolution, before)])]
+
+
+def archive_path(root: str, table: str, symbol: str, start: int) -> str:
+    return os.path.join(root, table, symbol, f"{month_key(start)}.csv.gz")
+
+
+def write_archive(connect: Callable, root: str, table: str, symbol: str, chunk: Chunk) -> int:
+    """
+    Export a month of rows (the table and its paired followers) to gzip CSV.
+    Files are rewritten whole, so re-running an interrupted chunk is harmless.
+    Returns the number of rows written.
+    """
+    written = 0
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        for t in [table] + SERIES_TABLES[table]:
+            cursor.execute(f"SELECT * FROM {t} WHERE symbol = ? AND timestamp >= ? AND timestamp < ? "
+                           f"ORDER BY timestamp", (symbol, chunk.start, chunk.end))
+            rows = cursor.fetchall()
+            if not rows:
+                continue
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow([column[0] for column in cursor.description])
+            writer.writerows(rows)
+            path = archive_path(root, t, symbol, chunk.start)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path + ".tmp", "wt", newline="") as f:
+                f.write(buffer.getvalue())
+            os.replace(path + ".tmp", path)
+            written += len(rows)
+    finally:
+        conn.close()
+    return written
+
+
+def archive_statements(table: str, symbol: str, chunk: Chunk) -> List[tuple]:
+    """Delete an exported month from SQLite and advance the archive watermark"""
+    params = [(symbol, chunk.start, chunk.end)]
+    statements = [(f"DELETE FROM {t} WHERE symbol = ? AND timestamp >= ? AND timestamp < ?", params)
+                  for t in SERIES_TABLES[table] + [table]]
+    return statements + [(SET_WATERMARK, [(chunk.task, chunk.end)])]
+
+
+def rewind_statement(table: str, symbol: str, from_ts: int) -> tuple:
+    """Re-thin a symbol's rows from `from_ts` on the next pass (after they were rewritten)"""
+    day = from_ts // DAY * DAY
+    return (
+        "UPDATE retention_state SET done_until = ? WHERE task IN (?, ?) AND done_until > ?",
+        [(day, task_name(table, symbol, HOURLY[0]), task_name(table, symbol, DAILY[0]), day)],
+    )
+
+
+def load_watermarks(cursor) -> Dict[str, int]:
+    cursor.execute("SELECT task, done_until FROM retention_state")
+    return dict(cursor.fetchall())
+
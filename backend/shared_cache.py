@@ -0,0 +1,152 @@
+"""
+Cache tier shared by every API worker process.
+
+Entries live in a small SQLite file next to the database, so a response
+computed by one gunicorn worker is served by the others and survives
+restarts. Keys embed data versions: writers bump a named version (for
+example `bars:ETHUSD`) after their rows are committed, which moves readers
+on to new keys instead of deleting anything. Entries for old versions are
+never read again and age out with the oldest-first trim. Each process keeps
+a small in-memory LRU in front of the file, which is safe for the same
+reason: a versioned key never changes meaning.
+"""
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Hashable, Optional, Tuple
+
+from performance import RangeCache
+
+
+class SharedStore:
+    """The cache file: versioned entries plus the version counters writers bump"""
+
+    def __init__(self, path: str, max_entries: int = 2000):
+        self.path = path
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    stored_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_stored ON cache_entries(stored_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_versions (
+                    name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+            self._conn = conn
+        return self._conn
+
+    def versions(self, *names: str) -> Tuple[int, ...]:
+        """Current version of each name (0 until first bumped)"""
+        if not names:
+            return ()
+        with self._lock:
+            conn = self._connection()
+            placeholders = ",".join("?" * len(names))
+            found = dict(conn.execute(
+                f"SELECT name, version FROM cache_versions WHERE name IN ({placeholders})", names))
+        return tuple(found.get(name, 0) for name in names)
+
+    def bump(self, *names: str):
+        """Advance versions after a write is committed, so cached results built on older data are skipped"""
+        if not names:
+            return
+        # Counters start from the clock so a deleted cache file never reuses an old key
+        first = int(time.time() * 1000)
+        with self._lock:
+            self._connection().executemany("""
+                INSERT INTO cache_versions (name, version) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET version = version + 1
+            """, [(name, first) for name in set(names)])
+
+    def get(self, namespace: str, key: str):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+        return pickle.loads(row[0]) if row is not None else None
+
+    def put(self, namespace: str, key: str, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            conn = self._connection()
+            conn.execute("INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?)",
+                         (namespace, key, blob, time.time()))
+            self._writes += 1
+            # Trim now and then rather than counting rows on every write
+            if self._writes % 50 == 0:
+                conn.execute("""
+                    DELETE FROM cache_entries WHERE stored_at < (
+                        SELECT stored_at FROM cache_entries ORDER BY stored_at DESC LIMIT 1 OFFSET ?)
+                """, (self.max_entries,))
+
+    def clear(self, namespace: Optional[str] = None):
+        with self._lock:
+            if namespace is None:
+                self._connection().execute("DELETE FROM cache_entries")
+            else:
+                self._connection().execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class SharedCache:
+    """One namespace of a SharedStore with an in-process LRU in front (same interface as RangeCache)"""
+
+    def __init__(self, store: SharedStore, namespace: str, local_entries: int = 64):
+        self.store = store
+        self.namespace = namespace
+        self._local = RangeCache(local_entries)
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+
+    def get(self, key: Hashable):
+        value = self._local.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        try:
+            value = self.store.get(self.namespace, repr(key))
+        except (sqlite3.Error, pickle.UnpicklingError) as e:
+            # The shared tier is an optimization; fall back to computing
+            print(f"Shared cache read failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.shared_hits += 1
+        self._local.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value):
+        self._local.put(key, value)
+        try:
+            self.store.put(self.namespace, repr(key), value)
+        except sqlite3.Error as e:
+            print(f"Shared cache write failed: {e}")
+
+    def clear(self):
+        self._local.clear()
+        self.store.clear(self.namespace)
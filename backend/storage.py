@@ -0,0 +1,520 @@
+"""
+Storage backends behind get_connection().
+
+The app speaks DB-API in the SQLite dialect: cursors, `?` placeholders,
+executemany, commit, INSERT OR REPLACE / INSERT OR IGNORE. SQLiteStorage is
+exactly that. PostgresStorage serves the same interface from an asyncpg pool,
+so replicas and gunicorn workers share one database:
+
+- The pool lives on a private event loop in its own thread. Each DB-API call
+  blocks on that loop, so request handlers, to_thread workers and the
+  write-behind writer all work unchanged.
+- Statements are translated once per shape: `?`/`?N` become `$N`, and
+  INSERT OR REPLACE/IGNORE become ON CONFLICT on the table's primary key.
+- A multi-row executemany of a plain INSERT is a bulk load. It goes through
+  COPY into a temporary table and is merged with one INSERT ... SELECT.
+- Time-series tables are hypertables when TimescaleDB is available, and
+  monthly range partitions otherwise. Partitions are created on demand
+  before rows land in them.
+"""
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import telemetry
+from query_profiler import PROFILER, fingerprint
+
+# Primary (or unique) keys used to turn INSERT OR REPLACE into ON CONFLICT ... DO UPDATE
+PRIMARY_KEYS = {
+    "companies": ("symbol",),
+    "bars": ("symbol", "resolution", "timestamp"),
+    "price_history": ("symbol", "timestamp"),
+    "metrics": ("symbol", "timestamp"),
+    "treasury_transactions": ("id",),
+    "eth_purchase_transactions": ("id",),
+    "eth_concentration_analysis": ("symbol", "timestamp"),
+    "holdings_ledger": ("symbol", "timestamp", "seq"),
+    "backfill_checkpoints": ("job", "window_start"),
+    "retention_state": ("task",),
+}
+
+# Tables partitioned (or chunked) on their epoch-seconds `timestamp` column
+TIME_SERIES_TABLES = ["bars", "price_history", "metrics", "eth_concentration_analysis"]
+
+# Hypertable chunk size in seconds (TimescaleDB)
+CHUNK_SECONDS = 30 * 86400
+
+# executemany of at least this many rows is loaded through COPY
+COPY_MIN_ROWS = 500
+
+POSTGRES_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS companies (
+        symbol TEXT PRIMARY KEY,
+        name TEXT,
+        asset TEXT,
+        asset_symbol TEXT,
+        coingecko_id TEXT,
+        treasury_wallet TEXT,
+        diluted_shares BIGINT,
+        active INTEGER DEFAULT 1
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS bars (
+        symbol TEXT NOT NULL,
+        resolution TEXT NOT NULL,
+        timestamp BIGINT NOT NULL,
+        open_price DOUBLE PRECISION,
+        high_price DOUBLE PRECISION,
+        low_price DOUBLE PRECISION,
+        close_price DOUBLE PRECISION,
+        volume DOUBLE PRECISION,
+        source TEXT,
+        PRIMARY KEY (symbol, resolution, timestamp)
+    ) {partitioning}
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS price_history (
+        id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+        symbol TEXT,
+        timestamp BIGINT NOT NULL DEFAULT EXTRACT(EPOCH FROM now())::BIGINT,
+        eth_price DOUBLE PRECISION,
+        stock_price DOUBLE PRECISION,
+        market_cap DOUBLE PRECISION,
+        eth_holdings DOUBLE PRECISION,
+        outstanding_shares DOUBLE PRECISION,
+        source TEXT DEFAULT 'live',
+        PRIMARY KEY (id, timestamp)
+    ) {partitioning}
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS metrics (
+        id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+        symbol TEXT,
+        timestamp BIGINT NOT NULL DEFAULT EXTRACT(EPOCH FROM now())::BIGINT,
+        nav_multiplier DOUBLE PRECISION,
+        eth_per_share DOUBLE PRECISION,
+        nav_premium_pct DOUBLE PRECISION,
+        treasury_value_usd DOUBLE PRECISION,
+        source TEXT DEFAULT 'live',
+        PRIMARY KEY (id, timestamp)
+    ) {partitioning}
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS treasury_transactions (
+        id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        symbol TEXT,
+        timestamp BIGINT,
+        transaction_hash TEXT,
+        block_number BIGINT,
+        value_eth DOUBLE PRECISION,
+        balance_after DOUBLE PRECISION
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS eth_purchase_transactions (
+        id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        symbol TEXT,
+        timestamp BIGINT,
+        transaction_hash TEXT,
+        eth_quantity DOUBLE PRECISION,
+        eth_price_usd DOUBLE PRECISION,
+        total_cost_usd DOUBLE PRECISION,
+        shares_outstanding DOUBLE PRECISION,
+        pre_purchase_eth_holdings DOUBLE PRECISION,
+        post_purchase_eth_holdings DOUBLE PRECISION,
+        concentration_change_pct DOUBLE PRECISION,
+        notes TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS eth_concentration_analysis (
+        symbol TEXT NOT NULL,
+        timestamp BIGINT NOT NULL,
+        total_eth_holdings DOUBLE PRECISION,
+        market_cap_usd DOUBLE PRECISION,
+        eth_concentration_pct DOUBLE PRECISION,
+        treasury_value_usd DOUBLE PRECISION,
+        shares_outstanding BIGINT,
+        eth_per_share DOUBLE PRECISION,
+        nav_multiplier DOUBLE PRECISION,
+        PRIMARY KEY (symbol, timestamp)
+    ) {partitioning}
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS holdings_ledger (
+        symbol TEXT NOT NULL,
+        timestamp BIGINT NOT NULL,
+        seq INTEGER NOT NULL,
+        quantity DOUBLE PRECISION,
+        price_usd DOUBLE PRECISION,
+        total_quantity DOUBLE PRECISION,
+        average_cost_usd DOUBLE PRECISION,
+        fifo_cost_usd DOUBLE PRECISION,
+        realized_pnl_average_usd DOUBLE PRECISION,
+        realized_pnl_fifo_usd DOUBLE PRECISION,
+        PRIMARY KEY (symbol, timestamp, seq)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+        job TEXT NOT NULL,
+        window_start BIGINT NOT NULL,
+        window_end BIGINT NOT NULL,
+        rows BIGINT,
+        completed_at BIGINT,
+        PRIMARY KEY (job, window_start)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS retention_state (
+        task TEXT PRIMARY KEY,
+        done_until BIGINT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS series_changes (
+        seq BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        series TEXT NOT NULL,
+        from_ts BIGINT NOT NULL
+    )
+    """,
+]
+
+_INSERT = re.compile(r"^\s*INSERT\s+(?:OR\s+(REPLACE|IGNORE)\s+)?INTO\s+(\w+)\s*\(([^)]*)\)", re.I)
+_PLAIN_VALUES = re.compile(r"VALUES\s*\(\s*\?(?:\s*,\s*\?)*\s*\)\s*$", re.I)
+_PLACEHOLDER = re.compile(r"\?(\d*)")
+_STRING = re.compile(r"('(?:[^']|'')*')")
+_READS = ("SELECT", "WITH")
+
+
+def month_bounds(ts: int) -> Tuple[int, int]:
+    """[start, end) epoch seconds of the UTC month containing `ts`"""
+    moment = datetime.fromtimestamp(int(ts), timezone.utc)
+    start = datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+    end = datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1, tzinfo=timezone.utc)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def insert_target(sql: str) -> Optional[Tuple[str, Optional[str], List[str]]]:
+    """(table, OR-conflict verb, columns) of an INSERT statement, None for anything else"""
+    match = _INSERT.match(sql)
+    if match is None:
+        return None
+    verb, table, columns = match.groups()
+    return table, verb.upper() if verb else None, [c.strip() for c in columns.split(",")]
+
+
+def conflict_clause(table: str, verb: Optional[str], columns: List[str]) -> str:
+    if verb == "IGNORE":
+        return " ON CONFLICT DO NOTHING"
+    if verb == "REPLACE":
+        keys = PRIMARY_KEYS[table]
+        updates = [f"{c} = EXCLUDED.{c}" for c in columns if c not in keys]
+        action = f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+        return f" ON CONFLICT ({', '.join(keys)}) {action}"
+    return ""
+
+
+@lru_cache(maxsize=1024)
+def translate(sql: str) -> str:
+    """SQLite-dialect statement as PostgreSQL: $N placeholders and ON CONFLICT upserts"""
+    # Placeholders never appear inside string literals; number the rest in order
+    counter = iter(range(1, 10_000))
+    parts = _STRING.split(sql)
+    for i in range(0, len(parts), 2):
+        parts[i] = _PLACEHOLDER.sub(lambda m: f"${m.group(1) or next(counter)}", parts[i])
+    text = "".join(parts)
+
+    target = insert_target(sql)
+    if target is not None and target[1]:
+        table, verb, columns = target
+        text = re.sub(r"\bINSERT\s+OR\s+\w+\s+INTO\b", "INSERT INTO", text, count=1, flags=re.I)
+        text = text.rstrip().rstrip(";") + conflict_clause(table, verb, columns)
+    return text
+
+
+class SQLiteStorage:
+    """The bundled single-file database"""
+
+    dialect = "sqlite"
+
+    def __init__(self, path: str, factory=sqlite3.Connection):
+        self.path = path
+        self.factory = factory
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, factory=self.factory)
+
+    def reclaim_space(self, pages: int) -> int:
+        """Return up to `pages` free pages to the filesystem; returns how many are still free"""
+        conn = self.connect()
+        try:
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            conn.commit()
+            return conn.execute("PRAGMA freelist_count").fetchone()[0]
+        finally:
+            conn.close()
+
+    def close(self):
+        pass
+
+
+class PostgresStorage:
+    """PostgreSQL (optionally TimescaleDB) through an asyncpg pool, behind a blocking DB-API facade"""
+
+    dialect = "postgres"
+
+    def __init__(self, dsn: str, min_size: int = 2, max_size: int = 10):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timescale = False
+        self._pool = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._partitioned = False
+        self._partitions = set()
+
+    def run(self, coro):
+        """Run a coroutine on the pool's loop and wait for its result"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="postgres-io", daemon=True)
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _get_pool(self):
+        if self._pool is None:
+            import asyncpg
+            self._pool = await asyncpg.create_pool(self.dsn, min_size=self.min_size, max_size=self.max_size)
+        return self._pool
+
+    def connect(self) -> "PostgresConnection":
+        return PostgresConnection(self)
+
+    def create_schema(self):
+        """Create the tables: hypertables under TimescaleDB, monthly range partitions otherwise"""
+        self.run(self._create_schema())
+
+    async def _create_schema(self):
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            available = await conn.fetchval(
+                "SELECT count(*) FROM pg_available_extensions WHERE name = 'timescaledb'")
+            if available:
+                try:
+                    await conn.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+                    self.timescale = True
+                except Exception as e:
+                    print(f"TimescaleDB unavailable, using native partitions: {e}")
+            self._partitioned = not self.timescale
+            for ddl in POSTGRES_SCHEMA:
+                partitioning = "PARTITION BY RANGE (timestamp)" if self._partitioned else ""
+                await conn.execute(ddl.format(partitioning=partitioning))
+            if self.timescale:
+                for table in TIME_SERIES_TABLES:
+                    await conn.execute(
+                        f"SELECT create_hypertable('{table}', 'timestamp', "
+                        f"chunk_time_interval => {CHUNK_SECONDS}, if_not_exists => TRUE, migrate_data => TRUE)")
+            else:
+                # Tables created by an earlier run may be partitioned already
+                rows = await conn.fetch("SELECT c.relname FROM pg_partitioned_table p "
+                                        "JOIN pg_class c ON c.oid = p.partrelid")
+                self._partitioned = {row[0] for row in rows} >= set(TIME_SERIES_TABLES)
+                if self._partitioned:
+                    await self._ensure_partitions(conn, TIME_SERIES_TABLES, [int(time.time())])
+
+    async def _ensure_partitions(self, conn, tables: Iterable[str], timestamps: Iterable[int]):
+        """Create the monthly partitions that rows at `timestamps` fall into"""
+        months = {month_bounds(ts) for ts in timestamps}
+        for table in tables:
+            for start, end in sorted(months):
+                if (table, start) in self._partitions:
+                    continue
+                name = f"{table}_{datetime.fromtimestamp(start, timezone.utc):%Y%m}"
+                await conn.execute(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                                   f"FOR VALUES FROM ({start}) TO ({end})")
+                self._partitions.add((table, start))
+
+    async def prepare_insert(self, conn, table: str, columns: List[str], rows: Sequence[tuple]):
+        """Make sure partitions exist for rows about to be inserted"""
+        if not self._partitioned or table not in TIME_SERIES_TABLES or "timestamp" not in columns:
+            return
+        index = columns.index("timestamp")
+        stamps = {month_bounds(row[index])[0] for row in rows if row[index] is not None}
+        await self._ensure_partitions(conn, [table], stamps)
+
+    def reclaim_space(self, pages: int) -> int:
+        # Autovacuum reclaims dead tuples on its own
+        return 0
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._pool is not None:
+            self.run(self._pool.close())
+            self._pool = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+
+class PostgresConnection:
+    """DB-API style connection over one pooled asyncpg connection; a transaction opens at the first write"""
+
+    def __init__(self, storage: PostgresStorage):
+        self.storage = storage
+        self._conn = None
+        self._transaction = None
+        self._copies = 0
+
+    async def _connection(self):
+        if self._conn is None:
+            pool = await self.storage._get_pool()
+            self._conn = await pool.acquire()
+        return self._conn
+
+    async def _begin(self):
+        conn = await self._connection()
+        if self._transaction is None:
+            self._transaction = conn.transaction()
+            await self._transaction.start()
+        return conn
+
+    def cursor(self) -> "PostgresCursor":
+        return PostgresCursor(self)
+
+    def execute(self, sql: str, parameters=()) -> "PostgresCursor":
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters) -> "PostgresCursor":
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        if self._transaction is not None:
+            transaction, self._transaction = self._transaction, None
+            self.storage.run(transaction.commit())
+
+    def rollback(self):
+        if self._transaction is not None:
+            transaction, self._transaction = self._transaction, None
+            self.storage.run(transaction.rollback())
+            # Partitions created in the rolled-back transaction are gone again
+            self.storage._partitions.clear()
+
+    def close(self):
+        """Release the connection; uncommitted writes are rolled back, as with sqlite3"""
+        if self._conn is None:
+            return
+        self.rollback()
+        conn, self._conn = self._conn, None
+        self.storage.run(self.storage._pool.release(conn))
+
+
+class PostgresCursor:
+    """Cursor results are fetched eagerly; statements are profiled like ProfiledCursor's"""
+
+    def __init__(self, connection: PostgresConnection):
+        self.connection = connection
+        self.description = None
+        self.rowcount = -1
+        self._rows: List[tuple] = []
+
+    def _record(self, sql: str, parameters, seconds: float, rows: int):
+        fp = fingerprint(sql)
+        telemetry.SQL_QUERY_SECONDS.observe(seconds, statement=fp)
+        telemetry.SQL_ROWS.inc(rows, statement=fp)
+        PROFILER.record(None, fp, sql, parameters, seconds, rows)
+
+    def execute(self, sql: str, parameters=()):
+        start = time.perf_counter()
+        self.connection.storage.run(self._execute(translate(sql), tuple(parameters), sql))
+        self._record(sql, parameters, time.perf_counter() - start, len(self._rows))
+        return self
+
+    async def _execute(self, text: str, parameters: tuple, sql: str):
+        self._rows, self.description = [], None
+        if sql.lstrip()[:6].upper().startswith(_READS):
+            conn = await self.connection._connection()
+            statement = await conn.prepare(text)
+            self.description = [(attribute.name, None, None, None, None, None, None)
+                                for attribute in statement.get_attributes()]
+            self._rows = [tuple(record) for record in await statement.fetch(*parameters)]
+            self.rowcount = len(self._rows)
+            return
+        conn = await self.connection._begin()
+        target = insert_target(sql)
+        if target is not None:
+            await self.connection.storage.prepare_insert(conn, target[0], target[2], [parameters])
+        status = await conn.execute(text, *parameters)
+        tail = status.rsplit(" ", 1)[-1]
+        self.rowcount = int(tail) if tail.isdigit() else -1
+
+    def executemany(self, sql: str, seq_of_parameters):
+        rows = [tuple(row) for row in seq_of_parameters]
+        start = time.perf_counter()
+        if rows:
+            self.connection.storage.run(self._executemany(sql, rows))
+        self._record(sql, None, time.perf_counter() - start, 0)
+        return self
+
+    async def _executemany(self, sql: str, rows: List[tuple]):
+        self._rows, self.description = [], None
+        conn = await self.connection._begin()
+        target = insert_target(sql)
+        if target is not None:
+            await self.connection.storage.prepare_insert(conn, target[0], target[2], rows)
+        if target is not None and len(rows) >= COPY_MIN_ROWS and _PLAIN_VALUES.search(sql):
+            await self._copy(conn, *target, rows)
+        else:
+            await conn.executemany(translate(sql), rows)
+        self.rowcount = len(rows)
+
+    async def _copy(self, conn, table: str, verb: Optional[str], columns: List[str], rows: List[tuple]):
+        """Bulk load: COPY into a temporary table, then merge with the statement's conflict handling"""
+        self.connection._copies += 1
+        staging = f"_copy_{table}_{self.connection._copies}"
+        column_list = ", ".join(columns)
+        await conn.execute(f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+                           f"SELECT {column_list} FROM {table} WITH NO DATA")
+        await conn.copy_records_to_table(staging, records=rows, columns=columns)
+        await conn.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging}"
+                           + conflict_clause(table, verb, columns))
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size: int = 1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._rows = []
+
+
+def open_storage(backend: str, sqlite_path: str, dsn: str, sqlite_factory=sqlite3.Connection,
+                 pool_min: int = 2, pool_max: int = 10):
+    """Storage for a STORAGE_BACKEND setting ("sqlite" or "postgres")"""
+    if backend == "sqlite":
+        return SQLiteStorage(sqlite_path, sqlite_factory)
+    if backend == "postgres":
+        if not dsn:
+            raise ValueError("STORAGE_BACKEND=postgres needs DATABASE_URL")
+        return PostgresStorage(dsn, pool_min, pool_max)
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,261 @@
+"""
+Lightweight in-process metrics with a Prometheus text exposition.
+
+Counters, gauges and histograms are plain dicts keyed by label values behind
+one lock each, so recording a sample is a dict lookup, a bisect and a few
+additions. Values that already live elsewhere (cache hit counters) are read
+at scrape time through registered collector callbacks instead of being
+mirrored on every request.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+TICK_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_format(value)}"
+                                for key, value in items]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        lines = self.header()
+        bounds = self.buckets + (float("inf"),)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = f'le="{_format(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Metric]]):
+        """Register a callback producing metrics computed at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                for metric in collector():
+                    lines.extend(metric.render())
+            except Exception as e:
+                print(f"Error in metrics collector: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Request path being served, for attributing work (e.g. SQL queries) to endpoints
+current_route: ContextVar[str] = ContextVar("current_route", default="background")
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status")))
+SQL_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "sql_query_duration_seconds", "Database query latency (execute through first fetch) by statement fingerprint",
+    ("statement",), SQL_BUCKETS))
+SQL_ROWS = REGISTRY.register(Counter(
+    "sql_rows_fetched_total", "Result rows fetched by statement fingerprint", ("statement",)))
+UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    "upstream_request_duration_seconds", "Upstream call latency by provider",
+    ("provider", "operation")))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "upstream_errors_total", "Failed upstream calls by provider", ("provider", "operation")))
+SCHEDULER_TICK_SECONDS = REGISTRY.register(Histogram(
+    "scheduler_tick_duration_seconds", "Scheduled job run time", ("job",), TICK_BUCKETS))
+SCHEDULER_LAG_SECONDS = REGISTRY.register(Gauge(
+    "scheduler_tick_lag_seconds", "Delay between a job's scheduled and actual start", ("job",)))
+SCHEDULER_MISSED = REGISTRY.register(Counter(
+    "scheduler_missed_runs_total", "Scheduled runs skipped because they started too late", ("job",)))
+ANALYTICS_JOB_SECONDS = REGISTRY.register(Histogram(
+    "analytics_job_duration_seconds", "Offloaded analytics job time by outcome (ok, timeout, cancelled, error)",
+    ("job", "outcome")))
+WRITE_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "write_queue_depth", "Write groups waiting for the write-behind writer"))
+WRITE_BATCH_SECONDS = REGISTRY.register(Histogram(
+    "write_batch_duration_seconds", "Write-behind transaction time", (), SQL_BUCKETS))
+WRITE_ROWS = REGISTRY.register(Counter(
+    "write_rows_total", "Rows committed by the write-behind writer"))
+WRITE_RETRIES = REGISTRY.register(Counter(
+    "write_retries_total", "Failed write-behind transactions scheduled for a retry"))
+WRITE_ERRORS = REGISTRY.register(Counter(
+    "write_errors_total", "Write groups dropped after failing for the whole retry window"))
+TICKS_CAPTURED = REGISTRY.register(Counter(
+    "ticks_captured_total", "Price ticks appended to the tick log", ("symbol",)))
+
+
+@contextmanager
+def track_upstream(provider: str, operation: str):
+    """Time an upstream call and count it as an error if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(provider=provider, operation=operation)
+        raise
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - start, provider=provider, operation=operation)
+
+
+def cache_metrics(caches: Dict[str, object]) -> List[Metric]:
+    """Hit/miss counters and hit ratio for objects exposing `hits` and `misses`"""
+    hits = Counter("cache_hits_total", "Cache hits", ("cache",))
+    misses = Counter("cache_misses_total", "Cache misses", ("cache",))
+    ratio = Gauge("cache_hit_ratio", "Cache hits over lookups since start", ("cache",))
+    for name, cache in caches.items():
+        hits.inc(cache.hits, cache=name)
+        misses.inc(cache.misses, cache=name)
+        lookups = cache.hits + cache.misses
+        ratio.set(cache.hits / lookups if lookups else 0.0, cache=name)
+    return [hits, misses, ratio]
+
+
+def _route_template(scope) -> str:
+    """Path template of the matched route (e.g. /api/bars) to keep label cardinality bounded"""
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unmatched")
+    app = scope.get("app")
+    if app is not None:
+        from starlette.routing import Match
+        for candidate in app.router.routes:
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                return getattr(candidate, "path", "unmatched")
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency by method, route template and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        token = current_route.set(scope["path"])
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_route.reset(token)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"],
+                                         route=_route_template(scope), status=status["code"])
+
+
+def render() -> str:
+    return REGISTRY.render()
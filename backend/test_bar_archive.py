@@ -0,0 +1,69 @@
+"""
+Columnar archive checks with several workers sharing one archive directory
+"""
+import multiprocessing
+import os
+
+import numpy as np
+
+from bar_archive import CURRENT_FILE, BarArchive
+
+DAY = 86400
+START = 1_719_792_000  # 2024-07-01
+
+
+def make_bars(start: int, n: int, price: float):
+    ts = start + 3600 * np.arange(n, dtype=np.int64)
+    close = np.full(n, price)
+    return {"ts": ts, "open": close, "high": close, "low": close, "close": close, "volume": np.ones(n)}
+
+
+def test_workers_see_each_others_writes(tmp_path):
+    writer, reader = BarArchive(str(tmp_path)), BarArchive(str(tmp_path))
+    writer.replace("ETH", make_bars(START, 24 * 40, 1.0))
+    assert len(reader.read("ETH")["ts"]) == 24 * 40
+
+    writer.append("ETH", make_bars(START + 40 * DAY, 48, 2.0))
+    bars = reader.read("ETH")
+    assert len(bars["ts"]) == 24 * 42 and bars["close"][-1] == 2.0
+    assert reader.last_ts("ETH") == START + 42 * DAY - 3600
+
+    writer.replace("ETH", make_bars(START, 10, 3.0))
+    bars = reader.read("ETH")
+    assert len(bars["ts"]) == 10 and set(bars["close"]) == {3.0}
+
+
+def test_replace_upgrades_legacy_layout(tmp_path):
+    archive = BarArchive(str(tmp_path))
+    legacy = os.path.join(str(tmp_path), "ETH")
+    archive.append("ETH", make_bars(START, 24, 1.0))
+    assert os.path.isdir(os.path.join(legacy, "2024-07"))
+
+    archive.replace("ETH", make_bars(START, 5, 2.0))
+    names = os.listdir(legacy)
+    assert CURRENT_FILE in names and "2024-07" not in names and len(names) == 2
+    assert list(archive.read("ETH")["close"]) == [2.0] * 5
+
+
+def _rebuild(root: str, price: float, rounds: int):
+    archive = BarArchive(root)
+    for _ in range(rounds):
+        archive.replace("ETH", make_bars(START, 24 * 60, price))
+
+
+def test_concurrent_rebuilds_stay_whole(tmp_path):
+    root = str(tmp_path)
+    workers = [multiprocessing.Process(target=_rebuild, args=(root, price, 5)) for price in (1.0, 2.0)]
+    for worker in workers:
+        worker.start()
+    reader = BarArchive(root)
+    while any(worker.is_alive() for worker in workers):
+        bars = reader.read("ETH")
+        if len(bars["ts"]):
+            assert len(bars["ts"]) == 24 * 60 and len(set(bars["close"])) == 1
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    assert len(os.listdir(os.path.join(root, "ETH"))) == 2
+    assert len(reader.read("ETH")["ts"]) == 24 * 60
@@ -0,0 +1,46 @@
+"""
+Concentration series checks against a throwaway database
+"""
+import asyncio
+
+import main
+from timeutil import to_datetime
+
+SHARES = 100_000_000
+
+
+async def sell_to_zero():
+    main.init_database()
+    step = 1800
+    start = main.now_ts() // step * step - 2 * 86400
+    bars = [
+        (symbol, main.CSV_BAR_RESOLUTION, ts, price, price, price, price, 1.0, "test")
+        for symbol, price in ((main.DEFAULT_SYMBOL, 20.0), (main.DEFAULT_ASSET_SYMBOL, 3000.0))
+        for ts in range(start, start + 2 * 86400, step)
+    ]
+    await main.write_queue.submit([(main.INSERT_BAR, bars)])
+
+    bought, sold = start + 3600, start + 86400
+    assert await main.data_collector.add_eth_purchase_transaction(to_datetime(bought), 100.0, 3000.0, SHARES)
+    assert await main.data_collector.add_eth_purchase_transaction(to_datetime(sold), -100.0, 3100.0, SHARES)
+
+    conn = main.get_connection()
+    rows = conn.execute("""
+        SELECT timestamp, total_eth_holdings, eth_concentration_pct, eth_per_share
+        FROM eth_concentration_analysis
+        WHERE symbol = ? AND timestamp >= ?
+        ORDER BY timestamp
+    """, (main.DEFAULT_SYMBOL, bought)).fetchall()
+    conn.close()
+    return sold, rows
+
+
+def test_holdings_fall_to_zero_after_full_disposal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sold, rows = asyncio.run(sell_to_zero())
+
+    before = [row for row in rows if row[0] < sold]
+    after = [row for row in rows if row[0] >= sold]
+    assert before and after
+    assert all(row[1] == 100.0 and row[2] > 0 for row in before)
+    assert all(row[1] == 0.0 and row[2] == 0.0 and row[3] == 0.0 for row in after)
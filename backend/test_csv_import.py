@@ -5,7 +5,8 @@ Test script to verify CSV import functionality
 import asyncio
 import sqlite3
 import os
-from main import DataCollector, init_database
+from main import data_collector, init_database
+from timeutil import iso
 
 async def test_csv_import():
     """Test the CSV import functionality"""
@@ -17,10 +18,10 @@ async def test_csv_import():
     init_database()
     print("✅ Database initialized")
     
-    # Create data collector
-    print("2. Creating data collector...")
-    collector = DataCollector()
-    print("✅ Data collector created")
+    # Use the backend's shared data collector
+    print("2. Getting data collector...")
+    collector = data_collector
+    print("✅ Data collector ready")
     
     # Test CSV file exists
     csv_path = "ETHUSD_1M_FROM_PERPLEXITY.csv"
@@ -46,24 +47,24 @@ async def test_csv_import():
     cursor = conn.cursor()
     
     # Check total records
-    cursor.execute("SELECT COUNT(*) FROM eth_historical_csv WHERE source = 'perplexity_csv'")
+    cursor.execute("SELECT COUNT(*) FROM bars WHERE symbol = 'ETHUSD' AND source = 'perplexity_csv'")
     total_records = cursor.fetchone()[0]
     print(f"📊 Total records imported: {total_records}")
     
     # Check date range
     cursor.execute("""
         SELECT MIN(timestamp), MAX(timestamp) 
-        FROM eth_historical_csv 
-        WHERE source = 'perplexity_csv'
+        FROM bars
+        WHERE symbol = 'ETHUSD' AND source = 'perplexity_csv'
     """)
     date_range = cursor.fetchone()
-    print(f"📅 Date range: {date_range[0]} to {date_range[1]}")
+    print(f"📅 Date range: {iso(date_range[0])} to {iso(date_range[1])}")
     
     # Check price range
     cursor.execute("""
         SELECT MIN(close_price), MAX(close_price), AVG(close_price)
-        FROM eth_historical_csv 
-        WHERE source = 'perplexity_csv'
+        FROM bars
+        WHERE symbol = 'ETHUSD' AND source = 'perplexity_csv'
     """)
     price_stats = cursor.fetchone()
     print(f"💰 Price range: ${price_stats[0]:.2f} - ${price_stats[1]:.2f} (avg: ${price_stats[2]:.2f})")
@@ -71,26 +72,25 @@ async def test_csv_import():
     # Sample some records
     cursor.execute("""
         SELECT timestamp, close_price 
-        FROM eth_historical_csv 
-        WHERE source = 'perplexity_csv'
+        FROM bars
+        WHERE symbol = 'ETHUSD' AND source = 'perplexity_csv'
         ORDER BY timestamp DESC 
         LIMIT 5
     """)
     sample_records = cursor.fetchall()
     print("\n📈 Latest 5 price points:")
     for record in sample_records:
-        print(f"  {record[0]}: ${record[1]:.2f}")
+        print(f"  {iso(record[0])}: ${record[1]:.2f}")
     
     conn.close()
     
     # Test data retrieval
     print("\n5. Testing data retrieval...")
-    historical_data = await collector.get_eth_historical_from_csv(24)  # Last 24 hours
-    print(f"📈 Retrieved {len(historical_data)} data points for last 24 hours")
+    bars = await collector.get_eth_historical_from_csv(24)  # Last 24 hours
+    print(f"📈 Retrieved {len(bars['ts'])} data points for last 24 hours")
     
-    if historical_data:
-        latest = historical_data[-1]
-        print(f"🔥 Latest data point: {latest['timestamp']} - ${latest['close']:.2f}")
+    if len(bars["ts"]):
+        print(f"🔥 Latest data point: {iso(int(bars['ts'][-1]))} - ${bars['close'][-1]:.2f}")
         print("✅ Data retrieval test passed")
     else:
         print("⚠️  No data retrieved for last 24 hours (might be expected if CSV is older)")
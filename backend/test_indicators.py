@@ -0,0 +1,56 @@
+"""
+Indicator cache checks: extending the cache bar by bar must match a full recompute
+"""
+import numpy as np
+
+from indicators import IndicatorCache, rolling_comoment
+
+WINDOWS = (2, 20)
+COLUMNS = ("sma", "ema", "vwap", "realized_vol", "atr", "correlation", "beta")
+
+
+def make_bars(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    close = 2000.0 * np.exp(np.cumsum(rng.normal(0.0, 1e-3, n)))
+    return {
+        "ts": 1_700_000_000 + 60 * np.arange(n, dtype=np.int64),
+        "open": close,
+        "high": close * 1.001,
+        "low": close * 0.999,
+        "close": close,
+        "volume": rng.uniform(1.0, 10.0, n),
+    }
+
+
+def test_rolling_comoment_matches_direct_sum():
+    rng = np.random.default_rng(7)
+    for n, window in ((10, 2), (37, 5), (51, 50), (200, 13)):
+        x, y = rng.normal(2000.0, 2.0, n), rng.normal(-3.0, 1.0, n)
+        expected = np.full(n, np.nan)
+        for i in range(window - 1, n):
+            a, b = x[i - window + 1:i + 1], y[i - window + 1:i + 1]
+            expected[i] = ((a - a.mean()) * (b - b.mean())).sum()
+        np.testing.assert_allclose(rolling_comoment(x, y, window), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_incremental_matches_full_recompute():
+    data = {"A": make_bars(200_000, 1), "B": make_bars(200_000, 2)}
+    visible = [150_000]
+
+    def loader(series, after_ts):
+        bars = {field: column[:visible[0]] for field, column in data[series].items()}
+        if after_ts is None:
+            return bars
+        start = int(np.searchsorted(bars["ts"], after_ts, side="right"))
+        return {field: column[start:] for field, column in bars.items()}
+
+    incremental = IndicatorCache(loader)
+    for visible[0] in range(150_000, 200_001, 10_000):
+        extended = {window: incremental.get("A", window, benchmark="B") for window in WINDOWS}
+
+    full = IndicatorCache(loader)
+    for window in WINDOWS:
+        expected = full.get("A", window, benchmark="B")
+        for column in COLUMNS:
+            np.testing.assert_allclose(extended[window][column], expected[column],
+                                       rtol=1e-9, atol=1e-12, err_msg=f"{column} window={window}")
@@ -0,0 +1,53 @@
+"""
+Cursor pagination checks for the CSV bar history routes
+"""
+import asyncio
+import json
+
+from starlette.requests import Request
+
+import main
+
+STEP = 1800
+BARS = 20
+
+
+def request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+
+
+async def read_pages(route, symbol: str):
+    main.init_database()
+    start = main.now_ts() // STEP * STEP - BARS * STEP
+    bars = [(symbol, main.CSV_BAR_RESOLUTION, ts, 10.0, 10.0, 10.0, 10.0, 1.0, "test")
+            for ts in range(start, start + BARS * STEP, STEP)]
+    await main.write_queue.submit([(main.INSERT_BAR, bars)])
+
+    pages, after = [], None
+    while True:
+        response = await route(request(), timeframe="24H", symbol=symbol, after_ts=after, limit=8)
+        page = json.loads(response.body)
+        pages.append(page)
+        if page["next_after_ts"] is None:
+            break
+        after = page["next_after_ts"]
+    # Polling from the newest bar seen is the steady state: nothing new yet
+    last = pages[-1]["data"][-1]["timestamp"]
+    past_end = await route(request(), timeframe="24H", symbol=symbol, after_ts=last, limit=8)
+    return pages, past_end
+
+
+def check_pages(pages, past_end):
+    assert [len(page["data"]) for page in pages] == [8, 8, 4]
+    page = json.loads(past_end.body)
+    assert page["data"] == [] and page["next_after_ts"] is None
+
+
+def test_stock_csv_pages_past_last_bar(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    check_pages(*asyncio.run(read_pages(main.get_sbet_historical_csv_data, "SBET")))
+
+
+def test_asset_csv_pages_past_last_bar(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    check_pages(*asyncio.run(read_pages(main.get_eth_historical_csv_data, "ETHUSD")))
@@ -0,0 +1,37 @@
+"""
+Projection request bounds: oversized scenario grids are rejected before any work
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main.init_database()
+
+
+def rejected(**params) -> str:
+    with pytest.raises(HTTPException) as info:
+        asyncio.run(main.get_projections(None, **params))
+    assert info.value.status_code == 400
+    return info.value.detail
+
+
+def values(n: int) -> str:
+    return ",".join(str(i + 1) for i in range(n))
+
+
+def test_scenario_lists_are_capped():
+    limit = main.MAX_SCENARIO_VALUES
+    assert "at most" in rejected(mnav=values(limit + 1))
+    assert "at most" in rejected(new_shares=values(limit + 1))
+    assert main.parse_float_list(values(limit), "mnav").shape == (limit,)
+
+
+def test_simulation_size_is_capped():
+    assert "paths" in rejected(mnav=values(50), new_shares=values(50), paths=100_000)
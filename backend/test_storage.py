@@ -0,0 +1,103 @@
+"""
+Storage adapter checks. The Postgres tests run against a real server and are
+skipped unless TEST_DATABASE_URL is set; each run uses a throwaway schema.
+"""
+import asyncio
+import os
+import uuid
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+import pytest
+
+import main
+from storage import open_storage, translate
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+START = 1_751_328_000  # 2025-07-01
+
+PAIRED_ROWS = """
+    SELECT COUNT(*) FROM price_history ph
+    JOIN metrics m ON m.symbol = ph.symbol AND m.timestamp = ph.timestamp
+    WHERE ph.symbol = ?
+"""
+
+
+def test_snapshot_upserts_target_symbol_timestamp():
+    sql = translate(main.INSERT_PRICE_HISTORY)
+    assert sql.lstrip().startswith("INSERT INTO price_history")
+    assert "ON CONFLICT (symbol, timestamp) DO UPDATE SET eth_price = EXCLUDED.eth_price" in sql
+    assert "$8" in sql and "?" not in sql
+
+
+def snapshot_rows(start: int, n: int, eth_price: float):
+    prices = [(start + 300 * i, "SBET", eth_price, 20.0, 1_000_000, 100.0, 50_000, "live") for i in range(n)]
+    metrics = [(start + 300 * i, "SBET", 1.5, 0.002, 50.0, 100.0 * eth_price, "live") for i in range(n)]
+    return prices, metrics
+
+
+@pytest.fixture
+def postgres(monkeypatch):
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    asyncpg = pytest.importorskip("asyncpg")
+    schema = f"test_storage_{uuid.uuid4().hex[:12]}"
+
+    async def admin(statement: str):
+        conn = await asyncpg.connect(TEST_DATABASE_URL)
+        try:
+            await conn.execute(statement)
+        finally:
+            await conn.close()
+
+    asyncio.run(admin(f"CREATE SCHEMA {schema}"))
+    # Unknown DSN query parameters are passed to the server as settings
+    parts = urlsplit(TEST_DATABASE_URL)
+    query = "&".join(q for q in (parts.query, urlencode({"search_path": f"{schema},public"})) if q)
+    storage = open_storage("postgres", "", urlunsplit(parts._replace(query=query)), pool_min=1, pool_max=2)
+    monkeypatch.setattr(main, "storage", storage)
+    try:
+        main.init_database()
+        yield storage
+    finally:
+        storage.close()
+        asyncio.run(admin(f"DROP SCHEMA {schema} CASCADE"))
+
+
+def test_postgres_snapshots_round_trip(postgres):
+    conn = postgres.connect()
+    cursor = conn.cursor()
+    # 600 rows go through COPY, a single row through a plain upsert
+    prices, metrics = snapshot_rows(START, 600, 2500.0)
+    cursor.executemany(main.INSERT_PRICE_HISTORY, prices)
+    cursor.executemany(main.INSERT_METRICS, metrics)
+    cursor.execute(main.INSERT_PRICE_HISTORY, (START, "SBET", 2600.0, 20.0, 1_000_000, 100.0, 50_000, "live"))
+    conn.commit()
+
+    cursor.execute("SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM price_history WHERE symbol = ?", ("SBET",))
+    assert cursor.fetchone() == (600, START, START + 300 * 599)
+    cursor.execute("SELECT eth_price FROM price_history WHERE symbol = ? AND timestamp = ?", ("SBET", START))
+    assert cursor.fetchone()[0] == 2600.0
+    cursor.execute(PAIRED_ROWS, ("SBET",))
+    assert cursor.fetchone()[0] == 600
+
+    # Re-collecting the same ticks through COPY replaces both halves of each pair
+    prices, metrics = snapshot_rows(START, 600, 3000.0)
+    cursor.executemany(main.INSERT_PRICE_HISTORY, prices)
+    cursor.executemany(main.INSERT_METRICS, metrics)
+    conn.commit()
+    cursor.execute(PAIRED_ROWS, ("SBET",))
+    assert cursor.fetchone()[0] == 600
+    cursor.execute("SELECT MIN(treasury_value_usd), MAX(treasury_value_usd) FROM metrics WHERE symbol = ?", ("SBET",))
+    assert cursor.fetchone() == (300_000.0, 300_000.0)
+    conn.close()
+
+
+def test_postgres_write_rolls_back(postgres):
+    conn = postgres.connect()
+    cursor = conn.cursor()
+    prices, _ = snapshot_rows(START, 3, 2500.0)
+    cursor.executemany(main.INSERT_PRICE_HISTORY, prices)
+    conn.rollback()
+    cursor.execute("SELECT COUNT(*) FROM price_history")
+    assert cursor.fetchone()[0] == 0
+    conn.close()
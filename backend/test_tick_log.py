@@ -0,0 +1,59 @@
+"""
+Tick log checks: one writer across workers, and compacted bars expire with the raw tier
+"""
+import asyncio
+
+import numpy as np
+
+import main
+from tick_log import TickLog
+
+DAY = 86400
+
+
+def test_one_writer_at_a_time(tmp_path):
+    first, second = TickLog(str(tmp_path)), TickLog(str(tmp_path))
+    assert first.claim_writer() and first.claim_writer()
+    assert not second.claim_writer()
+    first.release_writer()
+    assert second.claim_writer()
+    assert not first.claim_writer()
+    second.release_writer()
+
+
+def minute_bars(start: int, n: int):
+    ts = start + 60 * np.arange(n, dtype=np.int64)
+    close = np.full(n, 10.0)
+    return {"ts": ts, "open": close, "high": close, "low": close, "close": close, "volume": np.full(n, np.nan)}
+
+
+async def expire(symbol: str, old: int, recent: int):
+    main.init_database()
+    main.tick_log.append({symbol: (recent * 1000, 10.0)})
+    await main.write_queue.submit([(main.INSERT_BAR, [
+        (symbol, main.CSV_BAR_RESOLUTION, old, 10.0, 10.0, 10.0, 10.0, 1.0, "csv")])])
+    for start in (old, recent):
+        bars = minute_bars(start, 30)
+        await main.write_queue.submit([(main.INSERT_BAR, [
+            (symbol, main.TICK_BAR_RESOLUTION, ts, 10.0, 10.0, 10.0, 10.0, None, "ticks")
+            for ts in bars["ts"].tolist()])])
+        main.bar_archive.append(main.archive_key(symbol, main.TICK_BAR_RESOLUTION), bars)
+    changes = await main.expire_tick_bars(main.now_ts())
+    await main.write_queue.flush()
+    return changes
+
+
+def test_tick_bars_expire_with_raw_tier(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    symbol = "ETHUSD"
+    now = main.now_ts()
+    old = now - (main.RETENTION_RAW_DAYS + 62) * DAY
+    recent = now - 3600
+    changes = asyncio.run(expire(symbol, old, recent))
+    assert changes == {f"bars:{symbol}": old}
+
+    key = main.archive_key(symbol, main.TICK_BAR_RESOLUTION)
+    assert list(main.bar_archive.read(key)["ts"]) == list(minute_bars(recent, 30)["ts"])
+    assert main.first_bar_ts(symbol, main.TICK_BAR_RESOLUTION) == recent
+    # The 30m CSV bars of the same symbol are not this tier's
+    assert main.first_bar_ts(symbol, main.CSV_BAR_RESOLUTION) == old
@@ -0,0 +1,116 @@
+"""
+Write-behind queue checks: transient failures are retried in submission order,
+permanent ones are dropped without holding up the rest
+"""
+import asyncio
+import sqlite3
+
+import telemetry
+from write_queue import WriteBehindQueue
+
+INSERT = "INSERT INTO price_history (timestamp, symbol) VALUES (?, ?)"
+
+
+class FlakyConnection:
+    """sqlite3 connection whose cursors fail inserts through FlakyDatabase._fail first"""
+
+    def __init__(self, db: "FlakyDatabase"):
+        self.db = db
+        self.conn = sqlite3.connect(db.path)
+
+    def cursor(self):
+        return self
+
+    def executemany(self, sql: str, params):
+        for row in params:
+            self.db._fail(row[0])
+        return self.conn.executemany(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+class FlakyDatabase:
+    """SQLite file whose first `failures` connects or inserts (of `fail_ts`, if set) raise 'database is locked'"""
+
+    def __init__(self, path: str, failures: int, fail_on: str, fail_ts: int = None):
+        self.path = path
+        self.failures = failures
+        self.fail_on = fail_on
+        self.fail_ts = fail_ts
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE price_history (timestamp INTEGER, symbol TEXT)")
+        conn.commit()
+        conn.close()
+
+    def _fail(self, ts: int = None):
+        if self.failures > 0 and self.fail_ts in (None, ts):
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+
+    def connect(self):
+        if self.fail_on == "connect":
+            self._fail()
+        if self.fail_on == "insert":
+            return FlakyConnection(self)
+        return sqlite3.connect(self.path)
+
+    def rows(self):
+        conn = sqlite3.connect(self.path)
+        rows = conn.execute("SELECT timestamp, symbol FROM price_history ORDER BY rowid").fetchall()
+        conn.close()
+        return rows
+
+
+async def submit_all(queue: WriteBehindQueue, count: int, bad: int = None):
+    queue.start()
+    for ts in range(count):
+        sql = INSERT.replace("price_history", "missing_table") if ts == bad else INSERT
+        await queue.submit([(sql, [(ts, "SBET")])])
+    await queue.flush()
+    running = queue.running
+    await queue.stop()
+    return running
+
+
+def test_failed_writes_are_retried(tmp_path):
+    for fail_on in ("connect", "insert"):
+        db = FlakyDatabase(str(tmp_path / f"{fail_on}.db"), failures=3, fail_on=fail_on)
+        queue = WriteBehindQueue(db.connect, retry_seconds=10, retry_backoff=0.01)
+        assert asyncio.run(submit_all(queue, 20))
+        assert db.failures == 0
+        assert db.rows() == [(ts, "SBET") for ts in range(20)]
+
+
+def test_retry_keeps_submission_order(tmp_path):
+    # All 10 groups share one batch; group 3 fails twice, so nothing after it may land first
+    db = FlakyDatabase(str(tmp_path / "order.db"), failures=2, fail_on="insert", fail_ts=3)
+    queue = WriteBehindQueue(db.connect, retry_seconds=10, retry_backoff=0.01)
+    assert asyncio.run(submit_all(queue, 10))
+    assert db.failures == 0
+    assert db.rows() == [(ts, "SBET") for ts in range(10)]
+
+
+def test_permanent_failure_is_dropped_at_once(tmp_path):
+    db = FlakyDatabase(str(tmp_path / "bad.db"), failures=0, fail_on="insert")
+    errors = sum(telemetry.WRITE_ERRORS._values.values())
+    # A retry window longer than any test run: only an immediate drop lets this finish
+    queue = WriteBehindQueue(db.connect, retry_seconds=3600, retry_backoff=60)
+    assert asyncio.run(submit_all(queue, 10, bad=4))
+    assert db.rows() == [(ts, "SBET") for ts in range(10) if ts != 4]
+    assert sum(telemetry.WRITE_ERRORS._values.values()) == errors + 1
+
+
+def test_direct_writes_are_retried(tmp_path):
+    db = FlakyDatabase(str(tmp_path / "direct.db"), failures=2, fail_on="insert")
+    queue = WriteBehindQueue(db.connect, retry_seconds=10, retry_backoff=0.01)
+    asyncio.run(queue.submit([(INSERT, [(1, "SBET")])]))
+    assert db.rows() == [(1, "SBET")]
+
+
+def test_group_is_dropped_after_retry_window(tmp_path):
+    db = FlakyDatabase(str(tmp_path / "dropped.db"), failures=10 ** 6, fail_on="connect")
+    queue = WriteBehindQueue(db.connect, retry_seconds=0.05, retry_backoff=0.01)
+    assert asyncio.run(submit_all(queue, 2))
+    db.failures = 0
+    assert db.rows() == []
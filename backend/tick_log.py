@@ -0,0 +1,133 @@
+"""
+Append-only segment log for high-frequency price ticks.
+
+Layout: <root>/<SYMBOL>/<segment start>.ticks, one file per symbol per
+segment (an hour by default). A tick is a raw little-endian float64 pair
+(epoch milliseconds, price) - the same [ms, price] points CoinGecko's
+market_chart returns - so a segment maps straight onto an (n, 2) array.
+Appends are fsynced; a torn trailing record left by a crash is ignored on
+read. Ticks are compacted into minute bars elsewhere, after which whole
+segments older than the retention window are deleted, so the raw log stays
+bounded and never touches SQLite.
+
+API workers share the log directory, but only one of them captures and
+compacts: the holder of the writer lock (an flock on <root>/.writer.lock,
+where fcntl is available). The others keep asking for it, so one takes over
+when the holder exits.
+"""
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process writes
+    fcntl = None
+
+import numpy as np
+
+TICK_DTYPE = np.dtype("<f8")
+TICK_BYTES = 2 * TICK_DTYPE.itemsize
+WRITER_LOCK = ".writer.lock"
+
+
+class TickLog:
+    """Per-symbol, per-segment tick files with append, range read and expiry"""
+
+    def __init__(self, root: str, segment_seconds: int = 3600):
+        self.root = root
+        self.segment_seconds = segment_seconds
+        self._lock = threading.Lock()
+        self._writer_lock = None
+
+    def claim_writer(self) -> bool:
+        """Whether this process is the log's writer, taking the lock (without waiting) if it is free"""
+        if fcntl is None:
+            return True
+        with self._lock:
+            if self._writer_lock is not None:
+                return True
+            os.makedirs(self.root, exist_ok=True)
+            lock_file = open(os.path.join(self.root, WRITER_LOCK), "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._writer_lock = lock_file
+            return True
+
+    def release_writer(self):
+        """Give up the writer lock so another process can take over"""
+        with self._lock:
+            if self._writer_lock is not None:
+                self._writer_lock.close()
+                self._writer_lock = None
+
+    def symbols(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def segments(self, symbol: str) -> List[Tuple[int, str]]:
+        """(segment start in epoch seconds, path) for each segment of a symbol, oldest first"""
+        path = os.path.join(self.root, symbol)
+        if not os.path.isdir(path):
+            return []
+        found = []
+        for name in os.listdir(path):
+            stem, ext = os.path.splitext(name)
+            if ext == ".ticks" and stem.isdigit():
+                found.append((int(stem), os.path.join(path, name)))
+        return sorted(found)
+
+    def append(self, ticks: Dict[str, Tuple[int, float]]):
+        """Durably append one (epoch ms, price) tick per symbol"""
+        with self._lock:
+            for symbol, (ts_ms, price) in ticks.items():
+                start = int(ts_ms) // 1000 // self.segment_seconds * self.segment_seconds
+                directory = os.path.join(self.root, symbol)
+                os.makedirs(directory, exist_ok=True)
+                record = np.array([ts_ms, price], dtype=TICK_DTYPE).tobytes()
+                fd = os.open(os.path.join(directory, f"{start}.ticks"), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                try:
+                    os.write(fd, record)
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+    def read(self, symbol: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> np.ndarray:
+        """Ticks with start_ms <= ts < end_ms as an (n, 2) [ms, price] array, time-ordered"""
+        chunks = []
+        for start, path in self.segments(symbol):
+            if end_ms is not None and start * 1000 >= end_ms:
+                break
+            if start_ms is not None and (start + self.segment_seconds) * 1000 <= start_ms:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            rows = len(data) // TICK_BYTES
+            chunks.append(np.frombuffer(data, dtype=TICK_DTYPE, count=rows * 2).reshape(rows, 2))
+        if not chunks:
+            return np.empty((0, 2), dtype=TICK_DTYPE)
+
+        ticks = np.concatenate(chunks)
+        keep = np.ones(len(ticks), dtype=bool)
+        if start_ms is not None:
+            keep &= ticks[:, 0] >= start_ms
+        if end_ms is not None:
+            keep &= ticks[:, 0] < end_ms
+        ticks = ticks[keep]
+        # A writer taking over mid-segment may append slightly out of order
+        return ticks[np.argsort(ticks[:, 0], kind="stable")]
+
+    def drop_before(self, symbol: str, ts: int) -> int:
+        """Delete segments that end at or before `ts` (epoch seconds); returns how many"""
+        dropped = 0
+        with self._lock:
+            for start, path in self.segments(symbol):
+                if start + self.segment_seconds > ts:
+                    break
+                os.remove(path)
+                dropped += 1
+        return dropped
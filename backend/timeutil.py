@@ -0,0 +1,69 @@
+"""
+Timestamp helpers.
+
+Every table stores timestamps as UTC epoch seconds (INTEGER). Conversions to
+and from text only happen at the edges: CSV import, query parameters and
+JSON serialization.
+"""
+import os
+import time
+from datetime import datetime, timezone
+from typing import Callable, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# Timezone of the naive timestamps in the bundled market-data CSVs
+CSV_TIMEZONE = ZoneInfo(os.getenv("CSV_TIMEZONE", "America/New_York"))
+
+
+# Source of "now"; replay swaps in a simulated clock
+_clock: Callable[[], float] = time.time
+
+
+def set_clock(clock: Optional[Callable[[], float]] = None):
+    """Make now_ts() read `clock` (epoch seconds); None restores the wall clock"""
+    global _clock
+    _clock = clock if clock is not None else time.time
+
+
+def now_ts() -> int:
+    """Current UTC epoch seconds"""
+    return int(_clock())
+
+
+def to_ts(dt: datetime, assume_tz=None) -> int:
+    """Convert a datetime to epoch seconds; naive values are read in `assume_tz` (default local)"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=assume_tz) if assume_tz is not None else dt.astimezone()
+    return int(dt.timestamp())
+
+
+def parse_ts(text: str, assume_tz=timezone.utc) -> int:
+    """Parse an ISO date/datetime string into epoch seconds"""
+    return to_ts(datetime.fromisoformat(text), assume_tz)
+
+
+def parse_csv_ts(text: str) -> int:
+    """Parse a market-local CSV timestamp (e.g. 2025-07-02 02:30:00) into epoch seconds"""
+    return to_ts(datetime.strptime(text, "%Y-%m-%d %H:%M:%S"), CSV_TIMEZONE)
+
+
+def to_datetime(ts: int) -> datetime:
+    """Epoch seconds to an aware UTC datetime"""
+    return datetime.fromtimestamp(ts, timezone.utc)
+
+
+def iso(ts: Optional[int]) -> Optional[str]:
+    """Epoch seconds to an ISO-8601 UTC string"""
+    if ts is None:
+        return None
+    return to_datetime(ts).isoformat()
+
+
+def iso_many(ts: Iterable[int]) -> List[str]:
+    """Vectorized epoch seconds to ISO-8601 UTC strings"""
+    arr = np.asarray(ts, dtype=np.int64)
+    if not len(arr):
+        return []
+    return [text + "+00:00" for text in arr.astype("datetime64[s]").astype(str).tolist()]
@@ -0,0 +1,187 @@
+"""
+Async write-behind queue for SQLite inserts.
+
+Producers submit groups of statements (SQL plus parameter rows) and return
+without touching the database. A single writer task drains whatever has
+queued up, up to a row budget, and runs it as one transaction on a worker
+thread, so many small producer writes cost one commit. Groups are applied in
+submission order and a group is never split across transactions, which keeps
+rows that must land together (price_history and metrics pairs) together.
+The queue is bounded: when it is full, producers wait for the writer.
+
+A group that fails transiently (a locked database, a dropped connection) is
+retried with exponential backoff ahead of everything queued after it, and is
+only dropped once it has kept failing for `retry_seconds`. Meanwhile the queue
+fills and producers wait, rather than losing writes. A group that fails for
+any other reason (a constraint, bad SQL) would fail every time, so it is
+logged and dropped at once and the groups behind it go ahead.
+"""
+import asyncio
+import sqlite3
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import telemetry
+
+# One statement of a write group: (sql, parameter rows)
+Statement = Tuple[str, Sequence[tuple]]
+
+# SQLite errors worth retrying, by message
+TRANSIENT_SQLITE_MESSAGES = ("locked", "busy", "unable to open")
+
+# PostgreSQL SQLSTATE classes/codes worth retrying: connection exceptions, serialization
+# failures and deadlocks, too many connections, server shutting down or starting up
+TRANSIENT_SQLSTATES = ("08", "40001", "40P01", "53300", "57P01", "57P02", "57P03")
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed write may succeed if retried unchanged"""
+    if isinstance(error, sqlite3.OperationalError):
+        message = str(error).lower()
+        return any(text in message for text in TRANSIENT_SQLITE_MESSAGES)
+    if isinstance(error, (OSError, TimeoutError)):
+        return True
+    # asyncpg errors carry the server's SQLSTATE (a lost connection is 08003)
+    sqlstate = getattr(error, "sqlstate", None)
+    return bool(sqlstate) and sqlstate.startswith(TRANSIENT_SQLSTATES)
+
+
+class WriteBehindQueue:
+    """Batches submitted write groups into grouped transactions on one writer task"""
+
+    def __init__(self, connect: Callable, max_pending: int = 1000, max_batch_rows: int = 5000,
+                 retry_seconds: float = 300.0, retry_backoff: float = 0.5, max_backoff: float = 30.0):
+        self.connect = connect
+        self.max_pending = max_pending
+        self.max_batch_rows = max_batch_rows
+        self.retry_seconds = retry_seconds
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None and not self._writer.done()
+
+    def start(self):
+        """Start the writer task on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._writer = asyncio.create_task(self._run())
+
+    async def submit(self, statements: List[Statement]):
+        """
+        Queue a group of statements to be committed together.
+        Without a running writer (scripts, tests) the group is written immediately.
+        """
+        if not self.running:
+            await self._commit([statements])
+            return
+        await self._queue.put(statements)
+        telemetry.WRITE_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def flush(self):
+        """Wait until everything submitted so far is committed"""
+        if self.running:
+            await self._queue.join()
+
+    async def stop(self):
+        """Flush pending writes and stop the writer"""
+        if not self.running:
+            return
+        await self.flush()
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+
+    async def _run(self):
+        while True:
+            groups = [await self._queue.get()]
+            rows = sum(len(params) for _, params in groups[0])
+            # Take whatever else is already waiting, up to the row budget
+            while rows < self.max_batch_rows and not self._queue.empty():
+                group = self._queue.get_nowait()
+                groups.append(group)
+                rows += sum(len(params) for _, params in group)
+            try:
+                await self._commit(groups)
+            finally:
+                for _ in groups:
+                    self._queue.task_done()
+                telemetry.WRITE_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _commit(self, groups: List[List[Statement]]):
+        """
+        Write groups in order. A transient failure is retried with backoff until `retry_seconds`
+        have passed; a group failing permanently is dropped and the rest carry on.
+        """
+        deadline = time.monotonic() + self.retry_seconds
+        delay = self.retry_backoff
+        while True:
+            try:
+                groups, error = await asyncio.to_thread(self._write, groups)
+            except Exception as e:
+                # connect() itself failed; nothing was written
+                error = e
+            if not groups:
+                return
+            if not is_transient(error):
+                print(f"Error in write-behind batch, dropping a group that cannot be written: "
+                      f"{type(error).__name__}: {error}")
+                telemetry.WRITE_ERRORS.inc()
+                groups = groups[1:]
+                continue
+            if time.monotonic() >= deadline:
+                print(f"Error in write-behind batch, dropping {len(groups)} groups after "
+                      f"{self.retry_seconds:.0f}s of retries: {error}")
+                telemetry.WRITE_ERRORS.inc(len(groups))
+                return
+            print(f"Error in write-behind batch, retrying {len(groups)} groups in {delay:.1f}s: {error}")
+            telemetry.WRITE_RETRIES.inc()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+
+    def _write(self, groups: List[List[Statement]]) -> Tuple[List[List[Statement]], Optional[Exception]]:
+        """
+        Commit groups in one transaction; on failure write them one by one up to the group that fails.
+        Returns that group and everything after it (still in order) with its error, or ([], None).
+        """
+        conn = self.connect()
+        try:
+            start = time.perf_counter()
+            try:
+                self._execute(conn, groups)
+            except Exception as e:
+                conn.rollback()
+                if len(groups) == 1:
+                    return groups, e
+                for i, group in enumerate(groups):
+                    try:
+                        self._execute(conn, [group])
+                    except Exception as e:
+                        conn.rollback()
+                        return groups[i:], e
+            telemetry.WRITE_BATCH_SECONDS.observe(time.perf_counter() - start)
+            return [], None
+        finally:
+            try:
+                conn.close()
+            except Exception as e:
+                # Whatever was committed stays committed; only the connection is lost
+                print(f"Error closing write-behind connection: {e}")
+
+    @staticmethod
+    def _execute(conn, groups: List[List[Statement]]):
+        cursor = conn.cursor()
+        rows = 0
+        for group in groups:
+            for sql, params in group:
+                cursor.executemany(sql, params)
+                rows += len(params)
+        conn.commit()
+        telemetry.WRITE_ROWS.inc(rows)